@@ -0,0 +1,299 @@
+from dataclasses import dataclass, field, replace
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from api.config import get_settings
+from api.core.port.task import TaskRepository
+from api.core.port.project import ProjectRepository
+from api.core.port.event import EventPublisher
+from api.core.port.analytics import AnalyticsRepository
+from api.core.port.history import HistoryRepository
+from api.core.port.transaction import UnitOfWork
+
+
+@dataclass(frozen=True)
+class Backend:
+    name: str
+    get_db: Callable[[], Iterator[Session]]
+    ensure_schema: Callable[[], bool]
+    task_repository: Callable[[Session], TaskRepository]
+    project_repository: Callable[[Session], ProjectRepository]
+    event_publisher: Callable[[Session], EventPublisher]
+    analytics_repository: Callable[[Session], AnalyticsRepository]
+    # False when state lives in the process, so only one worker may serve it
+    multiprocess: bool = True
+    # runs work against repositories that share one transaction, see api.core.port.transaction;
+    # None when the store cannot give one, as with shards
+    transaction: Optional[Callable[[Session, Callable[[UnitOfWork], Any]], Any]] = None
+    # moves completed work older than the given number of days out of the hot tables
+    archive: Optional[Callable[[int], dict]] = None
+    # copies the database into a directory while it is in use, see api.adapters.sqlite.backup
+    backup: Optional[Callable[..., dict]] = None
+    # scheduled upkeep of the database files, see api.adapters.sqlite.maintenance
+    maintenance: Optional[Any] = None
+    # every write and event, kept apart from the database, see api.adapters.history
+    history: Optional[HistoryRepository] = None
+    # tells the other workers on this host which entities a commit wrote, see
+    # api.adapters.invalidation; started in each worker
+    invalidation: Optional[Any] = None
+    # drops what this process cached about entities another worker wrote, or everything
+    # when given None
+    invalidate: Optional[Callable[[Optional[Set[Any]]], None]] = None
+    # called with what each commit in this process wrote, once it has committed
+    commit_listeners: List[Callable[[List[Any]], None]] = field(default_factory=list)
+    # named sources for GET /metrics
+    metrics: Dict[str, Callable[[], dict]] = field(default_factory=dict)
+    # releases process-wide resources on shutdown
+    close: Callable[[], None] = lambda: None
+
+
+def _sqlite_backend() -> Backend:
+    from api.adapters.sqlite.db import (
+        DATABASE_URL, ARCHIVE_PATH, engine, get_db, ensure_schema, is_memory_database
+    )
+    from api.adapters.sqlite.archive import ensure_archive_schema, archive_completed
+    from api.adapters.sqlite.backup import backup_databases, database_name
+    from api.adapters.sqlite.project import SQLiteTaskRepository, SQLiteProjectRepository, run_in_transaction
+    from api.adapters.sqlite.analytics import SQLiteAnalyticsRepository
+    from api.adapters.memory.event import InMemoryEventPublisher
+
+    settings = get_settings()
+    if settings.sqlite_shards > 1:
+        return _sharded_sqlite_backend(DATABASE_URL, settings.sqlite_shards)
+
+    writer = None
+    maintenance = None
+    metrics = {}
+    # an in-memory database has a single shared connection, so there is nothing to batch on
+    if settings.sqlite_group_commit and not is_memory_database(DATABASE_URL):
+        from api.adapters.sqlite.writer import GroupCommitWriter
+        writer = GroupCommitWriter(
+            DATABASE_URL,
+            max_batch=settings.sqlite_group_commit_max_batch,
+            max_delay=settings.sqlite_group_commit_max_delay_ms / 1000,
+        )
+        metrics["group_commit"] = writer.stats
+    if not is_memory_database(DATABASE_URL):
+        maintenance = _maintenance({"main": engine})
+        metrics["maintenance"] = maintenance.stats
+
+    def ensure_schemas() -> bool:
+        changed = ensure_schema()
+        return ensure_archive_schema() or changed
+
+    def close():
+        if maintenance:
+            maintenance.close()
+        if writer:
+            writer.close()
+        engine.dispose()
+
+    publisher = InMemoryEventPublisher()
+    return Backend(
+        name="sqlite",
+        get_db=get_db,
+        ensure_schema=ensure_schemas,
+        task_repository=lambda db: SQLiteTaskRepository(db, writer),
+        project_repository=lambda db: SQLiteProjectRepository(db, writer),
+        event_publisher=lambda db: publisher,
+        analytics_repository=SQLiteAnalyticsRepository,
+        transaction=partial(run_in_transaction, writer, publisher),
+        archive=archive_completed if ARCHIVE_PATH else None,
+        backup=partial(backup_databases, {
+            "memory" if is_memory_database(DATABASE_URL) else database_name(engine): engine
+        }),
+        maintenance=maintenance,
+        metrics=metrics,
+        close=close,
+    )
+
+
+def _maintenance(engines):
+    from api.adapters.sqlite.maintenance import Maintenance
+
+    settings = get_settings()
+    return Maintenance(
+        engines,
+        interval=settings.sqlite_maintenance_interval_s,
+        pages_per_step=settings.sqlite_maintenance_vacuum_pages,
+        idle_requests=settings.sqlite_maintenance_idle_requests,
+    )
+
+
+def _sharded_sqlite_backend(url: str, count: int) -> Backend:
+    from api.adapters.sqlite.shard import (
+        ShardSet, ShardSessions,
+        ShardedTaskRepository, ShardedProjectRepository, ShardedAnalyticsRepository
+    )
+    from api.adapters.sqlite.backup import backup_databases, database_name
+    from api.adapters.memory.event import InMemoryEventPublisher
+
+    settings = get_settings()
+    shard_set = ShardSet(
+        url,
+        count,
+        group_commit=settings.sqlite_group_commit,
+        max_batch=settings.sqlite_group_commit_max_batch,
+        max_delay=settings.sqlite_group_commit_max_delay_ms / 1000,
+    )
+
+    maintenance = _maintenance({f"shard{shard.index}": shard.engine for shard in shard_set.shards})
+    metrics = {"maintenance": maintenance.stats}
+    if settings.sqlite_group_commit:
+        metrics["group_commit"] = shard_set.stats
+
+    def close():
+        maintenance.close()
+        shard_set.close()
+
+    def get_db():
+        sessions = ShardSessions(shard_set)
+        try:
+            yield sessions
+        finally:
+            sessions.close()
+
+    publisher = InMemoryEventPublisher()
+    return Backend(
+        name="sqlite-sharded",
+        get_db=get_db,
+        ensure_schema=shard_set.ensure_schema,
+        task_repository=lambda sessions: ShardedTaskRepository(shard_set, sessions),
+        project_repository=lambda sessions: ShardedProjectRepository(shard_set, sessions),
+        event_publisher=lambda sessions: publisher,
+        analytics_repository=lambda sessions: ShardedAnalyticsRepository(shard_set, sessions),
+        backup=partial(backup_databases, {database_name(shard.engine): shard.engine for shard in shard_set.shards}),
+        maintenance=maintenance,
+        invalidate=shard_set.invalidate,
+        metrics=metrics,
+        close=close,
+    )
+
+
+def _postgres_backend() -> Backend:
+    from api.adapters.postgres.db import engine, get_db, ensure_schema
+    from api.adapters.postgres.project import (
+        PostgresTaskRepository, PostgresProjectRepository, PostgresEventPublisher, run_in_transaction
+    )
+    from api.adapters.postgres.analytics import PostgresAnalyticsRepository
+    return Backend(
+        name="postgres",
+        get_db=get_db,
+        ensure_schema=ensure_schema,
+        task_repository=PostgresTaskRepository,
+        project_repository=PostgresProjectRepository,
+        event_publisher=PostgresEventPublisher,
+        analytics_repository=PostgresAnalyticsRepository,
+        transaction=run_in_transaction,
+        close=engine.dispose,
+    )
+
+
+def _memory_backend() -> Backend:
+    from api.adapters.memory.store import MemoryStore
+    from api.adapters.memory.project import MemoryTaskRepository, MemoryProjectRepository, run_in_transaction
+    from api.adapters.memory.analytics import MemoryAnalyticsRepository
+    from api.adapters.memory.event import InMemoryEventPublisher
+
+    settings = get_settings()
+    # memory:///path/to/dir persists to that directory, plain memory:// keeps nothing
+    store = MemoryStore(make_url(settings.database_url).database or None, settings.memory_snapshot_every)
+    # one instance, so its result cache outlives the request
+    analytics = MemoryAnalyticsRepository(store)
+    publisher = InMemoryEventPublisher()
+
+    def get_db():
+        yield None
+
+    return Backend(
+        name="memory",
+        get_db=get_db,
+        ensure_schema=lambda: False,
+        task_repository=lambda db: MemoryTaskRepository(store),
+        project_repository=lambda db: MemoryProjectRepository(store),
+        event_publisher=lambda db: publisher,
+        analytics_repository=lambda db: analytics,
+        transaction=lambda db, work: run_in_transaction(store, publisher, work),
+        multiprocess=False,
+        close=store.close,
+    )
+
+
+BACKENDS = {
+    "sqlite": _sqlite_backend,
+    "postgres": _postgres_backend,
+    "postgresql": _postgres_backend,
+    "memory": _memory_backend,
+}
+
+
+def _with_recording(backend: Backend) -> Backend:
+    # every committed write goes to the history log and the invalidation bus, whichever are
+    # on, and to the commit listeners
+    from api.adapters.history.log import HistoryLog, history_path
+    from api.adapters.invalidation import InvalidationBus, bus_path
+    from api.adapters.recording import (
+        RecordingTaskRepository, RecordingProjectRepository, RecordingEventPublisher, recording_transaction
+    )
+
+    settings = get_settings()
+    listeners = []
+
+    def notify(entries):
+        for listener in listeners:
+            listener(entries)
+
+    sinks = [notify]
+    metrics = dict(backend.metrics)
+    log = bus = None
+    path = history_path()
+    if settings.history and path is not None:
+        log = HistoryLog(path, settings.history_segment_mb << 20, settings.history_retention_days)
+        sinks.append(log.append)
+        metrics["history"] = log.stats
+    # a store that lives in one process has no other workers to tell
+    if settings.invalidation_bus and backend.multiprocess:
+        bus = InvalidationBus(
+            settings.invalidation_bus_path or bus_path(settings.database_url),
+            max_batch=settings.invalidation_max_batch,
+            max_delay=settings.invalidation_max_delay_ms / 1000,
+        )
+        if backend.invalidate:
+            bus.subscribe(backend.invalidate)
+        sinks.append(bus.publish)
+        metrics["invalidation"] = bus.stats
+
+    def record(entries):
+        for sink in sinks:
+            sink(entries)
+
+    def close():
+        if bus:
+            bus.close()
+        backend.close()
+        if log:
+            log.close()
+
+    return replace(
+        backend,
+        task_repository=lambda db: RecordingTaskRepository(backend.task_repository(db), record),
+        project_repository=lambda db: RecordingProjectRepository(backend.project_repository(db), record),
+        event_publisher=lambda db: RecordingEventPublisher(backend.event_publisher(db), record),
+        transaction=recording_transaction(backend.transaction, record) if backend.transaction else None,
+        history=log,
+        invalidation=bus,
+        commit_listeners=listeners,
+        metrics=metrics,
+        close=close,
+    )
+
+
+def load_backend(database_url: str) -> Backend:
+    scheme = make_url(database_url).get_backend_name()
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unsupported DATABASE_URL scheme: {scheme}")
+    return _with_recording(BACKENDS[scheme]())
+
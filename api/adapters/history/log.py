@@ -0,0 +1,449 @@
+import argparse
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.engine import make_url
+
+from api.config import get_settings
+from api.core.domain.task import Task, Project, TaskStatus, ProjectStatus
+from api.core.domain.history import HistoryAction, HistoryEntity, HistoryEntry, ProjectSnapshot
+from api.core.port.history import HistoryRepository
+
+# a segment is a run of frames: payload length and crc32, then the payload. A payload starts
+# with the entity, the action, the entity's id, its project's id and the time it was recorded;
+# a save follows with the state, an event with its fields as JSON
+FRAME = struct.Struct("<II")
+HEADER = struct.Struct("<BB16s16sq")
+TASK_STATE = struct.Struct("<qBqq")
+PROJECT_STATE = struct.Struct("<qBqq")
+TEXT_LENGTH = struct.Struct("<i")
+
+# a sealed segment's index: how many entries, its first and last recording times, then
+# (id, offset) pairs sorted by id, one under the entity's id and one under its project's
+INDEX_MAGIC = b"THI1"
+INDEX_HEADER = struct.Struct("<4sIqq")
+INDEX_ENTRY = struct.Struct("<16sI")
+
+ENTITY_CODES = {HistoryEntity.TASK: 1, HistoryEntity.PROJECT: 2}
+ACTION_CODES = {HistoryAction.SAVED: 1, HistoryAction.DELETED: 2, HistoryAction.EVENT: 3}
+ENTITIES = {code: entity for entity, code in ENTITY_CODES.items()}
+ACTIONS = {code: action for action, code in ACTION_CODES.items()}
+
+NO_TIME = -(2 ** 63)
+NO_ID = bytes(16)
+EPOCH = datetime(1970, 1, 1)
+
+
+def history_path() -> Optional[str]:
+    # None when the database itself keeps nothing, unless HISTORY_PATH asks for it anyway
+    settings = get_settings()
+    if settings.history_path:
+        return settings.history_path
+    url = make_url(settings.database_url)
+    scheme = url.get_backend_name()
+    if scheme == "sqlite":
+        if not url.database or url.database == ":memory:":
+            return None
+        # ./task-manager.db keeps its history in ./task-manager.history/
+        root, _ = os.path.splitext(url.database)
+        return f"{root}.history"
+    if scheme == "memory":
+        return os.path.join(url.database, "history") if url.database else None
+    return "./history"
+
+
+def _micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return NO_TIME
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _datetime(micros: int) -> Optional[datetime]:
+    return None if micros == NO_TIME else EPOCH + timedelta(microseconds=micros)
+
+
+def _text(value: Optional[str]) -> bytes:
+    if value is None:
+        return TEXT_LENGTH.pack(-1)
+    data = value.encode()
+    return TEXT_LENGTH.pack(len(data)) + data
+
+
+def _read_text(payload: bytes, offset: int) -> Tuple[Optional[str], int]:
+    (length,) = TEXT_LENGTH.unpack_from(payload, offset)
+    offset += TEXT_LENGTH.size
+    if length < 0:
+        return None, offset
+    return payload[offset:offset + length].decode(), offset + length
+
+
+def encode(entry: HistoryEntry, recorded_at: int) -> bytes:
+    payload = HEADER.pack(
+        ENTITY_CODES[entry.entity], ACTION_CODES[entry.action], entry.entity_id.bytes,
+        entry.project_id.bytes if entry.project_id else NO_ID, recorded_at
+    )
+    if entry.task is not None:
+        task = entry.task
+        payload += _text(task.title) + _text(task.description) + TASK_STATE.pack(
+            _micros(task.deadline), task.is_completed(), _micros(task.created_at), _micros(task.updated_at)
+        )
+    elif entry.project is not None:
+        project = entry.project
+        payload += _text(project.title) + PROJECT_STATE.pack(
+            _micros(project.deadline), project.is_completed(), _micros(project.created_at), _micros(project.updated_at)
+        )
+    elif entry.event is not None:
+        payload += _text(json.dumps(entry.event, default=str, separators=(",", ":")))
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode(payload: bytes) -> HistoryEntry:
+    entity, action, entity_id, project_id, recorded_at = HEADER.unpack_from(payload)
+    entry = HistoryEntry(
+        entity=ENTITIES[entity],
+        action=ACTIONS[action],
+        entity_id=UUID(bytes=entity_id),
+        project_id=None if project_id == NO_ID else UUID(bytes=project_id),
+        recorded_at=_datetime(recorded_at),
+    )
+    offset = HEADER.size
+    if entry.action == HistoryAction.EVENT:
+        entry.event = json.loads(_read_text(payload, offset)[0])
+    elif entry.action == HistoryAction.SAVED and entry.entity == HistoryEntity.TASK:
+        title, offset = _read_text(payload, offset)
+        description, offset = _read_text(payload, offset)
+        deadline, completed, created_at, updated_at = TASK_STATE.unpack_from(payload, offset)
+        entry.task = Task(
+            id=entry.entity_id, title=title, description=description, deadline=_datetime(deadline),
+            status=TaskStatus.COMPLETED if completed else TaskStatus.OPEN, project_id=entry.project_id,
+            created_at=_datetime(created_at), updated_at=_datetime(updated_at),
+        )
+    elif entry.action == HistoryAction.SAVED:
+        title, offset = _read_text(payload, offset)
+        deadline, completed, created_at, updated_at = PROJECT_STATE.unpack_from(payload, offset)
+        entry.project = Project(
+            id=entry.entity_id, title=title, deadline=_datetime(deadline),
+            status=ProjectStatus.COMPLETED if completed else ProjectStatus.OPEN,
+            created_at=_datetime(created_at), updated_at=_datetime(updated_at),
+        )
+    return entry
+
+
+def frames(buffer, start: int, end: int) -> Iterator[Tuple[int, bytes]]:
+    # (offset, payload) of each whole frame, up to the first torn or corrupt one
+    offset = start
+    while offset + FRAME.size <= end:
+        length, crc = FRAME.unpack_from(buffer, offset)
+        payload_start = offset + FRAME.size
+        if length < HEADER.size or payload_start + length > end:
+            return
+        payload = bytes(buffer[payload_start:payload_start + length])
+        if zlib.crc32(payload) != crc:
+            return
+        yield offset, payload
+        offset = payload_start + length
+
+
+def index_keys(payload: bytes) -> Tuple[bytes, ...]:
+    _, _, entity_id, project_id, _ = HEADER.unpack_from(payload)
+    return (entity_id,) if project_id in (NO_ID, entity_id) else (entity_id, project_id)
+
+
+def read_frame(buffer, offset: int) -> HistoryEntry:
+    length, _ = FRAME.unpack_from(buffer, offset)
+    return decode(bytes(buffer[offset + FRAME.size:offset + FRAME.size + length]))
+
+
+def _map(path: str) -> Optional[mmap.mmap]:
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        return mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) if size else None
+
+
+class HistoryLog(HistoryRepository):
+    # append-only and segmented: the newest segment takes appends and is scanned when read;
+    # once it passes segment_bytes it is sealed with a sorted index of ids, and the next one
+    # starts. Worker processes share the directory and take turns through a lock file
+    def __init__(self, directory: str, segment_bytes: int = 8 << 20, retention_days: int = 0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._pid = None
+        self._lock_file = None
+        self._fd: Optional[int] = None
+        self._segment: Optional[int] = None
+        # how far this process knows the active segment to hold whole frames
+        self._size = 0
+        self._read_lock = threading.Lock()
+        self._sealed: Dict[int, Tuple[Optional[mmap.mmap], mmap.mmap]] = {}
+        # the active segment's index, built by scanning and extended as it grows
+        self._active: Tuple[Optional[int], int, Dict[bytes, List[int]]] = (None, 0, {})
+
+        self.appended = 0
+        self.rotations = 0
+        self.removed_segments = 0
+
+    def _path(self, segment: int, suffix: str = ".log") -> str:
+        return os.path.join(self.directory, f"{segment:010d}{suffix}")
+
+    def _segments(self) -> List[int]:
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".log"))
+
+    def _is_sealed(self, segment: int) -> bool:
+        return os.path.exists(self._path(segment, ".idx"))
+
+    # writing
+
+    def _exclusive(self):
+        # a forked worker inherits the open lock file, and flock would not keep it apart
+        # from its parent, so each process opens its own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock_file = open(os.path.join(self.directory, "lock"), "a+b")
+            self._fd = self._segment = None
+        return _Flock(self._lock_file)
+
+    def _open_active(self) -> None:
+        segments = self._segments()
+        newest = segments[-1] if segments else 1
+        if segments and self._is_sealed(newest):
+            # a worker stopped between sealing a segment and starting the next
+            newest += 1
+        if newest != self._segment or self._fd is None:
+            if self._fd is not None:
+                os.close(self._fd)
+            self._fd = os.open(self._path(newest), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._segment = newest
+            self._size = 0
+        size = os.fstat(self._fd).st_size
+        if size != self._size:
+            # another worker appended, or died part way through a frame; keep the whole frames
+            start = self._size if self._size < size else 0
+            with open(self._path(newest), "rb") as f:
+                f.seek(start)
+                data = f.read(size - start)
+            end = 0
+            for offset, payload in frames(data, 0, len(data)):
+                end = offset + FRAME.size + len(payload)
+            if start + end < size:
+                os.ftruncate(self._fd, start + end)
+            self._size = start + end
+
+    def append(self, entries: List[HistoryEntry]) -> None:
+        if not entries:
+            return
+        with self._lock, self._exclusive():
+            self._open_active()
+            recorded_at = _micros(datetime.utcnow())
+            # one write, so a transaction's entries land together
+            data = b"".join(encode(entry, recorded_at) for entry in entries)
+            if self._size and self._size + len(data) > self.segment_bytes:
+                self._rotate()
+            os.write(self._fd, data)
+            self._size += len(data)
+            self.appended += len(entries)
+        for entry in entries:
+            entry.recorded_at = _datetime(recorded_at)
+
+    def _rotate(self) -> None:
+        os.fsync(self._fd)
+        self._write_index(self._segment)
+        os.close(self._fd)
+        self._segment += 1
+        self._fd = os.open(self._path(self._segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = 0
+        self.rotations += 1
+        if self.retention_days > 0:
+            self._apply_retention()
+
+    def _write_index(self, segment: int) -> None:
+        with open(self._path(segment), "rb") as f:
+            data = f.read()
+        keys = []
+        first = last = NO_TIME
+        for offset, payload in frames(data, 0, len(data)):
+            recorded_at = HEADER.unpack_from(payload)[4]
+            first = recorded_at if first == NO_TIME else first
+            last = recorded_at
+            keys.extend((key, offset) for key in index_keys(payload))
+        keys.sort()
+        partial = self._path(segment, ".idx.partial")
+        with open(partial, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(keys), first, last))
+            f.write(b"".join(INDEX_ENTRY.pack(key, offset) for key, offset in keys))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, self._path(segment, ".idx"))
+
+    def _apply_retention(self) -> None:
+        horizon = _micros(datetime.utcnow() - timedelta(days=self.retention_days))
+        for segment in self._segments()[:-1]:
+            with open(self._path(segment, ".idx"), "rb") as f:
+                _, _, _, last = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+            if last >= horizon:
+                break
+            # the index goes last, so a segment without one is never taken for an active one
+            os.remove(self._path(segment))
+            os.remove(self._path(segment, ".idx"))
+            self.removed_segments += 1
+
+    # reading
+
+    def _sealed_maps(self, segment: int) -> Tuple[Optional[mmap.mmap], mmap.mmap]:
+        if segment not in self._sealed:
+            self._sealed[segment] = (_map(self._path(segment)), _map(self._path(segment, ".idx")))
+        return self._sealed[segment]
+
+    def _sealed_offsets(self, index: mmap.mmap, key: bytes) -> List[int]:
+        count = INDEX_HEADER.unpack_from(index)[1]
+        position = lambda i: INDEX_HEADER.size + i * INDEX_ENTRY.size  # noqa: E731
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if index[position(middle):position(middle) + 16] < key:
+                low = middle + 1
+            else:
+                high = middle
+        offsets = []
+        while low < count:
+            found, offset = INDEX_ENTRY.unpack_from(index, position(low))
+            if found != key:
+                break
+            offsets.append(offset)
+            low += 1
+        return sorted(offsets)
+
+    def _active_offsets(self, segment: int, log: Optional[mmap.mmap], key: bytes) -> List[int]:
+        cached, scanned, keys = self._active
+        if cached != segment:
+            scanned, keys = 0, {}
+        if log is not None:
+            for offset, payload in frames(log, scanned, len(log)):
+                for entry_key in index_keys(payload):
+                    keys.setdefault(entry_key, []).append(offset)
+                scanned = offset + FRAME.size + len(payload)
+        self._active = (segment, scanned, keys)
+        return list(keys.get(key, ()))
+
+    def _entries(self, key: UUID, until: Optional[datetime] = None) -> Iterator[HistoryEntry]:
+        limit = _micros(until) if until else None
+        with self._read_lock:
+            segments = self._segments()
+            for gone in set(self._sealed) - set(segments):
+                del self._sealed[gone]
+            found = []
+            for segment in segments:
+                if self._is_sealed(segment):
+                    log, index = self._sealed_maps(segment)
+                    first = INDEX_HEADER.unpack_from(index)[2]
+                    if limit is not None and first > limit:
+                        break
+                    found.extend(read_frame(log, offset) for offset in self._sealed_offsets(index, key.bytes))
+                else:
+                    log = _map(self._path(segment))
+                    found.extend(read_frame(log, offset) for offset in self._active_offsets(segment, log, key.bytes))
+                    if log is not None:
+                        log.close()
+        return (entry for entry in found if limit is None or _micros(entry.recorded_at) <= limit)
+
+    def entity_history(self, entity_id: UUID, until: Optional[datetime] = None) -> List[HistoryEntry]:
+        return [entry for entry in self._entries(entity_id, until) if entry.entity_id == entity_id]
+
+    def project_at(self, project_id: UUID, at: datetime) -> Optional[ProjectSnapshot]:
+        project = None
+        task_ids = set()
+        for entry in self._entries(project_id, at):
+            if entry.entity_id != project_id:
+                task_ids.add(entry.entity_id)
+            elif entry.action != HistoryAction.EVENT:
+                project = entry.project
+        if project is None:
+            return None
+        # a task indexed under the project may have been moved or deleted since; its own
+        # latest entry up to then decides
+        tasks = []
+        for task_id in task_ids:
+            task = None
+            for entry in self.entity_history(task_id, at):
+                if entry.action != HistoryAction.EVENT:
+                    task = entry.task
+            if task is not None and task.project_id == project_id:
+                tasks.append(task)
+        tasks.sort(key=lambda task: (task.created_at, task.id))
+        return ProjectSnapshot(at=at, project=project, tasks=tasks)
+
+    def stats(self) -> dict:
+        segments = self._segments()
+        return {
+            "segments": len(segments),
+            "bytes": sum(os.path.getsize(self._path(segment)) for segment in segments),
+            "appended": self.appended,
+            "rotations": self.rotations,
+            "removed_segments": self.removed_segments,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        with self._read_lock:
+            for log, index in self._sealed.values():
+                if log is not None:
+                    log.close()
+                index.close()
+            self._sealed.clear()
+
+
+class _Flock:
+    def __init__(self, file):
+        self.file = file
+
+    def __enter__(self):
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+
+
+def _print(entry: HistoryEntry) -> None:
+    record = {
+        "recorded_at": entry.recorded_at.isoformat(), "entity": entry.entity.value,
+        "action": entry.action.value, "id": str(entry.entity_id),
+    }
+    if entry.task or entry.project:
+        record["state"] = asdict(entry.task or entry.project)
+    if entry.event:
+        record["event"] = entry.event
+    print(json.dumps(record, default=lambda value: getattr(value, "value", str(value))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read the task and project history log")
+    parser.add_argument("entity_id", type=UUID, help="a task or project id")
+    parser.add_argument("--at", type=datetime.fromisoformat, help="print the project as it was at this UTC time")
+    parser.add_argument("--path", default=None, help="history directory, by default the one the API writes")
+    args = parser.parse_args()
+
+    log = HistoryLog(args.path or history_path())
+    if args.at is None:
+        for entry in log.entity_history(args.entity_id):
+            _print(entry)
+        return
+    snapshot = log.project_at(args.entity_id, args.at)
+    if snapshot is None:
+        raise SystemExit(f"Project {args.entity_id} has no recorded state at {args.at.isoformat()}")
+    print(json.dumps(asdict(snapshot), default=lambda value: getattr(value, "value", str(value))))
@@ -0,0 +1,273 @@
+import hashlib
+import os
+import queue
+import select
+import socket
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from api.core.domain.history import HistoryAction, HistoryEntity, HistoryEntry
+
+# an entity some worker wrote; whoever cached it should drop it
+Invalidation = Tuple[HistoryEntity, UUID]
+# None when datagrams were lost on the way, so anything may be stale
+Subscriber = Callable[[Optional[Set[Invalidation]]], None]
+
+# a datagram: sender pid, its sequence number, the wall-clock time it was sent and how many
+# entries follow, each an entity code and an id
+DATAGRAM_HEADER = struct.Struct("<IQdH")
+DATAGRAM_ENTRY = struct.Struct("<B16s")
+ENTITY_CODES = {HistoryEntity.TASK: 1, HistoryEntity.PROJECT: 2}
+ENTITIES = {code: entity for entity, code in ENTITY_CODES.items()}
+
+# how often the socket directory is listed again to pick up workers that started since
+PEER_REFRESH_S = 1.0
+# how soon a peer whose socket buffer was full is tried again
+RETRY_S = 0.001
+LATENCY_SAMPLES = 1024
+
+
+def bus_path(database_url: str) -> str:
+    # one directory per database, short enough for the ~100-byte limit on socket paths
+    digest = hashlib.sha1(database_url.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"task-manager-bus-{digest}")
+
+
+def invalidations(entries: Iterable[HistoryEntry]) -> Set[Invalidation]:
+    return {(entry.entity, entry.entity_id) for entry in entries if entry.action != HistoryAction.EVENT}
+
+
+def _percentile(ordered: List[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[int(fraction * (len(ordered) - 1))] * 1000, 3)
+
+
+class InvalidationBus:
+    # broadcasts the entities each commit wrote to the other workers on this host. Every
+    # worker binds a Unix datagram socket in one directory and sends to all the others; a
+    # sender thread packs what has queued up into one datagram, and a receiver thread drains
+    # every datagram waiting and hands subscribers the whole set at once. A send never
+    # blocks: what a peer with a full socket buffer could not take is held and merged into
+    # its next datagram, and only once that passes max_pending is it dropped. A drop skips a
+    # number in the sequence sent to that peer, so the receiver sees the gap
+    def __init__(self, directory: str, max_batch: int = 256, max_delay: float = 0, max_pending: int = 1024):
+        self.directory = directory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._subscribers: List[Subscriber] = []
+        self._queue: "queue.Queue[Optional[Invalidation]]" = queue.Queue()
+        self._pid: Optional[int] = None
+        self._socket: Optional[socket.socket] = None
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._peers: List[str] = []
+        self._peers_listed = 0.0
+        self._sequences: Dict[str, int] = {}
+        self._pending: Dict[str, Set[Invalidation]] = {}
+        self._last_seen: Dict[int, int] = {}
+        self._latencies: "deque[float]" = deque(maxlen=LATENCY_SAMPLES)
+
+        self.published = 0
+        self.sent_datagrams = 0
+        self.send_deferred = 0
+        self.send_dropped = 0
+        self.received = 0
+        self.received_datagrams = 0
+        self.received_batches = 0
+        self.receive_gaps = 0
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.append(subscriber)
+
+    def publish(self, entries: List[HistoryEntry]) -> None:
+        # the worker that wrote keeps its own caches in step, so only the others are told
+        found = invalidations(entries)
+        if not found or self._socket is None:
+            return
+        self.published += len(found)
+        for invalidation in found:
+            self._queue.put(invalidation)
+
+    # lifecycle
+
+    def start(self) -> None:
+        # called in each worker once it is running, so the socket carries the worker's pid
+        if self._pid == os.getpid():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._pid = os.getpid()
+        path = self._path(self._pid)
+        if os.path.exists(path):
+            os.remove(path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(path)
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._send_loop, name="invalidation-send", daemon=True),
+            threading.Thread(target=self._receive_loop, name="invalidation-receive", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self) -> None:
+        if self._socket is None or self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._socket.close()
+        self._socket = None
+        try:
+            os.remove(self._path(self._pid))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            "peers": len(self._peers),
+            "published": self.published,
+            "sent_datagrams": self.sent_datagrams,
+            "send_deferred": self.send_deferred,
+            "send_dropped": self.send_dropped,
+            "received": self.received,
+            "received_datagrams": self.received_datagrams,
+            "received_batches": self.received_batches,
+            "receive_gaps": self.receive_gaps,
+            "queued": self._queue.qsize(),
+            # send to hand-off to subscribers, over the last LATENCY_SAMPLES datagrams
+            "latency_ms": {"p50": _percentile(latencies, 0.5), "p99": _percentile(latencies, 0.99),
+                           "max": _percentile(latencies, 1)},
+        }
+
+    # sending
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.sock")
+
+    def _list_peers(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_listed > PEER_REFRESH_S:
+            self._peers = [
+                os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.endswith(".sock") and name != f"{self._pid}.sock"
+            ]
+            self._peers_listed = now
+        return self._peers
+
+    def _collect(self) -> Optional[Set[Invalidation]]:
+        try:
+            # held back for some peer, so come back to it soon even if nothing new arrives
+            first = self._queue.get(timeout=RETRY_S if self._pending else None)
+        except queue.Empty:
+            return set()
+        if first is None:
+            return None
+        batch = {first}
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.add(item)
+        return batch
+
+    def _send_loop(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            for peer in list(self._list_peers()):
+                payload = self._pending.pop(peer, set()) | batch
+                if payload:
+                    self._send(peer, payload)
+
+    def _send(self, peer: str, payload: Set[Invalidation]) -> None:
+        sequence = self._sequences.get(peer, 0) + 1
+        datagram = DATAGRAM_HEADER.pack(self._pid, sequence, time.time(), len(payload)) + b"".join(
+            DATAGRAM_ENTRY.pack(ENTITY_CODES[entity], entity_id.bytes) for entity, entity_id in payload
+        )
+        try:
+            self._socket.sendto(datagram, socket.MSG_DONTWAIT, peer)
+        except BlockingIOError:
+            if len(payload) < self.max_pending:
+                self._pending[peer] = payload
+                self.send_deferred += 1
+            else:
+                self._sequences[peer] = sequence
+                self.send_dropped += 1
+            return
+        except (ConnectionRefusedError, FileNotFoundError):
+            # the worker is gone; a socket left behind by one that crashed is removed
+            self._forget_peer(peer)
+            return
+        self._sequences[peer] = sequence
+        self.sent_datagrams += 1
+
+    def _forget_peer(self, peer: str) -> None:
+        if peer in self._peers:
+            self._peers.remove(peer)
+        self._pending.pop(peer, None)
+        self._sequences.pop(peer, None)
+        pid = int(os.path.basename(peer)[:-5])
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            try:
+                os.remove(peer)
+            except FileNotFoundError:
+                pass
+        except PermissionError:
+            pass
+
+    # receiving
+
+    def _receive_loop(self) -> None:
+        while not self._stopping.is_set():
+            readable, _, _ = select.select([self._socket], [], [], 0.5)
+            if not readable:
+                continue
+            # everything that arrived while the last batch was handled makes up the next one
+            datagrams = []
+            while True:
+                try:
+                    datagrams.append(self._socket.recv(65536, socket.MSG_DONTWAIT))
+                except BlockingIOError:
+                    break
+            if datagrams:
+                self._handle(datagrams)
+
+    def _handle(self, datagrams: List[bytes]) -> None:
+        received_at = time.time()
+        batch: Set[Invalidation] = set()
+        lost = False
+        for datagram in datagrams:
+            pid, sequence, sent_at, count = DATAGRAM_HEADER.unpack_from(datagram)
+            last = self._last_seen.get(pid)
+            if last is not None and sequence > last + 1:
+                self.receive_gaps += sequence - last - 1
+                lost = True
+            self._last_seen[pid] = sequence
+            self._latencies.append(max(received_at - sent_at, 0))
+            for index in range(count):
+                offset = DATAGRAM_HEADER.size + index * DATAGRAM_ENTRY.size
+                code, entity_id = DATAGRAM_ENTRY.unpack_from(datagram, offset)
+                batch.add((ENTITIES[code], UUID(bytes=entity_id)))
+        self.received += len(batch)
+        self.received_datagrams += len(datagrams)
+        self.received_batches += 1
+        for subscriber in self._subscribers:
+            subscriber(None if lost else batch)
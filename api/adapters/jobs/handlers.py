@@ -0,0 +1,166 @@
+import json
+import os
+import time
+from dataclasses import asdict
+from datetime import datetime
+from enum import Enum
+from itertools import chain
+from typing import Callable, Dict, Optional
+from uuid import UUID
+
+from api.config import get_settings
+from api.core.domain.job import JobInterrupt, JobStatus
+from api.adapters.backend import Backend, load_backend
+from api.adapters.jobs.store import job_repository
+
+PROGRESS_INTERVAL = 0.25
+# all export_data reads of a task to count it
+ID_ONLY = frozenset({"id"})
+INTERRUPT_CHECK_INTERVAL = 0.5
+
+
+class JobInterrupted(Exception):
+    def __init__(self, interrupt: JobInterrupt):
+        self.interrupt = interrupt
+        super().__init__(f"Job interrupted: {interrupt.value}")
+
+
+class JobContext:
+    def __init__(self, job_id: UUID, backend: Backend):
+        self.job_id = job_id
+        self.backend = backend
+        self.repository = job_repository()
+        self.artifact: Optional[str] = None
+        self._reported_at = 0.0
+        self._checked_at = 0.0
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        # called as often as handlers like; written at most every PROGRESS_INTERVAL
+        now = time.monotonic()
+        if now - self._reported_at >= PROGRESS_INTERVAL or fraction >= 1.0:
+            self._reported_at = now
+            self.repository.report_progress(self.job_id, round(min(fraction, 1.0), 4), message)
+
+    def check(self) -> None:
+        # handlers call this between units of work; raises once the job is to stop
+        now = time.monotonic()
+        if now - self._checked_at < INTERRUPT_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        interrupt = self.repository.get_interrupt(self.job_id)
+        if interrupt:
+            raise JobInterrupted(interrupt)
+
+    def artifact_directory(self) -> str:
+        directory = os.path.join(get_settings().jobs_artifact_dir, str(self.job_id))
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def artifact_path(self, name: str) -> str:
+        self.artifact = os.path.join(self.artifact_directory(), name)
+        return self.artifact
+
+
+def _json_default(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def export_data(context: JobContext, params: dict) -> dict:
+    backend = context.backend
+    include_archived = bool(params.get("include_archived", False))
+    sessions = backend.get_db()
+    db = next(sessions)
+    try:
+        task_repository = backend.task_repository(db)
+        project_repository = backend.project_repository(db)
+        projects = project_repository.get_all()
+        archived_tasks = []
+        if include_archived:
+            projects += project_repository.get_archived()
+            archived_tasks = task_repository.get_archived()
+        # the tasks are streamed into the file, so the total is counted from their ids first
+        task_count = sum(1 for _ in task_repository.iter_all(ID_ONLY)) + len(archived_tasks)
+        total = len(projects) + task_count
+        written = {"project": 0, "task": 0}
+        # one JSON object per line, so a reader can stream it back
+        with open(context.artifact_path("export.jsonl"), "w") as f:
+            for kind, items in (("project", projects), ("task", chain(task_repository.iter_all(), archived_tasks))):
+                for item in items:
+                    f.write(json.dumps({"type": kind, **asdict(item)}, default=_json_default))
+                    f.write("\n")
+                    written[kind] += 1
+                    done = written["project"] + written["task"]
+                    if done % 1000 == 0:
+                        context.check()
+                        context.progress(done / total, f"{done} of {total} records")
+    finally:
+        sessions.close()
+    return {"projects": written["project"], "tasks": written["task"]}
+
+
+def archive_completed(context: JobContext, params: dict) -> dict:
+    backend = context.backend
+    if backend.archive is None:
+        raise ValueError(f"The {backend.name} backend has no archive")
+    return backend.archive(int(params.get("older_than_days", get_settings().archive_after_days)))
+
+
+def backup_database(context: JobContext, params: dict) -> dict:
+    backend = context.backend
+    if backend.backup is None:
+        raise ValueError(f"The {backend.name} backend has no online backup")
+    result = backend.backup(
+        context.artifact_directory(),
+        compress=bool(params.get("compress", False)),
+        step_pages=int(params.get("step_pages", 256)),
+        pause=float(params.get("pause_ms", 0)) / 1000,
+        progress=context.progress,
+        check=context.check,
+    )
+    # served by GET /jobs/{id}/artifact when the backup is a single file
+    if "archive" in result:
+        context.artifact = result["archive"]
+    elif len(result["files"]) == 1:
+        context.artifact = result["files"][0]["path"]
+    return result
+
+
+JOB_HANDLERS: Dict[str, Callable[[JobContext, dict], dict]] = {
+    "export": export_data,
+    "archive": archive_completed,
+    "backup": backup_database,
+}
+
+
+_process_backend: Optional[Backend] = None
+
+
+def _job_process_backend() -> Backend:
+    # a job process has no app to share a backend with; it loads its own once and keeps it
+    global _process_backend
+    if _process_backend is None:
+        _process_backend = load_backend(get_settings().database_url)
+    return _process_backend
+
+
+def run_job(job_id: str, kind: str, params: dict, backend: Optional[Backend] = None) -> None:
+    # runs on a pool thread or in a job process; the outcome is written to the jobs table
+    # either way, so nothing has to travel back to the dispatcher
+    job_id = UUID(job_id)
+    context = JobContext(job_id, backend or _job_process_backend())
+    repository = context.repository
+    try:
+        result = JOB_HANDLERS[kind](context, params)
+    except JobInterrupted as interrupted:
+        if interrupted.interrupt == JobInterrupt.SHUTDOWN:
+            repository.requeue(job_id)
+        else:
+            repository.finish(job_id, JobStatus.CANCELLED)
+    except Exception as error:
+        repository.finish(job_id, JobStatus.FAILED, error=f"{type(error).__name__}: {error}")
+    else:
+        repository.finish(job_id, JobStatus.SUCCEEDED, result=result, artifact=context.artifact)
@@ -0,0 +1,114 @@
+import os
+import socket
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from typing import Optional
+from uuid import UUID
+
+from api.core.domain.job import JobInterrupt, JobStatus
+from api.core.port.job import JobRepository
+from api.adapters.backend import Backend
+from api.adapters.jobs.handlers import run_job
+
+HOSTNAME = socket.gethostname()
+
+
+def owner_id() -> str:
+    return f"{HOSTNAME}:{os.getpid()}"
+
+
+def is_alive(owner: str) -> bool:
+    host, _, pid = owner.rpartition(":")
+    if host != HOSTNAME:
+        # another machine's jobs are its own business
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+class JobRunner:
+    # claims queued jobs from the shared table while this process has a free slot; every
+    # worker process runs one, so jobs spread over them
+    def __init__(self, repository: JobRepository, backend: Backend, workers: int, processes: bool = False,
+                 poll_interval: float = 1.0):
+        self.repository = repository
+        self.backend = backend
+        self.workers = workers
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.owner = owner_id()
+        self.started = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._executor: Optional[Executor] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.repository.fail_orphaned(is_alive)
+        if self.processes:
+            # spawned, not forked: the parent has server and writer threads running
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="job")
+        self._thread = threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def _dispatch(self) -> None:
+        while not self._stopping:
+            self._wake.clear()
+            while not self._stopping and self._active < self.workers:
+                job = self.repository.claim(self.owner)
+                if job is None:
+                    break
+                with self._lock:
+                    self._active += 1
+                    self.started += 1
+                try:
+                    # pool threads share the app's backend; a job process cannot be handed one
+                    backend = None if self.processes else self.backend
+                    future = self._executor.submit(run_job, str(job.id), job.kind, job.params, backend)
+                except Exception as error:
+                    future = Future()
+                    future.set_exception(error)
+                future.add_done_callback(partial(self._done, job.id))
+            self._wake.wait(self.poll_interval)
+
+    def _done(self, job_id: UUID, future: Future) -> None:
+        with self._lock:
+            self._active -= 1
+        error = future.exception()
+        if error is not None:
+            # run_job records its own failures; this is the job process dying under it
+            self.repository.finish(job_id, JobStatus.FAILED, error=f"{type(error).__name__}: {error}")
+        self._wake.set()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        # running jobs stop at their next check and go back to the queue for another worker
+        self.repository.interrupt_owned(self.owner, JobInterrupt.SHUTDOWN)
+        self._executor.shutdown(wait=True)
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pool": "process" if self.processes else "thread",
+            "active": self._active,
+            "started": self.started,
+        }
@@ -0,0 +1,200 @@
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import (
+    JSON, Column, DateTime, Float, MetaData, String, Table, Text, create_engine, event, select, update
+)
+from sqlalchemy.dialects.sqlite import CHAR
+from sqlalchemy.engine import make_url
+
+from api.config import get_settings
+from api.core.domain.job import Job, JobInterrupt, JobStatus
+from api.core.port.job import JobRepository
+
+# jobs live in their own SQLite file whatever the backend, so every worker process, and the
+# job processes they start, share one queue
+metadata = MetaData()
+jobs = Table(
+    "jobs",
+    metadata,
+    Column("id", CHAR(36), primary_key=True),
+    Column("kind", String(64), nullable=False),
+    Column("params", JSON, nullable=False),
+    Column("status", String(16), nullable=False, index=True),
+    Column("progress", Float, nullable=False, default=0.0),
+    Column("message", Text, nullable=True),
+    Column("result", JSON, nullable=True),
+    Column("artifact", Text, nullable=True),
+    Column("error", Text, nullable=True),
+    Column("interrupt", String(16), nullable=True),
+    Column("owner", String(255), nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("started_at", DateTime, nullable=True),
+    Column("finished_at", DateTime, nullable=True),
+)
+
+
+def jobs_path() -> str:
+    settings = get_settings()
+    if settings.jobs_path:
+        return settings.jobs_path
+    url = make_url(settings.database_url)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        # ./task-manager.db keeps its jobs in ./task-manager.jobs.db
+        root, _ = os.path.splitext(url.database)
+        return f"{root}.jobs.db"
+    return "./jobs.db"
+
+
+def job_from_row(row) -> Job:
+    return Job(
+        id=UUID(row.id),
+        kind=row.kind,
+        params=row.params,
+        status=JobStatus(row.status),
+        progress=row.progress,
+        message=row.message,
+        result=row.result,
+        artifact=row.artifact,
+        error=row.error,
+        interrupt=JobInterrupt(row.interrupt) if row.interrupt else None,
+        created_at=row.created_at,
+        started_at=row.started_at,
+        finished_at=row.finished_at
+    )
+
+
+class SQLiteJobRepository(JobRepository):
+    def __init__(self, path: str):
+        settings = get_settings()
+        self.engine = create_engine(
+            f"sqlite:///{path}",
+            connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+        )
+        event.listen(self.engine, "connect", self._configure_connection)
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    def ensure_schema(self) -> None:
+        with self.engine.connect() as connection:
+            # every worker runs this at startup; the write lock makes them take turns
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            metadata.create_all(bind=connection)
+            connection.commit()
+
+    def save(self, job: Job) -> Job:
+        with self.engine.begin() as connection:
+            connection.execute(jobs.insert().values(
+                id=str(job.id),
+                kind=job.kind,
+                params=job.params,
+                status=job.status.value,
+                progress=job.progress,
+                created_at=job.created_at,
+            ))
+        return job
+
+    def get_by_id(self, job_id: UUID) -> Optional[Job]:
+        with self.engine.connect() as connection:
+            row = connection.execute(select(jobs).where(jobs.c.id == str(job_id))).first()
+        return job_from_row(row) if row else None
+
+    def get_recent(self, limit: int) -> List[Job]:
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(jobs).order_by(jobs.c.created_at.desc()).limit(limit)).all()
+        return [job_from_row(row) for row in rows]
+
+    def claim(self, owner: str) -> Optional[Job]:
+        oldest = (
+            select(jobs.c.id).where(jobs.c.status == JobStatus.QUEUED.value)
+            .order_by(jobs.c.created_at).limit(1).scalar_subquery()
+        )
+        with self.engine.begin() as connection:
+            row = connection.execute(
+                update(jobs)
+                .where(jobs.c.id == oldest, jobs.c.status == JobStatus.QUEUED.value)
+                .values(status=JobStatus.RUNNING.value, owner=owner, started_at=datetime.utcnow())
+                .returning(*jobs.c)
+            ).first()
+        return job_from_row(row) if row else None
+
+    def report_progress(self, job_id: UUID, progress: float, message: Optional[str] = None) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(jobs).where(jobs.c.id == str(job_id)).values(progress=progress, message=message)
+            )
+
+    def get_interrupt(self, job_id: UUID) -> Optional[JobInterrupt]:
+        with self.engine.connect() as connection:
+            value = connection.execute(select(jobs.c.interrupt).where(jobs.c.id == str(job_id))).scalar()
+        return JobInterrupt(value) if value else None
+
+    def finish(self, job_id: UUID, status: JobStatus, result: Optional[dict] = None,
+               artifact: Optional[str] = None, error: Optional[str] = None) -> None:
+        values = dict(status=status.value, result=result, artifact=artifact, error=error, finished_at=datetime.utcnow())
+        if status == JobStatus.SUCCEEDED:
+            values["progress"] = 1.0
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(jobs).where(jobs.c.id == str(job_id), jobs.c.status == JobStatus.RUNNING.value).values(**values)
+            )
+
+    def requeue(self, job_id: UUID) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(jobs)
+                .where(jobs.c.id == str(job_id), jobs.c.status == JobStatus.RUNNING.value)
+                .values(status=JobStatus.QUEUED.value, progress=0.0, message=None, interrupt=None,
+                        owner=None, started_at=None)
+            )
+
+    def request_cancel(self, job_id: UUID) -> Optional[Job]:
+        key = str(job_id)
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(jobs).where(jobs.c.id == key, jobs.c.status == JobStatus.QUEUED.value)
+                .values(status=JobStatus.CANCELLED.value, finished_at=datetime.utcnow())
+            )
+            # a running job stops at its next check
+            connection.execute(
+                update(jobs).where(jobs.c.id == key, jobs.c.status == JobStatus.RUNNING.value)
+                .values(interrupt=JobInterrupt.CANCEL.value)
+            )
+        return self.get_by_id(job_id)
+
+    def interrupt_owned(self, owner: str, interrupt: JobInterrupt) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(jobs)
+                .where(jobs.c.owner == owner, jobs.c.status == JobStatus.RUNNING.value, jobs.c.interrupt.is_(None))
+                .values(interrupt=interrupt.value)
+            )
+
+    def fail_orphaned(self, is_alive: Callable[[str], bool]) -> int:
+        with self.engine.connect() as connection:
+            owners = connection.execute(
+                select(jobs.c.owner).where(jobs.c.status == JobStatus.RUNNING.value).distinct()
+            ).scalars().all()
+        orphaned = [owner for owner in owners if not is_alive(owner)]
+        if not orphaned:
+            return 0
+        with self.engine.begin() as connection:
+            return connection.execute(
+                update(jobs)
+                .where(jobs.c.owner.in_(orphaned), jobs.c.status == JobStatus.RUNNING.value)
+                .values(status=JobStatus.FAILED.value, error="The worker running this job exited",
+                        finished_at=datetime.utcnow())
+            ).rowcount
+
+
+@lru_cache
+def job_repository() -> SQLiteJobRepository:
+    # one per process; job processes build their own on first use
+    return SQLiteJobRepository(jobs_path())
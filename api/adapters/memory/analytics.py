@@ -0,0 +1,45 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from api.core.domain.analytics import Bucket, CompletionPoint
+from api.core.port.analytics import AnalyticsRepository
+from api.adapters.cache import VersionedCache
+from api.adapters.memory.store import MemoryStore
+
+
+def period_start(value: datetime, bucket: Bucket) -> date:
+    day = value.date()
+    return day - timedelta(days=day.weekday()) if bucket == Bucket.WEEK else day
+
+
+class MemoryAnalyticsRepository(AnalyticsRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self.cache = VersionedCache()
+
+    def completion_series(self, bucket: Bucket, project_id: Optional[UUID] = None) -> List[CompletionPoint]:
+        with self.store.lock:
+            return self.cache.get_or_compute(
+                ("completion", bucket, project_id), self.store.seq, lambda: self._load(bucket, project_id)
+            )
+
+    def _load(self, bucket: Bucket, project_id: Optional[UUID]) -> List[CompletionPoint]:
+        tasks = (
+            [self.store.tasks[task_id] for task_id in self.store.tasks_by_project.get(project_id, ())]
+            if project_id else self.store.tasks.values()
+        )
+        created = Counter()
+        completed = Counter()
+        for task in tasks:
+            created[period_start(task.created_at, bucket)] += 1
+            if task.is_completed():
+                completed[period_start(task.updated_at, bucket)] += 1
+
+        series = []
+        remaining = 0
+        for period in sorted(created.keys() | completed.keys()):
+            remaining += created[period] - completed[period]
+            series.append(CompletionPoint(period, created[period], completed[period], remaining))
+        return series
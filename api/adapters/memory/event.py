@@ -0,0 +1,43 @@
+import logging
+from collections import deque
+
+from api.core.port.event import EventPublisher
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryEventPublisher(EventPublisher):
+    # shared by every request for the life of the process, so only the latest events are kept
+    def __init__(self, max_events: int = 1000):
+        self.events = deque(maxlen=max_events)
+
+    def publish(self, event) -> None:
+        self.events.append(event)
+        logger.debug("Event published: %s", type(event).__name__)
+
+    def get_events(self):
+        return list(self.events)
+
+    def clear_events(self):
+        self.events.clear()
+
+
+class PendingEvents(EventPublisher):
+    # holds a transaction's events until it commits, so a rolled-back write announces nothing
+    def __init__(self, publisher: EventPublisher):
+        self.publisher = publisher
+        self.events = []
+
+    def publish(self, event) -> None:
+        self.events.append(event)
+
+    def mark(self) -> int:
+        return len(self.events)
+
+    def discard(self, mark: int) -> None:
+        del self.events[mark:]
+
+    def flush(self) -> None:
+        events, self.events = self.events, []
+        for event in events:
+            self.publisher.publish(event)
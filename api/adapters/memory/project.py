@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import datetime
+from typing import Callable, FrozenSet, Iterator, List, Optional, TypeVar
+from uuid import UUID
+
+from api.core.domain.task import Task, Project, ChangeSet
+from api.core.port.task import TaskRepository
+from api.core.port.project import ProjectRepository
+from api.core.port.event import EventPublisher
+from api.core.port.transaction import UnitOfWork
+from api.adapters.memory.event import PendingEvents
+from api.adapters.memory.store import MemoryStore
+
+T = TypeVar("T")
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    # match the SQLite adapter, which stores wall-clock time without an offset
+    return value.replace(tzinfo=None) if value and value.tzinfo else value
+
+
+class MemoryTaskRepository(TaskRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def save(self, task: Task) -> Task:
+        with self.store.lock:
+            stored = replace(
+                task,
+                deadline=_naive(task.deadline),
+                created_at=_naive(task.created_at),
+                updated_at=_naive(task.updated_at),
+            )
+            if task.id in self.store.tasks:
+                stored.updated_at = datetime.utcnow()
+            self.store.put_task(stored)
+            return replace(stored)
+
+    def get_by_id(self, task_id: UUID) -> Optional[Task]:
+        # under the lock, so a write inside a transaction is not seen before it commits
+        with self.store.lock:
+            task = self.store.tasks.get(task_id)
+            return replace(task) if task else None
+
+    def get_all(self) -> List[Task]:
+        with self.store.lock:
+            return [replace(task) for task in self.store.tasks.values()]
+
+    def iter_all(self, fields: Optional[FrozenSet[str]] = None) -> Iterator[Task]:
+        # only the ids are copied up front; each task is copied as it is reached
+        with self.store.lock:
+            task_ids = list(self.store.tasks)
+        for task_id in task_ids:
+            task = self.get_by_id(task_id)
+            if task:
+                yield task
+
+    def get_by_project_id(self, project_id: UUID) -> List[Task]:
+        with self.store.lock:
+            task_ids = self.store.tasks_by_project.get(project_id, ())
+            return [replace(self.store.tasks[task_id]) for task_id in task_ids]
+
+    def get_completed(self) -> List[Task]:
+        with self.store.lock:
+            return [replace(self.store.tasks[task_id]) for task_id in self.store.completed_tasks]
+
+    def get_overdue(self) -> List[Task]:
+        with self.store.lock:
+            return [replace(self.store.tasks[task_id]) for task_id in self.store.overdue_task_ids(datetime.utcnow())]
+
+    def delete(self, task_id: UUID) -> bool:
+        return self.store.delete_task(task_id)
+
+    def cap_deadlines(self, project_id: UUID, deadline: datetime) -> List[Task]:
+        with self.store.lock:
+            return super().cap_deadlines(project_id, _naive(deadline))
+
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Task]:
+        with self.store.lock:
+            entries = self.store.task_changes.since(since, limit)
+            return ChangeSet.merge(
+                [(seq, replace(self.store.tasks[task_id])) for seq, task_id, deleted in entries if not deleted],
+                [(seq, task_id) for seq, task_id, deleted in entries if deleted],
+                since, limit
+            )
+
+
+class MemoryProjectRepository(ProjectRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def save(self, project: Project) -> Project:
+        with self.store.lock:
+            stored = replace(
+                project,
+                deadline=_naive(project.deadline),
+                created_at=_naive(project.created_at),
+                updated_at=_naive(project.updated_at),
+            )
+            if project.id in self.store.projects:
+                stored.updated_at = datetime.utcnow()
+            self.store.put_project(stored)
+            return replace(stored)
+
+    def get_by_id(self, project_id: UUID) -> Optional[Project]:
+        with self.store.lock:
+            project = self.store.projects.get(project_id)
+            return replace(project) if project else None
+
+    def get_all(self) -> List[Project]:
+        with self.store.lock:
+            return [replace(project) for project in self.store.projects.values()]
+
+    def get_completed(self) -> List[Project]:
+        with self.store.lock:
+            return [replace(self.store.projects[project_id]) for project_id in self.store.completed_projects]
+
+    def delete(self, project_id: UUID) -> bool:
+        return self.store.delete_project(project_id)
+
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Project]:
+        with self.store.lock:
+            entries = self.store.project_changes.since(since, limit)
+            return ChangeSet.merge(
+                [(seq, replace(self.store.projects[project_id])) for seq, project_id, deleted in entries if not deleted],
+                [(seq, project_id) for seq, project_id, deleted in entries if deleted],
+                since, limit
+            )
+
+
+class MemoryUnitOfWork(UnitOfWork):
+    def __init__(self, store: MemoryStore, events: PendingEvents):
+        self.store = store
+        self.task_repository = MemoryTaskRepository(store)
+        self.project_repository = MemoryProjectRepository(store)
+        self.event_publisher = events
+
+    @contextmanager
+    def savepoint(self):
+        mark = self.event_publisher.mark()
+        try:
+            with self.store.transaction():
+                yield
+        except Exception:
+            self.event_publisher.discard(mark)
+            raise
+
+
+def run_in_transaction(store: MemoryStore, publisher: EventPublisher, work: Callable[[UnitOfWork], T]) -> T:
+    events = PendingEvents(publisher)
+    with store.transaction():
+        result = work(MemoryUnitOfWork(store, events))
+    events.flush()
+    return result
@@ -0,0 +1,419 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from bisect import bisect_left, insort
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from api.core.domain.task import Task, Project, TaskStatus, ProjectStatus
+
+SNAPSHOT_FILE = "snapshot.json"
+WAL_FILE = "wal.log"
+
+
+def _dt(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _parse_dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def task_to_record(task: Task) -> dict:
+    return {
+        "id": str(task.id),
+        "title": task.title,
+        "description": task.description,
+        "deadline": _dt(task.deadline),
+        "status": task.status.value,
+        "project_id": str(task.project_id) if task.project_id else None,
+        "created_at": _dt(task.created_at),
+        "updated_at": _dt(task.updated_at),
+    }
+
+
+def task_from_record(record: dict) -> Task:
+    return Task(
+        id=UUID(record["id"]),
+        title=record["title"],
+        description=record["description"],
+        deadline=_parse_dt(record["deadline"]),
+        status=TaskStatus(record["status"]),
+        project_id=UUID(record["project_id"]) if record["project_id"] else None,
+        created_at=_parse_dt(record["created_at"]),
+        updated_at=_parse_dt(record["updated_at"]),
+    )
+
+
+def project_to_record(project: Project) -> dict:
+    return {
+        "id": str(project.id),
+        "title": project.title,
+        "deadline": _dt(project.deadline),
+        "status": project.status.value,
+        "created_at": _dt(project.created_at),
+        "updated_at": _dt(project.updated_at),
+    }
+
+
+def project_from_record(record: dict) -> Project:
+    return Project(
+        id=UUID(record["id"]),
+        title=record["title"],
+        deadline=_parse_dt(record["deadline"]),
+        status=ProjectStatus(record["status"]),
+        created_at=_parse_dt(record["created_at"]),
+        updated_at=_parse_dt(record["updated_at"]),
+    )
+
+
+class WriteAheadLog:
+    def __init__(self, directory: Path):
+        self.path = directory / WAL_FILE
+        self.file = None
+
+    def replay(self) -> List[dict]:
+        if not self.path.exists():
+            return []
+        entries = []
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # a torn write at the tail from a crash mid-append; everything after it is garbage
+                    break
+                valid_bytes += len(line)
+        if valid_bytes != self.path.stat().st_size:
+            os.truncate(self.path, valid_bytes)
+        return entries
+
+    def open(self) -> None:
+        self.file = open(self.path, "ab")
+
+    def append(self, entry: dict) -> None:
+        self.file.write(json.dumps(entry, separators=(",", ":")).encode() + b"\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def reset(self) -> None:
+        self.file.close()
+        self.file = open(self.path, "wb")
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class ChangeLog:
+    def __init__(self):
+        # latest (seq, deleted) per id; entries is append-only and ordered by seq,
+        # superseded entries are skipped on read and dropped on compact()
+        self.latest: Dict[UUID, Tuple[int, bool]] = {}
+        self.entries: List[Tuple[int, UUID]] = []
+
+    def record(self, entity_id: UUID, seq: int, deleted: bool) -> None:
+        self.latest[entity_id] = (seq, deleted)
+        self.entries.append((seq, entity_id))
+
+    def since(self, since: int, limit: int) -> List[Tuple[int, UUID, bool]]:
+        result = []
+        for seq, entity_id in self.entries[bisect_left(self.entries, (since + 1,)):]:
+            latest_seq, deleted = self.latest[entity_id]
+            if latest_seq == seq:
+                result.append((seq, entity_id, deleted))
+                if len(result) > limit:
+                    break
+        return result
+
+    def tombstones(self) -> List[Tuple[UUID, int]]:
+        return [(entity_id, seq) for entity_id, (seq, deleted) in self.latest.items() if deleted]
+
+    def compact(self) -> None:
+        self.entries = sorted((seq, entity_id) for entity_id, (seq, _) in self.latest.items())
+
+
+class MemoryStore:
+    def __init__(self, directory: Optional[str] = None, snapshot_every: int = 10000):
+        self.directory = Path(directory) if directory else None
+        self.snapshot_every = snapshot_every
+        self.lock = threading.RLock()
+
+        self.tasks: Dict[UUID, Task] = {}
+        self.projects: Dict[UUID, Project] = {}
+        self.tasks_by_project: Dict[UUID, Set[UUID]] = {}
+        self.completed_tasks: Set[UUID] = set()
+        self.completed_projects: Set[UUID] = set()
+        # (deadline, id) of every open task with a deadline, kept sorted for range scans
+        self.open_tasks_by_deadline: List[Tuple[datetime, str]] = []
+
+        self.seq = 0
+        self.task_changes = ChangeLog()
+        self.project_changes = ChangeLog()
+
+        self.wal = None
+        self.writes_since_snapshot = 0
+        # while a transaction is open: how to undo each write (the entity and its change-log
+        # entry as they were), and the log entries held back
+        self._undo: Optional[List[Tuple[str, UUID, object, Optional[Tuple[int, bool]]]]] = None
+        self._held: Optional[List[dict]] = None
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.wal = WriteAheadLog(self.directory)
+            self.recover()
+            self.wal.open()
+
+    def recover(self) -> None:
+        snapshot_path = self.directory / SNAPSHOT_FILE
+        if snapshot_path.exists():
+            with open(snapshot_path) as f:
+                snapshot = json.load(f)
+            for record in snapshot["projects"]:
+                self._put_project(project_from_record(record), record.get("seq") or self._next_seq())
+            for record in snapshot["tasks"]:
+                self._put_task(task_from_record(record), record.get("seq") or self._next_seq())
+            for tombstone in snapshot.get("tombstones", []):
+                changes = self.task_changes if tombstone["type"] == "task" else self.project_changes
+                changes.record(UUID(tombstone["id"]), tombstone["seq"], True)
+                self.seq = max(self.seq, tombstone["seq"])
+            self.task_changes.compact()
+            self.project_changes.compact()
+        for entry in self.wal.replay():
+            self._apply(entry)
+            self.writes_since_snapshot += 1
+
+    def _apply(self, entry: dict) -> None:
+        op = entry["op"]
+        seq = entry.get("seq") or self._next_seq()
+        if op == "put_task":
+            self._put_task(task_from_record(entry["data"]), seq)
+        elif op == "delete_task":
+            self._delete_task(UUID(entry["id"]), seq)
+        elif op == "put_project":
+            self._put_project(project_from_record(entry["data"]), seq)
+        elif op == "delete_project":
+            self._delete_project(UUID(entry["id"]), seq)
+
+    def _next_seq(self) -> int:
+        return self.seq + 1
+
+    def _log(self, entry: dict) -> None:
+        if not self.wal:
+            return
+        if self._held is not None:
+            self._held.append(entry)
+            return
+        self.wal.append(entry)
+        self.writes_since_snapshot += 1
+
+    def _maybe_snapshot(self) -> None:
+        # called after the logged change is applied, so the snapshot includes it
+        if self.wal and self._held is None and self.writes_since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        with self.lock:
+            snapshot_path = self.directory / SNAPSHOT_FILE
+            tmp_path = snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "projects": [
+                        {**project_to_record(p), "seq": self.project_changes.latest[p.id][0]}
+                        for p in self.projects.values()
+                    ],
+                    "tasks": [
+                        {**task_to_record(t), "seq": self.task_changes.latest[t.id][0]}
+                        for t in self.tasks.values()
+                    ],
+                    "tombstones": [
+                        {"type": "task", "id": str(entity_id), "seq": seq}
+                        for entity_id, seq in self.task_changes.tombstones()
+                    ] + [
+                        {"type": "project", "id": str(entity_id), "seq": seq}
+                        for entity_id, seq in self.project_changes.tombstones()
+                    ],
+                }, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, snapshot_path)
+            # every WAL entry is a full-state put or a delete, so replaying one that is
+            # already in the snapshot after a crash here is harmless
+            self.wal.reset()
+            self.writes_since_snapshot = 0
+            self.task_changes.compact()
+            self.project_changes.compact()
+
+    @contextmanager
+    def transaction(self):
+        # writes inside apply at once, and other writers wait on the lock until the outermost
+        # one ends; only then do they reach the log. An error undoes the writes made inside
+        # this one, so a nested transaction works as a savepoint
+        with self.lock:
+            outermost = self._undo is None
+            if outermost:
+                self._undo, self._held = [], []
+            undo_mark, held_mark = len(self._undo), len(self._held)
+            seq_mark = self.seq
+            changes_marks = len(self.task_changes.entries), len(self.project_changes.entries)
+            try:
+                yield
+            except BaseException:
+                for kind, entity_id, previous, change in reversed(self._undo[undo_mark:]):
+                    self._revert(kind, entity_id, previous, change)
+                # the seqs handed out inside were never seen outside the lock, so they are handed out again
+                del self.task_changes.entries[changes_marks[0]:]
+                del self.project_changes.entries[changes_marks[1]:]
+                self.seq = seq_mark
+                del self._undo[undo_mark:]
+                del self._held[held_mark:]
+                if outermost:
+                    self._undo = self._held = None
+                raise
+            if outermost:
+                held, self._undo, self._held = self._held, None, None
+                for entry in held:
+                    self._log(entry)
+                self._maybe_snapshot()
+
+    def _remember(self, kind: str, entity_id: UUID) -> None:
+        if self._undo is not None:
+            entities, changes = self._kind(kind)
+            self._undo.append((kind, entity_id, entities.get(entity_id), changes.latest.get(entity_id)))
+
+    def _kind(self, kind: str):
+        if kind == "task":
+            return self.tasks, self.task_changes
+        return self.projects, self.project_changes
+
+    def _revert(self, kind: str, entity_id: UUID, previous, change: Optional[Tuple[int, bool]]) -> None:
+        # puts back the entity and its latest change, so the change feed never shows the write;
+        # transaction() drops the log entries this leaves behind
+        if kind == "task" and previous:
+            self._put_task(previous, 0)
+        elif kind == "task":
+            self._delete_task(entity_id, 0)
+        elif previous:
+            self._put_project(previous, 0)
+        else:
+            self._delete_project(entity_id, 0)
+        _, changes = self._kind(kind)
+        if change:
+            changes.latest[entity_id] = change
+        else:
+            changes.latest.pop(entity_id, None)
+
+    def close(self) -> None:
+        if self.wal:
+            self.wal.close()
+
+    def _put_task(self, task: Task, seq: int) -> None:
+        self._unindex_task(task.id)
+        self.tasks[task.id] = task
+        self.task_changes.record(task.id, seq, False)
+        self.seq = max(self.seq, seq)
+        if task.project_id:
+            self.tasks_by_project.setdefault(task.project_id, set()).add(task.id)
+        if task.is_completed():
+            self.completed_tasks.add(task.id)
+        elif task.deadline:
+            insort(self.open_tasks_by_deadline, (task.deadline, str(task.id)))
+
+    def _unindex_task(self, task_id: UUID) -> None:
+        old = self.tasks.get(task_id)
+        if not old:
+            return
+        if old.project_id:
+            members = self.tasks_by_project.get(old.project_id)
+            if members:
+                members.discard(task_id)
+                if not members:
+                    del self.tasks_by_project[old.project_id]
+        if old.is_completed():
+            self.completed_tasks.discard(task_id)
+        elif old.deadline:
+            key = (old.deadline, str(task_id))
+            i = bisect_left(self.open_tasks_by_deadline, key)
+            if i < len(self.open_tasks_by_deadline) and self.open_tasks_by_deadline[i] == key:
+                del self.open_tasks_by_deadline[i]
+
+    def _delete_task(self, task_id: UUID, seq: int) -> bool:
+        if task_id not in self.tasks:
+            return False
+        self._unindex_task(task_id)
+        del self.tasks[task_id]
+        self.task_changes.record(task_id, seq, True)
+        self.seq = max(self.seq, seq)
+        return True
+
+    def _put_project(self, project: Project, seq: int) -> None:
+        self.projects[project.id] = project
+        self.project_changes.record(project.id, seq, False)
+        self.seq = max(self.seq, seq)
+        if project.is_completed():
+            self.completed_projects.add(project.id)
+        else:
+            self.completed_projects.discard(project.id)
+
+    def _delete_project(self, project_id: UUID, seq: int) -> bool:
+        if project_id not in self.projects:
+            return False
+        del self.projects[project_id]
+        self.completed_projects.discard(project_id)
+        self.project_changes.record(project_id, seq, True)
+        self.seq = max(self.seq, seq)
+        return True
+
+    def put_task(self, task: Task) -> None:
+        with self.lock:
+            self._remember("task", task.id)
+            seq = self._next_seq()
+            self._log({"op": "put_task", "seq": seq, "data": task_to_record(task)})
+            self._put_task(task, seq)
+            self._maybe_snapshot()
+
+    def delete_task(self, task_id: UUID) -> bool:
+        with self.lock:
+            if task_id not in self.tasks:
+                return False
+            self._remember("task", task_id)
+            seq = self._next_seq()
+            self._log({"op": "delete_task", "seq": seq, "id": str(task_id)})
+            self._delete_task(task_id, seq)
+            self._maybe_snapshot()
+            return True
+
+    def put_project(self, project: Project) -> None:
+        with self.lock:
+            self._remember("project", project.id)
+            seq = self._next_seq()
+            self._log({"op": "put_project", "seq": seq, "data": project_to_record(project)})
+            self._put_project(project, seq)
+            self._maybe_snapshot()
+
+    def delete_project(self, project_id: UUID) -> bool:
+        with self.transaction():
+            if project_id not in self.projects:
+                return False
+            # its tasks are unlinked as the SQL stores null the column, each a logged change
+            # with a seq of its own, and all of it commits or none
+            now = datetime.utcnow()
+            for task_id in list(self.tasks_by_project.get(project_id, ())):
+                self.put_task(replace(self.tasks[task_id], project_id=None, updated_at=now))
+            self._remember("project", project_id)
+            seq = self._next_seq()
+            self._log({"op": "delete_project", "seq": seq, "id": str(project_id)})
+            self._delete_project(project_id, seq)
+            self._maybe_snapshot()
+            return True
+
+    def overdue_task_ids(self, now: datetime) -> List[UUID]:
+        with self.lock:
+            end = bisect_left(self.open_tasks_by_deadline, (now,))
+            return [UUID(task_id) for _, task_id in self.open_tasks_by_deadline[:end]]
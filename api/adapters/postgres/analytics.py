@@ -0,0 +1,46 @@
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from api.core.domain.analytics import Bucket, CompletionPoint
+from api.core.port.analytics import AnalyticsRepository
+from api.adapters.cache import VersionedCache
+
+_cache = VersionedCache()
+
+
+def completion_series_sql(bucket: Bucket, by_project: bool) -> str:
+    project_filter = "AND project_id = :project_id" if by_project else ""
+    return f"""
+        WITH events AS (
+            SELECT date_trunc('{bucket.value}', created_at)::date AS period, 1 AS created, 0 AS completed
+            FROM tasks WHERE true {project_filter}
+            UNION ALL
+            SELECT date_trunc('{bucket.value}', updated_at)::date, 0, 1
+            FROM tasks WHERE completed {project_filter}
+        ),
+        periods AS (
+            SELECT period, sum(created)::int AS created, sum(completed)::int AS completed
+            FROM events GROUP BY period
+        )
+        SELECT period, created, completed,
+               (sum(created - completed) OVER (ORDER BY period ROWS UNBOUNDED PRECEDING))::int AS remaining
+        FROM periods ORDER BY period
+    """
+
+
+class PostgresAnalyticsRepository(AnalyticsRepository):
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def completion_series(self, bucket: Bucket, project_id: Optional[UUID] = None) -> List[CompletionPoint]:
+        version = self.db.execute(text("SELECT value FROM change_sequence WHERE id = 1")).scalar() or 0
+        return _cache.get_or_compute(
+            ("completion", bucket, project_id), version, lambda: self._load(bucket, project_id)
+        )
+
+    def _load(self, bucket: Bucket, project_id: Optional[UUID]) -> List[CompletionPoint]:
+        params = {"project_id": project_id} if project_id else {}
+        rows = self.db.execute(text(completion_series_sql(bucket, project_id is not None)), params).all()
+        return [CompletionPoint(*row) for row in rows]
@@ -0,0 +1,49 @@
+from typing import List, Tuple
+from uuid import UUID
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+from api.adapters.postgres.task import TaskModel, ProjectModel, TombstoneModel
+
+TRACKED_MODELS = {TaskModel: "task", ProjectModel: "project"}
+
+
+def reserve_seqs(session: Session, count: int) -> int:
+    # a sequence would hand out numbers that commit out of order and let clients skip
+    # changes; the row lock on the counter keeps commit order and seq order the same
+    last = session.connection().execute(
+        text("UPDATE change_sequence SET value = value + :n WHERE id = 1 RETURNING value"), {"n": count}
+    ).scalar()
+    return last - count + 1
+
+
+@event.listens_for(Session, "before_flush")
+def stamp_changes(session, flush_context, instances):
+    changed = [
+        obj for obj in session.new | session.dirty
+        if type(obj) in TRACKED_MODELS and (obj in session.new or session.is_modified(obj))
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in TRACKED_MODELS]
+    if not changed and not deleted:
+        return
+
+    seq = reserve_seqs(session, len(changed) + len(deleted))
+    for obj in changed:
+        obj.seq = seq
+        seq += 1
+    for obj in deleted:
+        session.add(TombstoneModel(seq=seq, entity_type=TRACKED_MODELS[type(obj)], entity_id=obj.id))
+        seq += 1
+
+
+def load_changes(db: Session, model, since: int, limit: int) -> Tuple[List[Tuple[int, object]], List[Tuple[int, UUID]]]:
+    changed = db.execute(
+        select(model).where(model.seq > since).order_by(model.seq).limit(limit + 1)
+    ).scalars().all()
+    deleted = db.execute(
+        select(TombstoneModel.seq, TombstoneModel.entity_id)
+        .where(TombstoneModel.entity_type == TRACKED_MODELS[model], TombstoneModel.seq > since)
+        .order_by(TombstoneModel.seq)
+        .limit(limit + 1)
+    ).all()
+    return [(obj.seq, obj.to_domain()) for obj in changed], list(deleted)
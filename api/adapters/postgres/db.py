@@ -0,0 +1,96 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from api.config import get_settings
+
+Base = declarative_base()
+
+settings = get_settings()
+
+
+def normalize_url(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.drivername in ("postgres", "postgresql"):
+        parsed = parsed.set(drivername="postgresql+psycopg")
+    return parsed.render_as_string(hide_password=False)
+
+
+DATABASE_URL = normalize_url(settings.database_url)
+
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    # verify connections that sat idle across a server restart or failover
+    pool_pre_ping=True,
+    pool_recycle=settings.db_pool_recycle,
+    # reuse the most recently returned connection so surplus ones go idle and get recycled
+    pool_use_lifo=True,
+    connect_args={
+        "application_name": "task-manager",
+        "options": f"-c statement_timeout={settings.db_statement_timeout_ms}",
+    },
+)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def create_tables():
+    from api.adapters.postgres import task  # noqa: F401 - registers the models on Base
+    Base.metadata.create_all(bind=engine)
+
+
+SCHEMA_VERSION = 2
+
+# statements that bring a database at version N-1 up to version N; they run after
+# create_all, so tables new in version N already exist
+MIGRATIONS = {
+    2: [
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS seq BIGINT NOT NULL DEFAULT 0",
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS seq BIGINT NOT NULL DEFAULT 0",
+        "UPDATE projects p SET seq = n.seq FROM "
+        "(SELECT id, row_number() OVER (ORDER BY created_at) AS seq FROM projects) n WHERE p.id = n.id",
+        "UPDATE tasks t SET seq = n.seq FROM "
+        "(SELECT id, (SELECT count(*) FROM projects) + row_number() OVER (ORDER BY created_at) AS seq FROM tasks) n "
+        "WHERE t.id = n.id",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_seq ON tasks (seq)",
+        "CREATE INDEX IF NOT EXISTS ix_projects_seq ON projects (seq)",
+    ],
+}
+
+# arbitrary key for pg_advisory_xact_lock, shared by every process migrating this database
+SCHEMA_LOCK_KEY = 7_263_514
+
+
+def ensure_schema() -> bool:
+    from api.adapters.postgres import task  # noqa: F401 - registers the models on Base
+
+    with engine.begin() as connection:
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        connection.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+        version = connection.execute(text("SELECT max(version) FROM schema_version")).scalar() or 0
+        if version == SCHEMA_VERSION:
+            return False
+        if version == 0 and inspect(connection).has_table("tasks"):
+            version = 1
+        Base.metadata.create_all(bind=connection)
+        if version > 0:
+            for target in range(version + 1, SCHEMA_VERSION + 1):
+                for statement in MIGRATIONS.get(target, []):
+                    connection.execute(text(statement))
+        connection.execute(text(
+            "INSERT INTO change_sequence (id, value) SELECT 1, greatest("
+            "(SELECT coalesce(max(seq), 0) FROM tasks), (SELECT coalesce(max(seq), 0) FROM projects)"
+            ") ON CONFLICT (id) DO NOTHING"
+        ))
+        connection.execute(text("DELETE FROM schema_version"))
+        connection.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": SCHEMA_VERSION})
+    return True
@@ -0,0 +1,237 @@
+import json
+from dataclasses import asdict
+from datetime import datetime
+from typing import Callable, Collection, FrozenSet, Iterator, List, Optional, TypeVar
+from uuid import UUID
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session, load_only
+
+from api.core.domain.task import Task, Project, ChangeSet
+from api.core.port.task import TaskRepository, TaskQuery, TaskPage
+from api.core.port.project import ProjectRepository
+from api.core.port.event import EventPublisher
+from api.core.port.transaction import UnitOfWork
+from api.adapters.postgres.task import TaskModel, ProjectModel, EventModel
+from api.adapters.postgres.change import load_changes, reserve_seqs
+from api.adapters.task_query import task_query_statement, chunked
+from api.adapters.transaction import run_in_connection
+
+T = TypeVar("T")
+
+# rows fetched per round trip from a server-side cursor
+STREAM_BATCH_SIZE = 500
+
+TASK_COPY_COLUMNS = ("id", "title", "description", "deadline", "completed", "project_id", "created_at", "updated_at", "seq")
+PROJECT_COPY_COLUMNS = ("id", "title", "deadline", "completed", "created_at", "updated_at", "seq")
+
+
+def _stream(db: Session, statement) -> Iterator:
+    # yield_per makes psycopg use a named (server-side) cursor instead of buffering the result
+    return db.execute(statement.execution_options(yield_per=STREAM_BATCH_SIZE)).scalars()
+
+
+def _copy_rows(db: Session, table: str, columns, rows) -> None:
+    driver_connection = db.connection().connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+class PostgresTaskRepository(TaskRepository):
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def save(self, task: Task) -> Task:
+        task_model = self.db.get(TaskModel, task.id)
+
+        if task_model:
+            task_model.title = task.title
+            task_model.description = task.description
+            task_model.deadline = task.deadline
+            task_model.completed = task.is_completed()
+            task_model.project_id = task.project_id
+            task_model.updated_at = datetime.utcnow()
+        else:
+            task_model = TaskModel.from_domain(task)
+            self.db.add(task_model)
+
+        self.db.commit()
+        self.db.refresh(task_model)
+        return task_model.to_domain()
+
+    def insert_many(self, tasks: List[Task]) -> List[Task]:
+        if not tasks:
+            return tasks
+        # COPY bypasses the flush hook, so reserve the change seqs here
+        first_seq = reserve_seqs(self.db, len(tasks))
+        _copy_rows(self.db, "tasks", TASK_COPY_COLUMNS, (
+            (task.id, task.title, task.description, task.deadline, task.is_completed(),
+             task.project_id, task.created_at, task.updated_at, first_seq + i)
+            for i, task in enumerate(tasks)
+        ))
+        self.db.commit()
+        return tasks
+
+    def get_by_id(self, task_id: UUID) -> Optional[Task]:
+        task_model = self.db.get(TaskModel, task_id)
+        return task_model.to_domain() if task_model else None
+
+    def get_by_id_for_update(self, task_id: UUID) -> Optional[Task]:
+        task_model = self.db.execute(
+            select(TaskModel).where(TaskModel.id == task_id).with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        return task_model.to_domain() if task_model else None
+
+    def get_many(self, task_ids: Collection[UUID]) -> List[Task]:
+        return [
+            task_model.to_domain() for ids in chunked(task_ids)
+            for task_model in self.db.execute(select(TaskModel).where(TaskModel.id.in_(ids))).scalars()
+        ]
+
+    def get_all(self) -> List[Task]:
+        return list(self.iter_all())
+
+    def iter_all(self, fields: Optional[FrozenSet[str]] = None) -> Iterator[Task]:
+        statement = select(TaskModel)
+        if fields is not None:
+            statement = statement.options(load_only(*(getattr(TaskModel, name) for name in fields | {"id"})))
+        for task_model in _stream(self.db, statement):
+            yield task_model.to_domain(fields)
+
+    def get_by_project_id(self, project_id: UUID) -> List[Task]:
+        task_models = _stream(self.db, select(TaskModel).where(TaskModel.project_id == project_id))
+        return [task.to_domain() for task in task_models]
+
+    def get_completed(self) -> List[Task]:
+        task_models = _stream(self.db, select(TaskModel).where(TaskModel.completed == True))
+        return [task.to_domain() for task in task_models]
+
+    def get_overdue(self) -> List[Task]:
+        now = datetime.utcnow()
+        task_models = _stream(self.db, select(TaskModel).where(
+            TaskModel.deadline < now,
+            TaskModel.completed == False
+        ))
+        return [task.to_domain() for task in task_models]
+
+    def find(self, query: TaskQuery) -> TaskPage:
+        statement = task_query_statement(TaskModel.__table__, [TaskModel], query, lambda task_id: task_id)
+        columns = query.columns()
+        if columns is not None:
+            # a description left out is not even detoasted
+            statement = statement.options(load_only(*(getattr(TaskModel, name) for name in columns)))
+        return query.page([task.to_domain(columns) for task in _stream(self.db, statement)])
+
+    def delete(self, task_id: UUID) -> bool:
+        task_model = self.db.get(TaskModel, task_id)
+        if task_model:
+            self.db.delete(task_model)
+            self.db.commit()
+            return True
+        return False
+
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Task]:
+        changed, deleted = load_changes(self.db, TaskModel, since, limit)
+        return ChangeSet.merge(changed, deleted, since, limit)
+
+
+class PostgresProjectRepository(ProjectRepository):
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def save(self, project: Project) -> Project:
+        project_model = self.db.get(ProjectModel, project.id)
+
+        if project_model:
+            project_model.title = project.title
+            project_model.deadline = project.deadline
+            project_model.completed = project.is_completed()
+            project_model.updated_at = datetime.utcnow()
+        else:
+            project_model = ProjectModel.from_domain(project)
+            self.db.add(project_model)
+
+        self.db.commit()
+        self.db.refresh(project_model)
+        return project_model.to_domain()
+
+    def insert_many(self, projects: List[Project]) -> List[Project]:
+        if not projects:
+            return projects
+        first_seq = reserve_seqs(self.db, len(projects))
+        _copy_rows(self.db, "projects", PROJECT_COPY_COLUMNS, (
+            (project.id, project.title, project.deadline, project.is_completed(),
+             project.created_at, project.updated_at, first_seq + i)
+            for i, project in enumerate(projects)
+        ))
+        self.db.commit()
+        return projects
+
+    def get_by_id(self, project_id: UUID) -> Optional[Project]:
+        project_model = self.db.get(ProjectModel, project_id)
+        return project_model.to_domain() if project_model else None
+
+    def get_by_id_for_update(self, project_id: UUID) -> Optional[Project]:
+        project_model = self.db.execute(
+            select(ProjectModel).where(ProjectModel.id == project_id).with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        return project_model.to_domain() if project_model else None
+
+    def get_many(self, project_ids: Collection[UUID]) -> List[Project]:
+        return [
+            project_model.to_domain() for ids in chunked(project_ids)
+            for project_model in self.db.execute(select(ProjectModel).where(ProjectModel.id.in_(ids))).scalars()
+        ]
+
+    def get_all(self) -> List[Project]:
+        return [project.to_domain() for project in _stream(self.db, select(ProjectModel))]
+
+    def get_completed(self) -> List[Project]:
+        project_models = _stream(self.db, select(ProjectModel).where(ProjectModel.completed == True))
+        return [project.to_domain() for project in project_models]
+
+    def delete(self, project_id: UUID) -> bool:
+        project_model = self.db.get(ProjectModel, project_id)
+        if project_model:
+            # unlinked before the delete, so the tasks are stamped with a seq, see the SQLite store
+            for task_model in project_model.tasks:
+                task_model.project_id = None
+            self.db.delete(project_model)
+            self.db.commit()
+            return True
+        return False
+
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Project]:
+        changed, deleted = load_changes(self.db, ProjectModel, since, limit)
+        return ChangeSet.merge(changed, deleted, since, limit)
+
+
+class PostgresEventPublisher(EventPublisher):
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def publish(self, event) -> None:
+        payload = json.loads(json.dumps(asdict(event), default=str))
+        self.db.add(EventModel(
+            id=UUID(event.event_id),
+            type=type(event).__name__,
+            occurred_at=event.occurred_at,
+            payload=payload
+        ))
+        # listeners on the channel are notified when the transaction commits
+        self.db.execute(
+            text("SELECT pg_notify('domain_events', :message)"),
+            {"message": json.dumps({"type": type(event).__name__, **payload})}
+        )
+        self.db.commit()
+
+
+def run_in_transaction(db: Session, work: Callable[[UnitOfWork], T]) -> T:
+    # events are rows in the same transaction, and NOTIFY goes out only when it commits
+    with db.get_bind().begin() as connection:
+        return run_in_connection(connection, lambda session: (
+            PostgresTaskRepository(session), PostgresProjectRepository(session), PostgresEventPublisher(session)
+        ), work)
@@ -0,0 +1,124 @@
+from typing import Collection, Optional
+
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Text, Index, BigInteger, Integer
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from api.adapters.postgres.db import Base
+
+
+class TaskModel(Base):
+    __tablename__ = "tasks"
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    deadline = Column(DateTime, nullable=True)
+    completed = Column(Boolean, default=False, nullable=False)
+    project_id = Column(PG_UUID(as_uuid=True), ForeignKey("projects.id"), nullable=True, index=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    seq = Column(BigInteger, default=0, nullable=False, index=True)
+
+    project = relationship("ProjectModel", back_populates="tasks")
+
+    __table_args__ = (
+        Index("ix_tasks_open_deadline", "deadline", postgresql_where=(completed == False)),
+    )
+
+    def to_domain(self, fields: Optional[Collection[str]] = None) -> 'Task':
+        from api.core.domain.task import Task, TaskStatus
+
+        # with fields, the others are left as None rather than loaded a row at a time after
+        # a load_only query
+        def value(name):
+            return getattr(self, name) if fields is None or name in fields else None
+
+        return Task(
+            id=self.id,
+            title=value("title"),
+            description=value("description"),
+            deadline=value("deadline"),
+            status=TaskStatus.COMPLETED if value("completed") else TaskStatus.OPEN,
+            project_id=value("project_id"),
+            created_at=value("created_at"),
+            updated_at=value("updated_at")
+        )
+
+    @classmethod
+    def from_domain(cls, task: 'Task') -> 'TaskModel':
+        return cls(
+            id=task.id,
+            title=task.title,
+            description=task.description,
+            deadline=task.deadline,
+            completed=task.is_completed(),
+            project_id=task.project_id,
+            created_at=task.created_at,
+            updated_at=task.updated_at
+        )
+
+
+class ProjectModel(Base):
+    __tablename__ = "projects"
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    title = Column(String(255), nullable=False)
+    deadline = Column(DateTime, nullable=True)
+    completed = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    seq = Column(BigInteger, default=0, nullable=False, index=True)
+
+    tasks = relationship("TaskModel", back_populates="project")
+
+    def to_domain(self) -> 'Project':
+        from api.core.domain.task import Project, ProjectStatus
+        return Project(
+            id=self.id,
+            title=self.title,
+            deadline=self.deadline,
+            status=ProjectStatus.COMPLETED if self.completed else ProjectStatus.OPEN,
+            created_at=self.created_at,
+            updated_at=self.updated_at
+        )
+
+    @classmethod
+    def from_domain(cls, project: 'Project') -> 'ProjectModel':
+        return cls(
+            id=project.id,
+            title=project.title,
+            deadline=project.deadline,
+            completed=project.is_completed(),
+            created_at=project.created_at,
+            updated_at=project.updated_at
+        )
+
+
+class EventModel(Base):
+    __tablename__ = "domain_events"
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    type = Column(String(64), nullable=False)
+    occurred_at = Column(DateTime, nullable=False, index=True)
+    payload = Column(JSONB, nullable=False)
+
+
+class TombstoneModel(Base):
+    __tablename__ = "tombstones"
+
+    seq = Column(BigInteger, primary_key=True)
+    entity_type = Column(String(16), nullable=False)
+    entity_id = Column(PG_UUID(as_uuid=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_tombstones_entity_type_seq", "entity_type", "seq"),
+    )
+
+
+class ChangeSequenceModel(Base):
+    __tablename__ = "change_sequence"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False)
@@ -0,0 +1,178 @@
+import os
+import threading
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# snapshots kept for diffing; the oldest goes first
+MAX_SNAPSHOTS = 8
+
+GROUPINGS = ("lineno", "filename", "traceback")
+
+# allocations made by the profiler itself and by imports are left out of snapshots
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _statistic(statistic) -> dict:
+    frame = statistic.traceback[0]
+    result = {"file": frame.filename, "line": frame.lineno, "size": statistic.size, "count": statistic.count}
+    if len(statistic.traceback) > 1:
+        result["traceback"] = [f"{frame.filename}:{frame.lineno}" for frame in statistic.traceback]
+    if hasattr(statistic, "size_diff"):
+        result["size_diff"] = statistic.size_diff
+        result["count_diff"] = statistic.count_diff
+    return result
+
+
+class RouteAllocations:
+    __slots__ = ("requests", "measured", "peak_max", "peak_total", "retained_total")
+
+    def __init__(self):
+        self.requests = 0
+        # requests that had the worker to themselves; only they give an exact peak
+        self.measured = 0
+        self.peak_max = 0
+        self.peak_total = 0
+        self.retained_total = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "measured": self.measured,
+            "peak_max_bytes": self.peak_max,
+            "peak_mean_bytes": self.peak_total // self.measured if self.measured else None,
+            "retained_mean_bytes": self.retained_total // self.measured if self.measured else None,
+        }
+
+
+class _Measurement:
+    __slots__ = ("started", "overlapped")
+
+    def __init__(self, started: int):
+        self.started = started
+        self.overlapped = False
+
+
+class MemoryProfiler:
+    # tracemalloc, switched on and off at run time. While it runs, each route's requests are
+    # measured: the peak of traced memory above where the request started, and what it still
+    # held at the end. tracemalloc keeps one peak for the whole process, so only a request
+    # that ran with no other in flight gets an exact figure; overlapped ones are counted but
+    # left out of the peak and retained statistics
+    def __init__(self):
+        self.snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+        self.routes: Dict[str, RouteAllocations] = {}
+        self._next_snapshot = 1
+        self._lock = threading.Lock()
+        self._in_flight: List[_Measurement] = []
+
+    @property
+    def active(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> dict:
+        if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+            tracemalloc.stop()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self.routes.clear()
+        return self.status()
+
+    def stop(self) -> dict:
+        # snapshots already taken stay, so they can still be compared
+        tracemalloc.stop()
+        with self._lock:
+            self._in_flight.clear()
+        return self.status()
+
+    def take_snapshot(self) -> int:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        with self._lock:
+            snapshot_id = self._next_snapshot
+            self._next_snapshot += 1
+            self.snapshots[snapshot_id] = snapshot
+            while len(self.snapshots) > MAX_SNAPSHOTS:
+                self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    def top(self, snapshot_id: int, group_by: str = "lineno", limit: int = 20) -> List[dict]:
+        snapshot = self.snapshots[snapshot_id]
+        return [_statistic(statistic) for statistic in snapshot.statistics(group_by)[:limit]]
+
+    def diff(self, first_id: int, second_id: int, group_by: str = "lineno", limit: int = 20) -> List[dict]:
+        # largest growth first
+        first, second = self.snapshots[first_id], self.snapshots[second_id]
+        return [_statistic(statistic) for statistic in second.compare_to(first, group_by)[:limit]]
+
+    @contextmanager
+    def measure(self, route: str):
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        with self._lock:
+            if not self._in_flight:
+                tracemalloc.reset_peak()
+            measurement = _Measurement(tracemalloc.get_traced_memory()[0])
+            if self._in_flight:
+                measurement.overlapped = True
+                for other in self._in_flight:
+                    other.overlapped = True
+            self._in_flight.append(measurement)
+        try:
+            yield
+        finally:
+            with self._lock:
+                if measurement in self._in_flight:
+                    self._in_flight.remove(measurement)
+                    self._record(route, measurement)
+
+    def _record(self, route: str, measurement: _Measurement) -> None:
+        allocations = self.routes.get(route)
+        if allocations is None:
+            allocations = self.routes[route] = RouteAllocations()
+        allocations.requests += 1
+        if measurement.overlapped or not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        allocations.measured += 1
+        allocations.peak_max = max(allocations.peak_max, peak - measurement.started)
+        allocations.peak_total += peak - measurement.started
+        allocations.retained_total += current - measurement.started
+
+    def top_routes(self, limit: int = 10) -> List[dict]:
+        ranked = sorted(self.routes.items(), key=lambda item: item[1].peak_max, reverse=True)
+        return [{"route": route, **allocations.to_dict()} for route, allocations in ranked[:limit]]
+
+    def status(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (None, None)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            # what tracemalloc itself uses to keep its traces
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else None,
+            "rss_bytes": rss_bytes(),
+            "snapshots": list(self.snapshots),
+            "pid": os.getpid(),
+        }
+
+    def stats(self) -> dict:
+        return {**self.status(), "top_routes": self.top_routes(5)}
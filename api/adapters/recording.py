@@ -0,0 +1,208 @@
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Callable, Collection, FrozenSet, Iterator, List, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from api.core.domain.task import Task, Project, ChangeSet
+from api.core.domain.history import HistoryAction, HistoryEntity, HistoryEntry
+from api.core.port.task import TaskRepository, TaskQuery, TaskPage
+from api.core.port.project import ProjectRepository
+from api.core.port.event import EventPublisher
+from api.core.port.transaction import UnitOfWork
+
+Record = Callable[[List[HistoryEntry]], None]
+
+
+def task_saved(task: Task) -> HistoryEntry:
+    return HistoryEntry(
+        entity=HistoryEntity.TASK, action=HistoryAction.SAVED, entity_id=task.id, task=task, project_id=task.project_id
+    )
+
+
+def project_saved(project: Project) -> HistoryEntry:
+    return HistoryEntry(entity=HistoryEntity.PROJECT, action=HistoryAction.SAVED, entity_id=project.id, project=project)
+
+
+def event_recorded(event) -> HistoryEntry:
+    task_id = getattr(event, "task_id", None)
+    project_id = getattr(event, "project_id", None)
+    return HistoryEntry(
+        entity=HistoryEntity.TASK if task_id else HistoryEntity.PROJECT,
+        action=HistoryAction.EVENT,
+        entity_id=task_id or project_id,
+        event={"type": type(event).__name__, **asdict(event)},
+        project_id=project_id,
+    )
+
+
+class RecordingTaskRepository(TaskRepository):
+    # hands each write to record once the repository underneath has committed it, for the
+    # history log and the invalidation bus; every method of the port is passed through, so
+    # none falls back to its default
+    def __init__(self, inner: TaskRepository, record: Record):
+        self.inner = inner
+        self.record = record
+
+    def save(self, task: Task) -> Task:
+        saved = self.inner.save(task)
+        self.record([task_saved(saved)])
+        return saved
+
+    def insert_many(self, tasks: List[Task]) -> List[Task]:
+        inserted = self.inner.insert_many(tasks)
+        self.record([task_saved(task) for task in inserted])
+        return inserted
+
+    def cap_deadlines(self, project_id: UUID, deadline: datetime) -> List[Task]:
+        capped = self.inner.cap_deadlines(project_id, deadline)
+        self.record([task_saved(task) for task in capped])
+        return capped
+
+    def delete(self, task_id: UUID) -> bool:
+        deleted = self.inner.delete(task_id)
+        if deleted:
+            self.record([HistoryEntry(entity=HistoryEntity.TASK, action=HistoryAction.DELETED, entity_id=task_id)])
+        return deleted
+
+    def restore(self, task_id: UUID) -> Optional[Task]:
+        restored = self.inner.restore(task_id)
+        if restored:
+            self.record([task_saved(restored)])
+        return restored
+
+    def get_by_id(self, task_id: UUID) -> Optional[Task]:
+        return self.inner.get_by_id(task_id)
+
+    def get_by_id_for_update(self, task_id: UUID) -> Optional[Task]:
+        return self.inner.get_by_id_for_update(task_id)
+
+    def get_many(self, task_ids: Collection[UUID]) -> List[Task]:
+        return self.inner.get_many(task_ids)
+
+    def get_all(self) -> List[Task]:
+        return self.inner.get_all()
+
+    def iter_all(self, fields: Optional[FrozenSet[str]] = None) -> Iterator[Task]:
+        return self.inner.iter_all(fields)
+
+    def get_by_project_id(self, project_id: UUID) -> List[Task]:
+        return self.inner.get_by_project_id(project_id)
+
+    def get_completed(self) -> List[Task]:
+        return self.inner.get_completed()
+
+    def get_overdue(self) -> List[Task]:
+        return self.inner.get_overdue()
+
+    def find(self, query: TaskQuery) -> TaskPage:
+        return self.inner.find(query)
+
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Task]:
+        return self.inner.get_changes(since, limit)
+
+    def get_archived(self, project_id: Optional[UUID] = None) -> List[Task]:
+        return self.inner.get_archived(project_id)
+
+    def get_archived_by_id(self, task_id: UUID) -> Optional[Task]:
+        return self.inner.get_archived_by_id(task_id)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+
+class RecordingProjectRepository(ProjectRepository):
+    def __init__(self, inner: ProjectRepository, record: Record):
+        self.inner = inner
+        self.record = record
+
+    def save(self, project: Project) -> Project:
+        saved = self.inner.save(project)
+        self.record([project_saved(saved)])
+        return saved
+
+    def insert_many(self, projects: List[Project]) -> List[Project]:
+        inserted = self.inner.insert_many(projects)
+        self.record([project_saved(project) for project in inserted])
+        return inserted
+
+    def delete(self, project_id: UUID) -> bool:
+        deleted = self.inner.delete(project_id)
+        if deleted:
+            self.record([
+                HistoryEntry(entity=HistoryEntity.PROJECT, action=HistoryAction.DELETED, entity_id=project_id)
+            ])
+        return deleted
+
+    def get_by_id(self, project_id: UUID) -> Optional[Project]:
+        return self.inner.get_by_id(project_id)
+
+    def get_by_id_for_update(self, project_id: UUID) -> Optional[Project]:
+        return self.inner.get_by_id_for_update(project_id)
+
+    def get_many(self, project_ids: Collection[UUID]) -> List[Project]:
+        return self.inner.get_many(project_ids)
+
+    def get_all(self) -> List[Project]:
+        return self.inner.get_all()
+
+    def get_completed(self) -> List[Project]:
+        return self.inner.get_completed()
+
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Project]:
+        return self.inner.get_changes(since, limit)
+
+    def get_archived(self) -> List[Project]:
+        return self.inner.get_archived()
+
+    def get_archived_by_id(self, project_id: UUID) -> Optional[Project]:
+        return self.inner.get_archived_by_id(project_id)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+
+class RecordingEventPublisher(EventPublisher):
+    def __init__(self, inner: EventPublisher, record: Record):
+        self.inner = inner
+        self.record = record
+
+    def publish(self, event) -> None:
+        self.inner.publish(event)
+        self.record([event_recorded(event)])
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+
+class RecordingUnitOfWork(UnitOfWork):
+    # collects the entries until the transaction commits; a savepoint that rolls back drops
+    # the ones made inside it
+    def __init__(self, unit: UnitOfWork, pending: List[HistoryEntry]):
+        self.unit = unit
+        self.pending = pending
+        self.task_repository = RecordingTaskRepository(unit.task_repository, pending.extend)
+        self.project_repository = RecordingProjectRepository(unit.project_repository, pending.extend)
+        self.event_publisher = RecordingEventPublisher(unit.event_publisher, pending.extend)
+
+    @contextmanager
+    def savepoint(self):
+        mark = len(self.pending)
+        try:
+            with self.unit.savepoint():
+                yield
+        except Exception:
+            del self.pending[mark:]
+            raise
+
+
+def recording_transaction(transaction: Callable[[Session, Callable[[UnitOfWork], Any]], Any], record: Record):
+    def run(db: Session, work: Callable[[UnitOfWork], Any]) -> Any:
+        pending: List[HistoryEntry] = []
+        result = transaction(db, lambda unit: work(RecordingUnitOfWork(unit, pending)))
+        if pending:
+            record(pending)
+        return result
+    return run
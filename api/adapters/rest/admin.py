@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from api.config import get_settings
+from api.adapters.backend import Backend
+from api.adapters.rest.dtos import JobCreateDTO, JobResponseDTO
+from api.adapters.rest.event import get_backend, get_job_use_cases
+from api.adapters.rest.project import JobUseCases
+
+admin_router = APIRouter(prefix="/admin", tags=["admin"], include_in_schema=False)
+
+
+@admin_router.post("/archive")
+def archive_completed(
+    older_than_days: int = Query(None, ge=0),
+    backend: Backend = Depends(get_backend)
+):
+    if backend.archive is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"The {backend.name} backend has no archive"
+        )
+    if older_than_days is None:
+        older_than_days = get_settings().archive_after_days
+    return backend.archive(older_than_days)
+
+
+def _maintenance(backend: Backend):
+    if backend.maintenance is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"The {backend.name} backend has no maintenance"
+        )
+    return backend.maintenance
+
+
+@admin_router.get("/maintenance")
+def get_maintenance_status(backend: Backend = Depends(get_backend)):
+    return _maintenance(backend).status()
+
+
+@admin_router.post("/maintenance")
+def run_maintenance(backend: Backend = Depends(get_backend)):
+    return _maintenance(backend).run_all()
+
+
+@admin_router.post("/backup", response_model=JobResponseDTO, status_code=status.HTTP_202_ACCEPTED)
+def start_backup(
+    compress: bool = False,
+    step_pages: int = Query(256, ge=1),
+    pause_ms: float = Query(0, ge=0),
+    backend: Backend = Depends(get_backend),
+    job_use_cases: JobUseCases = Depends(get_job_use_cases)
+):
+    # runs as a job; follow it at GET /jobs/{id} and download it from /jobs/{id}/artifact
+    if backend.backup is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"The {backend.name} backend has no online backup"
+        )
+    return job_use_cases.create_job(JobCreateDTO(
+        kind="backup",
+        params={"compress": compress, "step_pages": step_pages, "pause_ms": pause_ms}
+    ))
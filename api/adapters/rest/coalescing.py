@@ -0,0 +1,142 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from api.adapters.tracing import current_span
+from api.adapters.rest.admission import is_read
+
+# request headers that say who is asking; callers that differ in them never share a response
+CALLER_HEADERS = (b"authorization", b"cookie")
+
+
+class _Flight:
+    __slots__ = ("future", "joined")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.joined = 0
+
+
+def _shareable(messages: List[dict]) -> Optional[List[dict]]:
+    # a whole response that did not fail on the server; anything else, each waiter runs alone
+    if not messages or messages[0]["type"] != "http.response.start" or messages[0]["status"] >= 500:
+        return None
+    if messages[-1]["type"] != "http.response.body" or messages[-1].get("more_body", False):
+        return None
+    return messages
+
+
+class Coalescer:
+    # single flight for reads: while a GET is being answered, identical GETs that arrive join
+    # it and are sent the same response bytes instead of running it again. Two GETs are
+    # identical when path, query string and caller headers match and nothing was written
+    # between them: each commit, here or announced by another worker, moves the generation
+    # on, and a request only joins a flight of the generation it arrived in
+    def __init__(self, prefixes: Iterable[str]):
+        self.prefixes = tuple(prefix.rstrip("/") for prefix in prefixes if prefix)
+        self.generation = 0
+        self._flights: Dict[tuple, _Flight] = {}
+
+        self.requests = 0
+        self.leaders = 0
+        self.joined = 0
+        self.fallbacks = 0
+        self.largest_flight = 0
+        self.invalidations = 0
+
+    def covers(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.prefixes)
+
+    def invalidate(self, *_) -> None:
+        # called from request, job and bus threads; two bumps racing may land as one, which
+        # still moves every later request off the flights already running
+        self.generation += 1
+        self.invalidations += 1
+
+    def key(self, scope) -> tuple:
+        headers = dict(scope["headers"])
+        return (
+            scope["path"],
+            scope["query_string"],
+            tuple(headers.get(name) for name in CALLER_HEADERS),
+            self.generation,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "executed": self.leaders,
+            "joined": self.joined,
+            # share of coalescable requests answered without running anything
+            "ratio": round(self.joined / self.requests, 4) if self.requests else None,
+            "fallbacks": self.fallbacks,
+            "largest_flight": self.largest_flight,
+            "in_flight": len(self._flights),
+            "invalidations": self.invalidations,
+        }
+
+
+class CoalescingMiddleware:
+    def __init__(self, app, coalescer: Coalescer):
+        self.app = app
+        self.coalescer = coalescer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+        elif scope["method"] == "GET":
+            if self.coalescer.covers(scope["path"]):
+                await self._read(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        elif is_read(scope):
+            await self.app(scope, receive, send)
+        else:
+            await self._write(scope, receive, send)
+
+    async def _read(self, scope, receive, send):
+        coalescer = self.coalescer
+        coalescer.requests += 1
+        key = coalescer.key(scope)
+        flight = coalescer._flights.get(key)
+        if flight is not None:
+            flight.joined += 1
+            coalescer.largest_flight = max(coalescer.largest_flight, flight.joined + 1)
+            # shielded, so a caller that goes away does not cancel the others' response
+            messages = await asyncio.shield(flight.future)
+            if messages is not None:
+                coalescer.joined += 1
+                span = current_span()
+                if span is not None:
+                    span.attributes["coalesced"] = True
+                for message in messages:
+                    await send(message)
+                return
+            coalescer.fallbacks += 1
+            await self.app(scope, receive, send)
+            return
+
+        coalescer.leaders += 1
+        flight = coalescer._flights[key] = _Flight(asyncio.get_running_loop().create_future())
+        messages = []
+
+        async def capture(message):
+            messages.append(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            if coalescer._flights.get(key) is flight:
+                del coalescer._flights[key]
+            flight.future.set_result(_shareable(messages) if flight.joined else None)
+        for message in messages:
+            await send(message)
+
+    async def _write(self, scope, receive, send):
+        # commits made through the repositories invalidate as they happen; this also covers
+        # writes that go around them, such as archiving and restores, once they have answered
+        async def send_invalidating(message):
+            if message["type"] == "http.response.start":
+                self.coalescer.invalidate()
+            await send(message)
+
+        await self.app(scope, receive, send_invalidating)
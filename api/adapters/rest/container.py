@@ -0,0 +1,122 @@
+from functools import cached_property, partial
+from typing import Any
+
+from api.core.port.task import TaskRepository
+from api.core.port.project import ProjectRepository
+from api.core.port.event import EventPublisher
+from api.core.port.analytics import AnalyticsRepository
+from api.config import get_settings
+from api.adapters.backend import Backend
+from api.adapters.tracing import current_span, traced
+from api.adapters.jobs.handlers import JOB_HANDLERS
+from api.adapters.jobs.runner import JobRunner
+from api.adapters.jobs.store import job_repository
+from api.adapters.rest.project import (
+    TaskUseCases, ProjectUseCases, AnalyticsUseCases, JobUseCases, BatchUseCases, HistoryUseCases
+)
+
+
+class RequestScope:
+    # one session per request; repositories and use cases are built on first use and
+    # share it, so a request pays only for what its route touches
+    def __init__(self, backend: Backend, jobs: JobRunner):
+        self.backend = backend
+        self.jobs = jobs
+        self._sessions = backend.get_db()
+        self.db: Any = next(self._sessions)
+        # sampled requests get each layer behind a span-recording stand-in
+        self.traced = current_span() is not None
+
+    def _trace(self, target, layer: str):
+        return traced(target, layer) if self.traced else target
+
+    @cached_property
+    def task_repository(self) -> TaskRepository:
+        return self._trace(self.backend.task_repository(self.db), "repository")
+
+    @cached_property
+    def project_repository(self) -> ProjectRepository:
+        return self._trace(self.backend.project_repository(self.db), "repository")
+
+    @cached_property
+    def event_publisher(self) -> EventPublisher:
+        return self.backend.event_publisher(self.db)
+
+    @cached_property
+    def analytics_repository(self) -> AnalyticsRepository:
+        return self._trace(self.backend.analytics_repository(self.db), "repository")
+
+    @cached_property
+    def task_use_cases(self) -> TaskUseCases:
+        use_cases = TaskUseCases(self.task_repository, self.project_repository, self.event_publisher)
+        if self.traced:
+            use_cases.task_domain_service = traced(use_cases.task_domain_service, "service")
+        return self._trace(use_cases, "use_case")
+
+    @cached_property
+    def project_use_cases(self) -> ProjectUseCases:
+        use_cases = ProjectUseCases(self.project_repository, self.task_repository, self.event_publisher)
+        if self.traced:
+            use_cases.project_domain_service = traced(use_cases.project_domain_service, "service")
+        return self._trace(use_cases, "use_case")
+
+    @cached_property
+    def batch_use_cases(self) -> BatchUseCases:
+        transaction = partial(self.backend.transaction, self.db) if self.backend.transaction else None
+        return self._trace(
+            BatchUseCases(transaction, self.task_use_cases, self.project_use_cases, self.backend.name), "use_case"
+        )
+
+    @cached_property
+    def analytics_use_cases(self) -> AnalyticsUseCases:
+        return self._trace(AnalyticsUseCases(self.analytics_repository, self.project_repository), "use_case")
+
+    @cached_property
+    def job_use_cases(self) -> JobUseCases:
+        return self._trace(
+            JobUseCases(self._trace(self.jobs.repository, "repository"), JOB_HANDLERS.keys(), self.jobs.notify),
+            "use_case"
+        )
+
+    @cached_property
+    def history_use_cases(self) -> HistoryUseCases:
+        history = self.backend.history
+        return self._trace(HistoryUseCases(self._trace(history, "repository") if history else None), "use_case")
+
+    def close(self) -> None:
+        self._sessions.close()
+
+
+class Container:
+    # application-wide: holds the backend and its singletons (engines, writers, stores,
+    # publishers) and the job runner from lifespan start to shutdown. Built by the lifespan
+    # and kept on app.state, so each lifespan runs on a backend of its own
+    def __init__(self, backend: Backend):
+        settings = get_settings()
+        self.backend = backend
+        self.jobs = JobRunner(
+            job_repository(),
+            backend,
+            settings.jobs_workers,
+            # a job process cannot reach an in-process store
+            processes=settings.jobs_pool == "process" and backend.multiprocess,
+            poll_interval=settings.jobs_poll_interval_ms / 1000,
+        )
+
+    def start(self, ensure_schema: bool) -> None:
+        if ensure_schema:
+            self.backend.ensure_schema()
+        self.jobs.repository.ensure_schema()
+        if self.jobs.workers > 0:
+            self.jobs.start()
+        if self.backend.maintenance:
+            self.backend.maintenance.start()
+        if self.backend.invalidation:
+            self.backend.invalidation.start()
+
+    def scope(self) -> RequestScope:
+        return RequestScope(self.backend, self.jobs)
+
+    def close(self) -> None:
+        self.jobs.close()
+        self.backend.close()
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from fastapi import APIRouter, Request
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+
+from api.config import get_settings
+
+docs_router = APIRouter(include_in_schema=False)
+
+OPENAPI_URL = "/openapi.json"
+
+
+@docs_router.get(OPENAPI_URL)
+def openapi_spec(request: Request):
+    prebuilt = Path(get_settings().openapi_path)
+    if prebuilt.is_file():
+        return FileResponse(prebuilt, media_type="application/json")
+    # no prebuilt spec: build it once, FastAPI caches it on the app
+    return JSONResponse(request.app.openapi())
+
+
+@docs_router.get("/docs")
+def swagger_ui(request: Request) -> HTMLResponse:
+    from fastapi.openapi.docs import get_swagger_ui_html
+    return get_swagger_ui_html(openapi_url=OPENAPI_URL, title=f"{request.app.title} - Swagger UI")
+
+
+@docs_router.get("/redoc")
+def redoc(request: Request) -> HTMLResponse:
+    from fastapi.openapi.docs import get_redoc_html
+    return get_redoc_html(openapi_url=OPENAPI_URL, title=f"{request.app.title} - ReDoc")
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
 from pydantic import BaseModel, Field
 
@@ -53,11 +53,119 @@ class ProjectResponseDTO(BaseModel):
         from_attributes = True
 
 
+class TaskLookupDTO(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=10000)
+
+
+class TaskLookupResponseDTO(BaseModel):
+    tasks: List[TaskResponseDTO]
+    # asked for, but no such task
+    missing: List[UUID]
+
+
+class TaskChangesResponseDTO(BaseModel):
+    changed: List[TaskResponseDTO]
+    deleted: List[UUID]
+    next_since: int
+    has_more: bool
+
+
+class ProjectChangesResponseDTO(BaseModel):
+    changed: List[ProjectResponseDTO]
+    deleted: List[UUID]
+    next_since: int
+    has_more: bool
+
+
+class BurndownPointDTO(BaseModel):
+    date: date
+    created: int
+    completed: int
+    remaining: int
+
+
+class ThroughputPointDTO(BaseModel):
+    period_start: date
+    created: int
+    completed: int
+
+
+class JobCreateDTO(BaseModel):
+    kind: str = Field(..., min_length=1, max_length=64)
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class JobResponseDTO(BaseModel):
+    id: UUID
+    kind: str
+    params: Dict[str, Any]
+    status: str
+    progress: float
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    # file name of the result artifact, downloaded from /jobs/{id}/artifact
+    artifact: Optional[str] = None
+    error: Optional[str] = None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class TaskLinkDTO(BaseModel):
     task_id: UUID
     project_id: UUID
 
 
+class BatchOperationDTO(BaseModel):
+    # a TaskUseCases or ProjectUseCases method, e.g. create_task or link_task_to_project
+    op: str = Field(..., min_length=1, max_length=64)
+    # names the result, so later operations can pass "$<ref>" wherever an id goes
+    ref: Optional[str] = Field(None, min_length=1, max_length=64)
+    # the route's path parameters, task_id and project_id
+    params: Dict[str, str] = Field(default_factory=dict)
+    body: Optional[Dict[str, Any]] = None
+
+
+class BatchRequestDTO(BaseModel):
+    # all or nothing; with false each operation commits or fails on its own
+    atomic: bool = True
+    operations: List[BatchOperationDTO] = Field(..., min_length=1, max_length=100)
+
+
+class BatchResultDTO(BaseModel):
+    op: str
+    ref: Optional[str] = None
+    status: int
+    result: Optional[Union[TaskResponseDTO, ProjectResponseDTO]] = None
+    error: Optional[str] = None
+
+
+class BatchResponseDTO(BaseModel):
+    committed: bool
+    results: List[BatchResultDTO]
+
+
+class HistoryEntryDTO(BaseModel):
+    recorded_at: datetime
+    # task or project
+    entity: str
+    # saved, deleted or event
+    action: str
+    entity_id: UUID
+    project_id: Optional[UUID] = None
+    # the state a save wrote
+    state: Optional[Union[TaskResponseDTO, ProjectResponseDTO]] = None
+    # an event's type and fields
+    event: Optional[Dict[str, Any]] = None
+
+
+class ProjectSnapshotDTO(BaseModel):
+    at: datetime
+    project: ProjectResponseDTO
+    tasks: List[TaskResponseDTO]
+
+
 class ErrorResponseDTO(BaseModel):
     error: str
     detail: Optional[str] = None
@@ -1,34 +1,49 @@
-from sqlalchemy.orm import Session
-from fastapi import Depends
+from typing import AsyncIterator
 
-from api.adapters.sqlite.db import get_db
-from api.adapters.sqlite.project import SQLiteTaskRepository, SQLiteProjectRepository, InMemoryEventPublisher
-from api.adapters.rest.project import TaskUseCases, ProjectUseCases
+from fastapi import Depends, Request
+from starlette.concurrency import run_in_threadpool
 
+from api.adapters.backend import Backend
+from api.adapters.rest.container import RequestScope
+from api.adapters.rest.project import (
+    TaskUseCases, ProjectUseCases, AnalyticsUseCases, JobUseCases, BatchUseCases, HistoryUseCases
+)
 
-def get_task_repository(db: Session = Depends(get_db)) -> SQLiteTaskRepository:
-    return SQLiteTaskRepository(db)
 
+# async so that resolving them does not cost a threadpool hop each; opening a scope only
+# creates a session, the connection is checked out by the first query in the route
+async def get_scope(request: Request) -> AsyncIterator[RequestScope]:
+    scope = request.app.state.container.scope()
+    try:
+        yield scope
+    finally:
+        # returning the connection rolls back, which can block
+        await run_in_threadpool(scope.close)
 
-def get_project_repository(db: Session = Depends(get_db)) -> SQLiteProjectRepository:
-    return SQLiteProjectRepository(db)
 
+async def get_backend(request: Request) -> Backend:
+    return request.app.state.container.backend
 
-def get_event_publisher() -> InMemoryEventPublisher:
-    return InMemoryEventPublisher()
 
+async def get_task_use_cases(scope: RequestScope = Depends(get_scope)) -> TaskUseCases:
+    return scope.task_use_cases
 
-def get_task_use_cases(
-    task_repo: SQLiteTaskRepository = Depends(get_task_repository),
-    project_repo: SQLiteProjectRepository = Depends(get_project_repository),
-    event_publisher: InMemoryEventPublisher = Depends(get_event_publisher)
-) -> TaskUseCases:
-    return TaskUseCases(task_repo, project_repo, event_publisher)
 
+async def get_project_use_cases(scope: RequestScope = Depends(get_scope)) -> ProjectUseCases:
+    return scope.project_use_cases
 
-def get_project_use_cases(
-    project_repo: SQLiteProjectRepository = Depends(get_project_repository),
-    task_repo: SQLiteTaskRepository = Depends(get_task_repository),
-    event_publisher: InMemoryEventPublisher = Depends(get_event_publisher)
-) -> ProjectUseCases:
-    return ProjectUseCases(project_repo, task_repo, event_publisher)
+
+async def get_analytics_use_cases(scope: RequestScope = Depends(get_scope)) -> AnalyticsUseCases:
+    return scope.analytics_use_cases
+
+
+async def get_job_use_cases(scope: RequestScope = Depends(get_scope)) -> JobUseCases:
+    return scope.job_use_cases
+
+
+async def get_batch_use_cases(scope: RequestScope = Depends(get_scope)) -> BatchUseCases:
+    return scope.batch_use_cases
+
+
+async def get_history_use_cases(scope: RequestScope = Depends(get_scope)) -> HistoryUseCases:
+    return scope.history_use_cases
@@ -0,0 +1,16 @@
+from typing import Callable, Dict
+
+from fastapi import APIRouter
+
+metrics_router = APIRouter(include_in_schema=False)
+
+_sources: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, source: Callable[[], dict]) -> None:
+    _sources[name] = source
+
+
+@metrics_router.get("/metrics")
+def get_metrics():
+    return {name: source() for name, source in _sources.items()}
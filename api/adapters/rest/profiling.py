@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, Query, status
+
+from api.config import get_settings
+from api.adapters.profiling import GROUPINGS, MemoryProfiler
+
+settings = get_settings()
+
+profiler = MemoryProfiler()
+if settings.memory_profiling:
+    # from import time, so what the app allocates while starting shows up too
+    profiler.start(settings.memory_profiling_frames)
+
+# this worker's memory only; each worker profiles itself
+profiling_router = APIRouter(prefix="/admin/profiling", tags=["admin"], include_in_schema=False)
+
+
+def _snapshot_not_found(snapshot_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Snapshot {snapshot_id} not found; this worker keeps {list(profiler.snapshots)}"
+    )
+
+
+def _check_grouping(group_by: str) -> None:
+    if group_by not in GROUPINGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by must be one of {', '.join(GROUPINGS)}"
+        )
+
+
+@profiling_router.get("")
+def get_profiling_status(limit: int = Query(20, ge=1, le=1000)):
+    return {**profiler.status(), "routes": profiler.top_routes(limit)}
+
+
+@profiling_router.post("/start")
+def start_profiling(frames: int = Query(1, ge=1, le=100)):
+    # more frames tell allocations apart by caller, at a higher cost per allocation
+    return profiler.start(frames)
+
+
+@profiling_router.post("/stop")
+def stop_profiling():
+    return profiler.stop()
+
+
+@profiling_router.post("/snapshots")
+def take_snapshot(group_by: str = "lineno", limit: int = Query(20, ge=1, le=1000)):
+    _check_grouping(group_by)
+    if not profiler.active:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Memory profiling is not running; POST /admin/profiling/start first"
+        )
+    snapshot_id = profiler.take_snapshot()
+    return {"id": snapshot_id, "top": profiler.top(snapshot_id, group_by, limit)}
+
+
+@profiling_router.get("/snapshots/{snapshot_id}")
+def get_snapshot(snapshot_id: int, group_by: str = "lineno", limit: int = Query(20, ge=1, le=1000)):
+    _check_grouping(group_by)
+    if snapshot_id not in profiler.snapshots:
+        raise _snapshot_not_found(snapshot_id)
+    return {"id": snapshot_id, "top": profiler.top(snapshot_id, group_by, limit)}
+
+
+@profiling_router.get("/diff")
+def diff_snapshots(
+    first: int,
+    second: int,
+    group_by: str = "lineno",
+    limit: int = Query(20, ge=1, le=1000)
+):
+    _check_grouping(group_by)
+    for snapshot_id in (first, second):
+        if snapshot_id not in profiler.snapshots:
+            raise _snapshot_not_found(snapshot_id)
+    return {"first": first, "second": second, "top": profiler.diff(first, second, group_by, limit)}
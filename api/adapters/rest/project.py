@@ -1,25 +1,97 @@
+import base64
+import binascii
+import dataclasses
+import json
+import os
+from contextlib import nullcontext
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Callable, Collection, ContextManager, Dict, FrozenSet, List, Optional, Tuple
 from uuid import UUID
 
+from pydantic import ValidationError
+
 from api.core.domain.task import Task, Project
+from api.core.domain.analytics import Bucket
+from api.core.domain.job import Job, JobInterrupt
+from api.core.domain.history import HistoryEntry
 from api.core.domain.error import (
     TaskNotFoundException, 
     ProjectNotFoundException,
     TaskAlreadyLinkedException,
-    TaskNotLinkedException
+    TaskNotLinkedException,
+    JobNotFoundException,
+    UnknownJobKindException,
+    InvalidCursorException,
+    TaskDeadlineAfterProjectDeadlineException,
+    ProjectCannotBeCompletedException,
+    InvalidBatchOperationException,
+    AtomicBatchUnsupportedException,
+    HistoryDisabledException,
+    ProjectSnapshotNotFoundException
 )
 from api.core.service.task import TaskDomainService
 from api.core.service.project import ProjectDomainService
-from api.core.port.task import TaskRepository
+from api.core.port.task import TaskRepository, TaskQuery, TaskSort, Position
 from api.core.port.project import ProjectRepository
 from api.core.port.event import EventPublisher
+from api.core.port.analytics import AnalyticsRepository
+from api.core.port.job import JobRepository
+from api.core.port.history import HistoryRepository
+from api.core.port.transaction import TransactionRunner, UnitOfWork
 from api.adapters.rest.dtos import (
-    TaskCreateDTO, TaskUpdateDTO, TaskResponseDTO,
-    ProjectCreateDTO, ProjectUpdateDTO, ProjectResponseDTO
+    TaskCreateDTO, TaskUpdateDTO, TaskResponseDTO, TaskLookupResponseDTO,
+    ProjectCreateDTO, ProjectUpdateDTO, ProjectResponseDTO,
+    TaskChangesResponseDTO, ProjectChangesResponseDTO,
+    BurndownPointDTO, ThroughputPointDTO,
+    JobCreateDTO, JobResponseDTO,
+    HistoryEntryDTO, ProjectSnapshotDTO,
+    BatchOperationDTO, BatchRequestDTO, BatchResultDTO, BatchResponseDTO
 )
 
 
+def _with_archived(hot: list, archived: list) -> list:
+    # a row caught mid-move by the archiver can be in both; the hot copy wins
+    hot_ids = {item.id for item in hot}
+    return hot + [item for item in archived if item.id not in hot_ids]
+
+
+def _sparse_task_dto(task: Task, fields: Collection[str]) -> TaskResponseDTO:
+    # only the fields asked for, unvalidated: the store need not have loaded the others
+    values = {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "deadline": task.deadline,
+        "completed": task.is_completed(),
+        "project_id": task.project_id,
+        "created_at": task.created_at,
+        "updated_at": task.updated_at,
+    }
+    return TaskResponseDTO.model_construct(**{name: values[name] for name in fields})
+
+
+def _encode_cursor(sort: TaskSort, position: Position) -> str:
+    value, task_id = position
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort.value, value, str(task_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(sort: TaskSort, cursor: str) -> Position:
+    # a cursor only continues a query sorted the way the one that made it was
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, task_id = json.loads(raw)
+        if cursor_sort != sort.value:
+            raise ValueError(cursor_sort)
+        if value is not None and sort != TaskSort.TITLE:
+            value = datetime.fromisoformat(value)
+        return value, UUID(task_id)
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidCursorException(cursor)
+
+
 class TaskUseCases:
     def __init__(self, task_repository: TaskRepository, project_repository: ProjectRepository, 
                  event_publisher: EventPublisher):
@@ -52,8 +124,10 @@ class TaskUseCases:
             updated_at=saved_task.updated_at
         )
 
-    def get_task(self, task_id: UUID) -> TaskResponseDTO:
+    def get_task(self, task_id: UUID, include_archived: bool = False) -> TaskResponseDTO:
         task = self.task_repository.get_by_id(task_id)
+        if not task and include_archived:
+            task = self.task_repository.get_archived_by_id(task_id)
         if not task:
             raise TaskNotFoundException(task_id)
         
@@ -68,9 +142,49 @@ class TaskUseCases:
             updated_at=task.updated_at
         )
 
-    def get_all_tasks(self) -> List[TaskResponseDTO]:
-        tasks = self.task_repository.get_all()
-        return [
+    def lookup_tasks(self, task_ids: List[UUID], include_archived: bool = False,
+                     fields: Optional[FrozenSet[str]] = None) -> TaskLookupResponseDTO:
+        # in the order asked for, each once
+        task_ids = list(dict.fromkeys(task_ids))
+        found = {task.id: task for task in self.task_repository.get_many(task_ids)}
+        if include_archived:
+            # the archive has no multi-get; only what the hot tables lacked is looked up there
+            for task_id in task_ids:
+                if task_id not in found:
+                    archived = self.task_repository.get_archived_by_id(task_id)
+                    if archived:
+                        found[task_id] = archived
+        tasks = [found[task_id] for task_id in task_ids if task_id in found]
+        if fields is not None:
+            dtos = [_sparse_task_dto(task, fields) for task in tasks]
+        else:
+            dtos = [
+                TaskResponseDTO(
+                    id=task.id,
+                    title=task.title,
+                    description=task.description,
+                    deadline=task.deadline,
+                    completed=task.is_completed(),
+                    project_id=task.project_id,
+                    created_at=task.created_at,
+                    updated_at=task.updated_at
+                )
+                for task in tasks
+            ]
+        return TaskLookupResponseDTO(tasks=dtos, missing=[task_id for task_id in task_ids if task_id not in found])
+
+    def find_tasks(self, query: TaskQuery, cursor: Optional[str] = None,
+                   include_archived: bool = False) -> Tuple[List[TaskResponseDTO], Optional[str]]:
+        if cursor:
+            query = dataclasses.replace(query, after=_decode_cursor(query.sort, cursor))
+        if include_archived:
+            page = query.apply(_with_archived(self.task_repository.get_all(), self.task_repository.get_archived()))
+        else:
+            page = self.task_repository.find(query)
+        if query.fields is not None:
+            tasks = [_sparse_task_dto(task, query.fields) for task in page.items]
+            return tasks, _encode_cursor(query.sort, page.next) if page.next else None
+        tasks = [
             TaskResponseDTO(
                 id=task.id,
                 title=task.title,
@@ -81,11 +195,33 @@ class TaskUseCases:
                 created_at=task.created_at,
                 updated_at=task.updated_at
             )
-            for task in tasks
+            for task in page.items
         ]
+        return tasks, _encode_cursor(query.sort, page.next) if page.next else None
+
+    def get_task_changes(self, since: int, limit: int) -> TaskChangesResponseDTO:
+        changes = self.task_repository.get_changes(since, limit)
+        return TaskChangesResponseDTO(
+            changed=[
+                TaskResponseDTO(
+                    id=task.id,
+                    title=task.title,
+                    description=task.description,
+                    deadline=task.deadline,
+                    completed=task.is_completed(),
+                    project_id=task.project_id,
+                    created_at=task.created_at,
+                    updated_at=task.updated_at
+                )
+                for task in changes.changed
+            ],
+            deleted=changes.deleted,
+            next_since=changes.last_seq,
+            has_more=changes.has_more
+        )
 
     def update_task(self, task_id: UUID, task_data: TaskUpdateDTO) -> TaskResponseDTO:
-        task = self.task_repository.get_by_id(task_id)
+        task = self.task_repository.get_by_id_for_update(task_id)
         if not task:
             raise TaskNotFoundException(task_id)
         
@@ -131,8 +267,24 @@ class TaskUseCases:
             updated_at=task.updated_at
         )
 
+    def reopen_task(self, task_id: UUID) -> TaskResponseDTO:
+        if not self.task_repository.get_by_id(task_id) and not self.task_repository.get_archived_by_id(task_id):
+            raise TaskNotFoundException(task_id)
+
+        task = self.task_domain_service.reopen_task(task_id)
+        return TaskResponseDTO(
+            id=task.id,
+            title=task.title,
+            description=task.description,
+            deadline=task.deadline,
+            completed=task.is_completed(),
+            project_id=task.project_id,
+            created_at=task.created_at,
+            updated_at=task.updated_at
+        )
+
     def link_task_to_project(self, task_id: UUID, project_id: UUID) -> TaskResponseDTO:
-        task = self.task_repository.get_by_id(task_id)
+        task = self.task_repository.get_by_id_for_update(task_id)
         if not task:
             raise TaskNotFoundException(task_id)
         
@@ -162,7 +314,7 @@ class TaskUseCases:
         )
 
     def unlink_task_from_project(self, task_id: UUID) -> TaskResponseDTO:
-        task = self.task_repository.get_by_id(task_id)
+        task = self.task_repository.get_by_id_for_update(task_id)
         if not task:
             raise TaskNotFoundException(task_id)
         
@@ -208,8 +360,10 @@ class ProjectUseCases:
             updated_at=saved_project.updated_at
         )
 
-    def get_project(self, project_id: UUID) -> ProjectResponseDTO:
+    def get_project(self, project_id: UUID, include_archived: bool = False) -> ProjectResponseDTO:
         project = self.project_repository.get_by_id(project_id)
+        if not project and include_archived:
+            project = self.project_repository.get_archived_by_id(project_id)
         if not project:
             raise ProjectNotFoundException(project_id)
         
@@ -222,8 +376,10 @@ class ProjectUseCases:
             updated_at=project.updated_at
         )
 
-    def get_all_projects(self) -> List[ProjectResponseDTO]:
+    def get_all_projects(self, include_archived: bool = False) -> List[ProjectResponseDTO]:
         projects = self.project_repository.get_all()
+        if include_archived:
+            projects = _with_archived(projects, self.project_repository.get_archived())
         return [
             ProjectResponseDTO(
                 id=project.id,
@@ -236,8 +392,27 @@ class ProjectUseCases:
             for project in projects
         ]
 
+    def get_project_changes(self, since: int, limit: int) -> ProjectChangesResponseDTO:
+        changes = self.project_repository.get_changes(since, limit)
+        return ProjectChangesResponseDTO(
+            changed=[
+                ProjectResponseDTO(
+                    id=project.id,
+                    title=project.title,
+                    deadline=project.deadline,
+                    completed=project.is_completed(),
+                    created_at=project.created_at,
+                    updated_at=project.updated_at
+                )
+                for project in changes.changed
+            ],
+            deleted=changes.deleted,
+            next_since=changes.last_seq,
+            has_more=changes.has_more
+        )
+
     def update_project(self, project_id: UUID, project_data: ProjectUpdateDTO) -> ProjectResponseDTO:
-        project = self.project_repository.get_by_id(project_id)
+        project = self.project_repository.get_by_id_for_update(project_id)
         if not project:
             raise ProjectNotFoundException(project_id)
         
@@ -263,12 +438,19 @@ class ProjectUseCases:
         
         return self.project_repository.delete(project_id)
 
-    def get_project_tasks(self, project_id: UUID) -> List[TaskResponseDTO]:
+    def get_project_tasks(self, project_id: UUID, include_archived: bool = False,
+                          fields: Optional[FrozenSet[str]] = None) -> List[TaskResponseDTO]:
         project = self.project_repository.get_by_id(project_id)
+        if not project and include_archived:
+            project = self.project_repository.get_archived_by_id(project_id)
         if not project:
             raise ProjectNotFoundException(project_id)
         
-        tasks = self.task_repository.get_by_project_id(project_id)
+        tasks = self.task_repository.find(TaskQuery(project_id=project_id, fields=fields)).items
+        if include_archived:
+            tasks = _with_archived(tasks, self.task_repository.get_archived(project_id))
+        if fields is not None:
+            return [_sparse_task_dto(task, fields) for task in tasks]
         return [
             TaskResponseDTO(
                 id=task.id,
@@ -293,3 +475,297 @@ class ProjectUseCases:
             created_at=project.created_at,
             updated_at=project.updated_at
         )
+
+
+class AnalyticsUseCases:
+    def __init__(self, analytics_repository: AnalyticsRepository, project_repository: ProjectRepository):
+        self.analytics_repository = analytics_repository
+        self.project_repository = project_repository
+
+    def get_burndown(self, project_id: Optional[UUID] = None) -> List[BurndownPointDTO]:
+        if project_id and not self.project_repository.get_by_id(project_id):
+            raise ProjectNotFoundException(project_id)
+
+        series = self.analytics_repository.completion_series(Bucket.DAY, project_id)
+        return [
+            BurndownPointDTO(
+                date=point.period_start,
+                created=point.created,
+                completed=point.completed,
+                remaining=point.remaining
+            )
+            for point in series
+        ]
+
+    def get_throughput(self, bucket: Bucket, project_id: Optional[UUID] = None) -> List[ThroughputPointDTO]:
+        if project_id and not self.project_repository.get_by_id(project_id):
+            raise ProjectNotFoundException(project_id)
+
+        series = self.analytics_repository.completion_series(bucket, project_id)
+        return [
+            ThroughputPointDTO(
+                period_start=point.period_start,
+                created=point.created,
+                completed=point.completed
+            )
+            for point in series
+        ]
+
+
+class JobUseCases:
+    def __init__(self, job_repository: JobRepository, kinds: Collection[str], notify: Callable[[], None]):
+        self.job_repository = job_repository
+        self.kinds = kinds
+        self.notify = notify
+
+    def create_job(self, job_data: JobCreateDTO) -> JobResponseDTO:
+        if job_data.kind not in self.kinds:
+            raise UnknownJobKindException(job_data.kind)
+
+        job = self.job_repository.save(Job(kind=job_data.kind, params=job_data.params))
+        # wake this worker's runner; the others pick it up on their next poll
+        self.notify()
+        return self._to_dto(job)
+
+    def get_job(self, job_id: UUID) -> JobResponseDTO:
+        job = self.job_repository.get_by_id(job_id)
+        if not job:
+            raise JobNotFoundException(job_id)
+        return self._to_dto(job)
+
+    def get_recent_jobs(self, limit: int) -> List[JobResponseDTO]:
+        return [self._to_dto(job) for job in self.job_repository.get_recent(limit)]
+
+    def cancel_job(self, job_id: UUID) -> JobResponseDTO:
+        job = self.job_repository.request_cancel(job_id)
+        if not job:
+            raise JobNotFoundException(job_id)
+        return self._to_dto(job)
+
+    def get_job_artifact(self, job_id: UUID) -> Optional[str]:
+        job = self.job_repository.get_by_id(job_id)
+        if not job:
+            raise JobNotFoundException(job_id)
+        return job.artifact if job.artifact and os.path.exists(job.artifact) else None
+
+    def _to_dto(self, job: Job) -> JobResponseDTO:
+        return JobResponseDTO(
+            id=job.id,
+            kind=job.kind,
+            params=job.params,
+            status=job.status.value,
+            progress=job.progress,
+            message=job.message,
+            result=job.result,
+            artifact=os.path.basename(job.artifact) if job.artifact else None,
+            error=job.error,
+            cancel_requested=job.interrupt == JobInterrupt.CANCEL,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at
+        )
+
+
+class HistoryUseCases:
+    def __init__(self, history: Optional[HistoryRepository]):
+        self.history = history
+
+    def _history(self) -> HistoryRepository:
+        if self.history is None:
+            raise HistoryDisabledException()
+        return self.history
+
+    def get_task_history(self, task_id: UUID, until: Optional[datetime] = None) -> List[HistoryEntryDTO]:
+        entries = self._history().entity_history(task_id, until)
+        if not entries:
+            raise TaskNotFoundException(task_id)
+        return [self._to_dto(entry) for entry in entries]
+
+    def get_project_history(self, project_id: UUID, until: Optional[datetime] = None) -> List[HistoryEntryDTO]:
+        entries = self._history().entity_history(project_id, until)
+        if not entries:
+            raise ProjectNotFoundException(project_id)
+        return [self._to_dto(entry) for entry in entries]
+
+    def get_project_snapshot(self, project_id: UUID, at: datetime) -> ProjectSnapshotDTO:
+        snapshot = self._history().project_at(project_id, at)
+        if not snapshot:
+            raise ProjectSnapshotNotFoundException(project_id, at)
+        return ProjectSnapshotDTO(
+            at=snapshot.at,
+            project=self._project_dto(snapshot.project),
+            tasks=[self._task_dto(task) for task in snapshot.tasks]
+        )
+
+    def _to_dto(self, entry: HistoryEntry) -> HistoryEntryDTO:
+        state = None
+        if entry.task:
+            state = self._task_dto(entry.task)
+        elif entry.project:
+            state = self._project_dto(entry.project)
+        return HistoryEntryDTO(
+            recorded_at=entry.recorded_at,
+            entity=entry.entity.value,
+            action=entry.action.value,
+            entity_id=entry.entity_id,
+            project_id=entry.project_id,
+            state=state,
+            event=entry.event
+        )
+
+    def _task_dto(self, task: Task) -> TaskResponseDTO:
+        return TaskResponseDTO(
+            id=task.id,
+            title=task.title,
+            description=task.description,
+            deadline=task.deadline,
+            completed=task.is_completed(),
+            project_id=task.project_id,
+            created_at=task.created_at,
+            updated_at=task.updated_at
+        )
+
+    def _project_dto(self, project: Project) -> ProjectResponseDTO:
+        return ProjectResponseDTO(
+            id=project.id,
+            title=project.title,
+            deadline=project.deadline,
+            completed=project.is_completed(),
+            created_at=project.created_at,
+            updated_at=project.updated_at
+        )
+
+
+def _delete_task(tasks: TaskUseCases, task_id: UUID) -> None:
+    if not tasks.delete_task(task_id):
+        raise TaskNotFoundException(task_id)
+
+
+def _delete_project(projects: ProjectUseCases, project_id: UUID) -> None:
+    if not projects.delete_project(project_id):
+        raise ProjectNotFoundException(project_id)
+
+
+# operation -> path parameters, body, status on success, and the call, which gets the task
+# and project use cases, the parameters and the body
+BATCH_OPERATIONS: Dict[str, Tuple[Tuple[str, ...], Any, int, Callable[..., Any]]] = {
+    "create_task": ((), TaskCreateDTO, 201, lambda t, p, ids, body: t.create_task(body)),
+    "get_task": (("task_id",), None, 200, lambda t, p, ids, body: t.get_task(ids["task_id"])),
+    "update_task": (("task_id",), TaskUpdateDTO, 200, lambda t, p, ids, body: t.update_task(ids["task_id"], body)),
+    "delete_task": (("task_id",), None, 204, lambda t, p, ids, body: _delete_task(t, ids["task_id"])),
+    "complete_task": (("task_id",), None, 200, lambda t, p, ids, body: t.complete_task(ids["task_id"])),
+    "reopen_task": (("task_id",), None, 200, lambda t, p, ids, body: t.reopen_task(ids["task_id"])),
+    "create_project": ((), ProjectCreateDTO, 201, lambda t, p, ids, body: p.create_project(body)),
+    "get_project": (("project_id",), None, 200, lambda t, p, ids, body: p.get_project(ids["project_id"])),
+    "update_project": (
+        ("project_id",), ProjectUpdateDTO, 200, lambda t, p, ids, body: p.update_project(ids["project_id"], body)
+    ),
+    "delete_project": (("project_id",), None, 204, lambda t, p, ids, body: _delete_project(p, ids["project_id"])),
+    "complete_project": (("project_id",), None, 200, lambda t, p, ids, body: p.complete_project(ids["project_id"])),
+    "link_task_to_project": (
+        ("project_id", "task_id"), None, 200,
+        lambda t, p, ids, body: t.link_task_to_project(ids["task_id"], ids["project_id"])
+    ),
+    "unlink_task_from_project": (
+        ("project_id", "task_id"), None, 200, lambda t, p, ids, body: t.unlink_task_from_project(ids["task_id"])
+    ),
+}
+
+# the status each route answers these with
+BATCH_ERRORS = {
+    TaskNotFoundException: 404,
+    ProjectNotFoundException: 404,
+    TaskAlreadyLinkedException: 400,
+    TaskNotLinkedException: 400,
+    TaskDeadlineAfterProjectDeadlineException: 400,
+    ProjectCannotBeCompletedException: 400,
+    InvalidBatchOperationException: 422,
+}
+
+
+class _RollBack(Exception):
+    def __init__(self, results: List[BatchResultDTO]):
+        self.results = results
+
+
+class BatchUseCases:
+    def __init__(self, transaction: Optional[TransactionRunner], task_use_cases: TaskUseCases,
+                 project_use_cases: ProjectUseCases, store: str):
+        self.transaction = transaction
+        self.task_use_cases = task_use_cases
+        self.project_use_cases = project_use_cases
+        self.store = store
+
+    def run_batch(self, batch: BatchRequestDTO) -> BatchResponseDTO:
+        refs = set()
+        for index, operation in enumerate(batch.operations):
+            if operation.op not in BATCH_OPERATIONS:
+                raise InvalidBatchOperationException(index, f"unknown operation '{operation.op}'")
+            if operation.ref is not None and operation.ref in refs:
+                raise InvalidBatchOperationException(index, f"ref '{operation.ref}' is already used")
+            refs.add(operation.ref)
+
+        if self.transaction is None:
+            if batch.atomic:
+                raise AtomicBatchUnsupportedException(self.store)
+            # each operation commits on its own, as if it had been its own request
+            results = self._run(batch.operations, self.task_use_cases, self.project_use_cases, nullcontext, False)
+            return BatchResponseDTO(committed=True, results=results)
+
+        def work(unit: UnitOfWork) -> List[BatchResultDTO]:
+            tasks = TaskUseCases(unit.task_repository, unit.project_repository, unit.event_publisher)
+            projects = ProjectUseCases(unit.project_repository, unit.task_repository, unit.event_publisher)
+            # all or nothing needs no savepoints: the first failure rolls back everything
+            savepoint = nullcontext if batch.atomic else unit.savepoint
+            results = self._run(batch.operations, tasks, projects, savepoint, batch.atomic)
+            if batch.atomic and results[-1].error is not None:
+                raise _RollBack(results)
+            return results
+
+        try:
+            return BatchResponseDTO(committed=True, results=self.transaction(work))
+        except _RollBack as rolled_back:
+            return BatchResponseDTO(committed=False, results=rolled_back.results)
+
+    def _run(self, operations: List[BatchOperationDTO], tasks: TaskUseCases, projects: ProjectUseCases,
+             savepoint: Callable[[], ContextManager], stop_on_error: bool) -> List[BatchResultDTO]:
+        created: Dict[str, UUID] = {}
+        results = []
+        for index, operation in enumerate(operations):
+            names, body_type, success, call = BATCH_OPERATIONS[operation.op]
+            result = BatchResultDTO(op=operation.op, ref=operation.ref, status=success)
+            try:
+                ids = {name: self._resolve(index, operation.params.get(name), name, created) for name in names}
+                body = None
+                if body_type is not None:
+                    body = body_type(**{
+                        key: self._resolve(index, value, key, created)
+                        if key.endswith("_id") and isinstance(value, str) else value
+                        for key, value in (operation.body or {}).items()
+                    })
+                with savepoint():
+                    result.result = call(tasks, projects, ids, body)
+            except ValidationError as e:
+                result.status, result.error = 422, str(InvalidBatchOperationException(index, str(e)))
+            except tuple(BATCH_ERRORS) as e:
+                result.status, result.error = BATCH_ERRORS[type(e)], str(e)
+            results.append(result)
+            if result.error is not None and stop_on_error:
+                break
+            if result.error is None and operation.ref and result.result is not None:
+                created[operation.ref] = result.result.id
+        return results
+
+    def _resolve(self, index: int, value: Optional[str], name: str, created: Dict[str, UUID]) -> UUID:
+        if value is None:
+            raise InvalidBatchOperationException(index, f"{name} is required")
+        if value.startswith("$"):
+            if value[1:] not in created:
+                raise InvalidBatchOperationException(
+                    index, f"{name} '{value}' does not name an earlier operation that succeeded"
+                )
+            return created[value[1:]]
+        try:
+            return UUID(value)
+        except ValueError:
+            raise InvalidBatchOperationException(index, f"{name} '{value}' is not an id")
@@ -1,17 +1,98 @@
+from api.startup import startup_timer
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.adapters.sqlite.db import create_tables
-from api.adapters.rest.task import task_router, project_router
+from api.config import get_settings
+from api.adapters.backend import load_backend
+from api.adapters.rest.admission import AdmissionLimiter, AdmissionMiddleware
+from api.adapters.rest.admin import admin_router
+from api.adapters.rest.coalescing import Coalescer, CoalescingMiddleware
+from api.adapters.rest.container import Container
+from api.adapters.rest.docs import docs_router
+from api.adapters.rest.metrics import metrics_router, register_metrics
+from api.adapters.rest.profiling import profiler, profiling_router
+from api.adapters.rest.tracing import TracingMiddleware, tracer, tracing_router
+from api.adapters.rest.task import task_router, project_router, analytics_router, jobs_router, batch_router
+
+startup_timer.mark("imports")
+
+settings = get_settings()
+
+
+def _attach(container: Container) -> None:
+    # hooks the app-wide middleware and metrics up to the backend this lifespan runs on
+    backend = container.backend
+    if settings.admission_control and backend.maintenance:
+        # maintenance waits for a quiet moment in this worker
+        backend.maintenance.load = lambda: read_limiter.active + write_limiter.active
+    if settings.read_coalescing:
+        backend.commit_listeners.append(coalescer.invalidate)
+        if backend.invalidation:
+            backend.invalidation.subscribe(coalescer.invalidate)
+    for name, source in backend.metrics.items():
+        register_metrics(name, source)
+    register_metrics("jobs", container.jobs.stats)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # built here rather than at import, so a second lifespan (another test client, a
+    # reload) gets a backend of its own instead of the one the last shutdown closed
+    container = app.state.container = Container(load_backend(settings.database_url))
+    _attach(container)
+    container.start(ensure_schema=settings.create_tables_on_startup)
+    startup_timer.mark("schema")
+    startup_timer.log()
+    yield
+    container.close()
+
 
 app = FastAPI(
     title="Task Manager API",
     description="Task management and project tracking system",
     version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
+    # served by docs_router from the prebuilt spec instead of being generated on first hit
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
+    lifespan=lifespan
 )
 
+if settings.admission_control:
+    queue_timeout = settings.admission_queue_timeout_ms / 1000
+    read_limiter = AdmissionLimiter(
+        "read", settings.admission_read_limit, settings.admission_read_queue, queue_timeout
+    )
+    write_limiter = AdmissionLimiter(
+        "write", settings.admission_write_limit, settings.admission_write_queue, queue_timeout
+    )
+    # added before CORS so rejections still carry the CORS headers
+    app.add_middleware(
+        AdmissionMiddleware,
+        read=read_limiter,
+        write=write_limiter,
+        retry_after=settings.admission_retry_after,
+    )
+    register_metrics("admission", lambda: {
+        "read": read_limiter.stats(),
+        "write": write_limiter.stats(),
+    })
+
+if settings.read_coalescing:
+    coalescer = Coalescer(settings.read_coalescing_paths.split(","))
+    # outside admission, so requests that join a flight do not take a read slot
+    app.add_middleware(CoalescingMiddleware, coalescer=coalescer)
+    register_metrics("coalescing", coalescer.stats)
+
+register_metrics("tracing", tracer.stats)
+register_metrics("memory", profiler.stats)
+
+# outermost but for CORS, so a trace includes the time spent queued for admission
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -20,13 +101,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(docs_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
+if settings.memory_profiling_routes:
+    # anyone who can reach them can slow the worker down, so they are only there when asked for
+    app.include_router(profiling_router)
+app.include_router(tracing_router)
 app.include_router(task_router)
 app.include_router(project_router)
+app.include_router(analytics_router)
+app.include_router(jobs_router)
+app.include_router(batch_router)
 
-
-@app.on_event("startup")
-async def startup_event():
-    create_tables()
+startup_timer.mark("app")
 
 
 @app.get("/")
@@ -41,3 +129,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/debug/startup", include_in_schema=False)
+async def startup_timing():
+    return startup_timer.report()
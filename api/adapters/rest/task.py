@@ -1,23 +1,107 @@
-from typing import List
+import os
+from datetime import datetime
+from typing import FrozenSet, List, Optional
 from uuid import UUID
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, TypeAdapter
 
-from api.adapters.rest.project import TaskUseCases, ProjectUseCases
+from api.adapters.rest.project import (
+    TaskUseCases, ProjectUseCases, AnalyticsUseCases, JobUseCases, BatchUseCases, HistoryUseCases
+)
 from api.adapters.rest.dtos import (
-    TaskCreateDTO, TaskUpdateDTO, TaskResponseDTO,
+    TaskCreateDTO, TaskUpdateDTO, TaskResponseDTO, TaskLookupDTO, TaskLookupResponseDTO,
     ProjectCreateDTO, ProjectUpdateDTO, ProjectResponseDTO,
+    TaskChangesResponseDTO, ProjectChangesResponseDTO,
+    BurndownPointDTO, ThroughputPointDTO,
+    JobCreateDTO, JobResponseDTO,
+    BatchRequestDTO, BatchResponseDTO,
+    HistoryEntryDTO, ProjectSnapshotDTO,
     ErrorResponseDTO
 )
 from api.core.domain.error import (
     TaskNotFoundException, ProjectNotFoundException,
     TaskAlreadyLinkedException, TaskNotLinkedException,
     TaskDeadlineAfterProjectDeadlineException,
-    ProjectCannotBeCompletedException
+    ProjectCannotBeCompletedException,
+    JobNotFoundException, UnknownJobKindException,
+    InvalidCursorException,
+    InvalidBatchOperationException, AtomicBatchUnsupportedException,
+    HistoryDisabledException, ProjectSnapshotNotFoundException
+)
+from api.core.domain.task import TaskStatus
+from api.core.port.task import TaskQuery, TaskSort
+from api.core.domain.analytics import Bucket
+from api.adapters.rest.tracing import TracedRoute
+from api.adapters.rest.event import (
+    get_task_use_cases, get_project_use_cases, get_analytics_use_cases, get_job_use_cases,
+    get_batch_use_cases, get_history_use_cases
 )
-from api.adapters.rest.event import get_task_use_cases, get_project_use_cases
 
-task_router = APIRouter(prefix="/tasks", tags=["tasks"])
-project_router = APIRouter(prefix="/projects", tags=["projects"])
+task_router = APIRouter(prefix="/tasks", tags=["tasks"], route_class=TracedRoute)
+project_router = APIRouter(prefix="/projects", tags=["projects"], route_class=TracedRoute)
+analytics_router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=TracedRoute)
+jobs_router = APIRouter(prefix="/jobs", tags=["jobs"], route_class=TracedRoute)
+batch_router = APIRouter(prefix="/batch", tags=["batch"], route_class=TracedRoute)
+
+TASK_FIELDS = frozenset(TaskResponseDTO.model_fields)
+# list views show what fits in a row; the description only comes when asked for
+TASK_LIST_FIELDS = TASK_FIELDS - {"description"}
+PROJECT_FIELDS = frozenset(ProjectResponseDTO.model_fields)
+
+TASK_LIST = TypeAdapter(List[TaskResponseDTO])
+PROJECT_LIST = TypeAdapter(List[ProjectResponseDTO])
+
+
+def _fields(
+    fields: Optional[str],
+    allowed: FrozenSet[str],
+    default: Optional[FrozenSet[str]]
+) -> Optional[FrozenSet[str]]:
+    # a comma-separated list of response fields, or * for all of them; id always comes along
+    if fields is None:
+        return default
+    if fields.strip() == "*":
+        return allowed
+    names = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    if not names or names - allowed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fields takes * or a comma-separated list of {', '.join(sorted(allowed))}; "
+                   f"got {fields!r}"
+        )
+    return names | {"id"}
+
+
+# ids in one GET /tasks?ids=, which has to fit in a URL; POST /tasks/lookup takes more
+MAX_QUERY_IDS = 200
+
+
+def _ids(ids: List[str]) -> List[UUID]:
+    # repeated, comma-separated, or both
+    values = [value.strip() for item in ids for value in item.split(",") if value.strip()]
+    if len(values) > MAX_QUERY_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids takes at most {MAX_QUERY_IDS} ids; POST /tasks/lookup takes more"
+        )
+    try:
+        return [UUID(value) for value in values]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must be task ids: {e}"
+        )
+
+
+def _sparse(content, fields: FrozenSet[str], adapter: Optional[TypeAdapter] = None) -> Response:
+    # serialized straight from the DTOs: FastAPI would validate them against the full
+    # response model first, and sparse ones leave out fields it requires
+    if isinstance(content, BaseModel):
+        body = content.model_dump_json(include=fields)
+    else:
+        body = adapter.dump_json(content, include={"__all__": fields})
+    return Response(content=body, media_type="application/json")
 
 
 @task_router.post("/", response_model=TaskResponseDTO, status_code=status.HTTP_201_CREATED)
@@ -36,23 +120,127 @@ def create_task(
 
 @task_router.get("/", response_model=List[TaskResponseDTO])
 def get_all_tasks(
+    project_id: Optional[UUID] = None,
+    status_: Optional[TaskStatus] = Query(None, alias="status"),
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    updated_from: Optional[datetime] = None,
+    updated_to: Optional[datetime] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+    sort: TaskSort = TaskSort.CREATED_AT,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include_archived: bool = False,
+    fields: Optional[str] = None,
+    ids: Optional[List[str]] = Query(None),
+    task_use_cases: TaskUseCases = Depends(get_task_use_cases)
+):
+    selected = _fields(fields, TASK_FIELDS, TASK_LIST_FIELDS)
+    if ids is not None:
+        filters = (project_id, status_, deadline_from, deadline_to, created_from, created_to,
+                   updated_from, updated_to, q, limit, cursor)
+        if any(value is not None for value in filters):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ids cannot be combined with filters, limit or cursor"
+            )
+        lookup = task_use_cases.lookup_tasks(_ids(ids), include_archived, selected)
+        response = _sparse(lookup.tasks, selected, TASK_LIST)
+        # like the cursor, what was not found goes in a header, so the body stays a plain list
+        if lookup.missing:
+            response.headers["X-Missing-Ids"] = ",".join(str(task_id) for task_id in lookup.missing)
+        return response
+    query = TaskQuery(
+        project_id=project_id,
+        status=status_,
+        deadline_from=deadline_from,
+        deadline_to=deadline_to,
+        created_from=created_from,
+        created_to=created_to,
+        updated_from=updated_from,
+        updated_to=updated_to,
+        text=q,
+        sort=sort,
+        descending=order == "desc",
+        limit=limit,
+        fields=selected
+    )
+    try:
+        tasks, next_cursor = task_use_cases.find_tasks(query, cursor, include_archived)
+    except InvalidCursorException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    response = _sparse(tasks, selected, TASK_LIST)
+    # the page stays a plain list; the way to the next one is in a header
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+@task_router.post("/lookup", response_model=TaskLookupResponseDTO)
+def lookup_tasks(
+    lookup: TaskLookupDTO,
+    include_archived: bool = False,
+    fields: Optional[str] = None,
     task_use_cases: TaskUseCases = Depends(get_task_use_cases)
 ):
-    return task_use_cases.get_all_tasks()
+    # a POST only because a long list of ids does not fit in a URL; it reads nothing else
+    selected = _fields(fields, TASK_FIELDS, TASK_LIST_FIELDS)
+    found = task_use_cases.lookup_tasks(lookup.ids, include_archived, selected)
+    body = found.model_dump_json(include={"tasks": {"__all__": selected}, "missing": True})
+    return Response(content=body, media_type="application/json")
+
+
+@task_router.get("/changes", response_model=TaskChangesResponseDTO)
+def get_task_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    task_use_cases: TaskUseCases = Depends(get_task_use_cases)
+):
+    return task_use_cases.get_task_changes(since, limit)
 
 
 @task_router.get("/{task_id}", response_model=TaskResponseDTO)
 def get_task(
     task_id: UUID,
+    include_archived: bool = False,
+    fields: Optional[str] = None,
     task_use_cases: TaskUseCases = Depends(get_task_use_cases)
 ):
+    selected = _fields(fields, TASK_FIELDS, None)
     try:
-        return task_use_cases.get_task(task_id)
+        task = task_use_cases.get_task(task_id, include_archived)
     except TaskNotFoundException as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
+    return _sparse(task, selected) if selected else task
+
+
+@task_router.get("/{task_id}/history", response_model=List[HistoryEntryDTO])
+def get_task_history(
+    task_id: UUID,
+    until: Optional[datetime] = None,
+    history_use_cases: HistoryUseCases = Depends(get_history_use_cases)
+):
+    try:
+        return history_use_cases.get_task_history(task_id, until)
+    except TaskNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except HistoryDisabledException as e:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e)
+        )
 
 
 @task_router.put("/{task_id}", response_model=TaskResponseDTO)
@@ -108,6 +296,20 @@ def complete_task(
         )
 
 
+@task_router.patch("/{task_id}/reopen", response_model=TaskResponseDTO)
+def reopen_task(
+    task_id: UUID,
+    task_use_cases: TaskUseCases = Depends(get_task_use_cases)
+):
+    try:
+        return task_use_cases.reopen_task(task_id)
+    except TaskNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
 @project_router.post("/", response_model=ProjectResponseDTO, status_code=status.HTTP_201_CREATED)
 def create_project(
     project_data: ProjectCreateDTO,
@@ -118,23 +320,80 @@ def create_project(
 
 @project_router.get("/", response_model=List[ProjectResponseDTO])
 def get_all_projects(
+    include_archived: bool = False,
+    fields: Optional[str] = None,
     project_use_cases: ProjectUseCases = Depends(get_project_use_cases)
 ):
-    return project_use_cases.get_all_projects()
+    selected = _fields(fields, PROJECT_FIELDS, None)
+    projects = project_use_cases.get_all_projects(include_archived)
+    return _sparse(projects, selected, PROJECT_LIST) if selected else projects
+
+
+@project_router.get("/changes", response_model=ProjectChangesResponseDTO)
+def get_project_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    project_use_cases: ProjectUseCases = Depends(get_project_use_cases)
+):
+    return project_use_cases.get_project_changes(since, limit)
 
 
 @project_router.get("/{project_id}", response_model=ProjectResponseDTO)
 def get_project(
     project_id: UUID,
+    include_archived: bool = False,
+    fields: Optional[str] = None,
     project_use_cases: ProjectUseCases = Depends(get_project_use_cases)
+):
+    selected = _fields(fields, PROJECT_FIELDS, None)
+    try:
+        project = project_use_cases.get_project(project_id, include_archived)
+    except ProjectNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    return _sparse(project, selected) if selected else project
+
+
+@project_router.get("/{project_id}/history", response_model=List[HistoryEntryDTO])
+def get_project_history(
+    project_id: UUID,
+    until: Optional[datetime] = None,
+    history_use_cases: HistoryUseCases = Depends(get_history_use_cases)
 ):
     try:
-        return project_use_cases.get_project(project_id)
+        return history_use_cases.get_project_history(project_id, until)
     except ProjectNotFoundException as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
+    except HistoryDisabledException as e:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e)
+        )
+
+
+@project_router.get("/{project_id}/snapshot", response_model=ProjectSnapshotDTO)
+def get_project_snapshot(
+    project_id: UUID,
+    at: datetime,
+    history_use_cases: HistoryUseCases = Depends(get_history_use_cases)
+):
+    try:
+        return history_use_cases.get_project_snapshot(project_id, at)
+    except ProjectSnapshotNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except HistoryDisabledException as e:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e)
+        )
 
 
 @project_router.put("/{project_id}", response_model=ProjectResponseDTO)
@@ -174,15 +433,19 @@ def delete_project(
 @project_router.get("/{project_id}/tasks", response_model=List[TaskResponseDTO])
 def get_project_tasks(
     project_id: UUID,
+    include_archived: bool = False,
+    fields: Optional[str] = None,
     project_use_cases: ProjectUseCases = Depends(get_project_use_cases)
 ):
+    selected = _fields(fields, TASK_FIELDS, TASK_LIST_FIELDS)
     try:
-        return project_use_cases.get_project_tasks(project_id)
+        tasks = project_use_cases.get_project_tasks(project_id, include_archived, selected)
     except ProjectNotFoundException as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
+    return _sparse(tasks, selected, TASK_LIST)
 
 
 @project_router.post("/{project_id}/tasks/{task_id}/link", response_model=TaskResponseDTO)
@@ -252,3 +515,121 @@ def complete_project(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+
+
+@analytics_router.get("/burndown", response_model=List[BurndownPointDTO])
+def get_burndown(
+    project_id: Optional[UUID] = None,
+    analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases)
+):
+    try:
+        return analytics_use_cases.get_burndown(project_id)
+    except ProjectNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@analytics_router.get("/throughput", response_model=List[ThroughputPointDTO])
+def get_throughput(
+    bucket: Bucket = Bucket.DAY,
+    project_id: Optional[UUID] = None,
+    analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases)
+):
+    try:
+        return analytics_use_cases.get_throughput(bucket, project_id)
+    except ProjectNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@jobs_router.post("/", response_model=JobResponseDTO, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    job_data: JobCreateDTO,
+    job_use_cases: JobUseCases = Depends(get_job_use_cases)
+):
+    try:
+        return job_use_cases.create_job(job_data)
+    except UnknownJobKindException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@jobs_router.get("/", response_model=List[JobResponseDTO])
+def get_recent_jobs(
+    limit: int = Query(50, ge=1, le=1000),
+    job_use_cases: JobUseCases = Depends(get_job_use_cases)
+):
+    return job_use_cases.get_recent_jobs(limit)
+
+
+@jobs_router.get("/{job_id}", response_model=JobResponseDTO)
+def get_job(
+    job_id: UUID,
+    job_use_cases: JobUseCases = Depends(get_job_use_cases)
+):
+    try:
+        return job_use_cases.get_job(job_id)
+    except JobNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@jobs_router.post("/{job_id}/cancel", response_model=JobResponseDTO)
+def cancel_job(
+    job_id: UUID,
+    job_use_cases: JobUseCases = Depends(get_job_use_cases)
+):
+    try:
+        return job_use_cases.cancel_job(job_id)
+    except JobNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@jobs_router.get("/{job_id}/artifact", response_class=FileResponse)
+def get_job_artifact(
+    job_id: UUID,
+    job_use_cases: JobUseCases = Depends(get_job_use_cases)
+):
+    try:
+        path = job_use_cases.get_job_artifact(job_id)
+    except JobNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} has no artifact"
+        )
+    return FileResponse(path, filename=os.path.basename(path))
+
+
+@batch_router.post("/", response_model=BatchResponseDTO)
+def run_batch(
+    batch: BatchRequestDTO,
+    batch_use_cases: BatchUseCases = Depends(get_batch_use_cases)
+):
+    try:
+        return batch_use_cases.run_batch(batch)
+    except InvalidBatchOperationException as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except AtomicBatchUnsupportedException as e:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e)
+        )
@@ -0,0 +1,87 @@
+from typing import Callable
+
+from fastapi import APIRouter, Query, Request
+from fastapi.routing import APIRoute
+
+from api.config import get_settings
+from api.adapters.tracing import Tracer, activate, current_span
+from api.adapters.rest.profiling import profiler
+
+settings = get_settings()
+
+tracer = Tracer(settings.trace_sample_rate, settings.trace_buffer_size, settings.trace_path)
+
+tracing_router = APIRouter(prefix="/debug", include_in_schema=False)
+
+
+class TracingMiddleware:
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        root = self.tracer.start(f"{scope['method']} {scope['path']}", traceparent)
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_traced(message):
+            if message["type"] == "http.response.start":
+                root.attributes["status"] = message["status"]
+                # lets the caller find this request under /debug/traces
+                header = f"00-{root.trace.trace_id}-{root.span_id}-01".encode()
+                message = {**message, "headers": [*message.get("headers", []), (b"traceparent", header)]}
+            await send(message)
+
+        try:
+            with activate(root):
+                await self.app(scope, receive, send_traced)
+        finally:
+            self.tracer.export(root.trace)
+
+
+class TracedRoute(APIRoute):
+    # the handler span covers request validation, dependencies, the endpoint and response
+    # serialization; whatever its use case span does not account for went to FastAPI. With
+    # memory profiling on, the same stretch is measured for the route's allocations
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        name = self.endpoint.__name__
+
+        async def traced_handler(request: Request):
+            parent = current_span()
+            if parent is None:
+                return await handler(request)
+            root = parent.trace.spans[0]
+            root.name = f"{request.method} {self.path_format}"
+            with activate(parent.child(name, "router")):
+                return await handler(request)
+
+        async def profiled_handler(request: Request):
+            if not profiler.active:
+                return await traced_handler(request)
+            with profiler.measure(f"{request.method} {self.path_format}"):
+                return await traced_handler(request)
+
+        return profiled_handler
+
+
+@tracing_router.get("/traces")
+def get_traces(
+    limit: int = Query(20, ge=1, le=1000),
+    min_duration_ms: float = Query(0, ge=0)
+):
+    # this worker's buffer only; set TRACE_PATH to collect every worker's traces in one file
+    return {
+        **tracer.stats(),
+        "traces": tracer.traces(limit, min_duration_ms),
+    }
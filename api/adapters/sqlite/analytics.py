@@ -0,0 +1,67 @@
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from api.core.domain.analytics import Bucket, CompletionPoint
+from api.core.port.analytics import AnalyticsRepository
+from api.adapters.cache import VersionedCache
+from api.adapters.sqlite.db import ARCHIVE_PATH
+
+PERIODS = {
+    Bucket.DAY: "date({column})",
+    # 'weekday 0' moves forward to Sunday, so six days back is the Monday starting the week
+    Bucket.WEEK: "date({column}, 'weekday 0', '-6 days')",
+}
+
+# archived tasks still belong in the history, and including them keeps results unchanged by archival
+TASKS = (
+    "(SELECT created_at, updated_at, completed, project_id FROM main.tasks "
+    "UNION ALL SELECT created_at, updated_at, completed, project_id FROM archive.tasks)"
+    if ARCHIVE_PATH else "tasks"
+)
+
+_cache = VersionedCache()
+
+
+def completion_series_sql(bucket: Bucket, by_project: bool) -> str:
+    period = PERIODS[bucket]
+    project_filter = "AND project_id = :project_id" if by_project else ""
+    return f"""
+        WITH events AS (
+            SELECT {period.format(column="created_at")} AS period, 1 AS created, 0 AS completed
+            FROM {TASKS} WHERE 1 = 1 {project_filter}
+            UNION ALL
+            SELECT {period.format(column="updated_at")}, 0, 1
+            FROM {TASKS} WHERE completed = 1 {project_filter}
+        ),
+        periods AS (
+            SELECT period, sum(created) AS created, sum(completed) AS completed
+            FROM events GROUP BY period
+        )
+        SELECT period, created, completed,
+               sum(created - completed) OVER (ORDER BY period ROWS UNBOUNDED PRECEDING) AS remaining
+        FROM periods ORDER BY period
+    """
+
+
+class SQLiteAnalyticsRepository(AnalyticsRepository):
+    def __init__(self, db_session: Session, cache: VersionedCache = _cache):
+        self.db = db_session
+        self.cache = cache
+
+    def completion_series(self, bucket: Bucket, project_id: Optional[UUID] = None) -> List[CompletionPoint]:
+        # any task or project write bumps the change sequence, which invalidates the cached series
+        version = self.db.execute(text("SELECT value FROM change_sequence WHERE id = 1")).scalar() or 0
+        return self.cache.get_or_compute(
+            ("completion", bucket, project_id), version, lambda: self._load(bucket, project_id)
+        )
+
+    def _load(self, bucket: Bucket, project_id: Optional[UUID]) -> List[CompletionPoint]:
+        params = {"project_id": str(project_id)} if project_id else {}
+        rows = self.db.execute(text(completion_series_sql(bucket, project_id is not None)), params).all()
+        return [
+            CompletionPoint(date.fromisoformat(period), created, completed, remaining)
+            for period, created, completed, remaining in rows
+        ]
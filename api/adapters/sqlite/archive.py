@@ -0,0 +1,136 @@
+import argparse
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime, MetaData, bindparam, delete, insert, select, text
+from sqlalchemy.orm import Session
+
+from api.config import get_settings
+from api.core.domain.task import Task
+from api.adapters.sqlite.db import ARCHIVE_PATH, engine
+from api.adapters.sqlite.task import TaskModel, ProjectModel
+from api.adapters.sqlite.reads import TASK_FIELDS, PROJECT_FIELDS, task_from_row
+
+ARCHIVE_SCHEMA_VERSION = 1
+
+# tasks moved per transaction, so writers are not held off for the whole run
+ARCHIVE_CHUNK_SIZE = 5000
+
+archive_metadata = MetaData()
+archived_projects = ProjectModel.__table__.to_metadata(archive_metadata, schema="archive")
+archived_tasks = TaskModel.__table__.to_metadata(archive_metadata, schema="archive")
+ARCHIVED_TASK_FIELDS = [archived_tasks.c[column.name] for column in TASK_FIELDS]
+ARCHIVED_PROJECT_FIELDS = [archived_projects.c[column.name] for column in PROJECT_FIELDS]
+
+TASK_COLUMNS = ", ".join(column.name for column in TaskModel.__table__.columns)
+PROJECT_COLUMNS = ", ".join(column.name for column in ProjectModel.__table__.columns)
+
+
+def ensure_archive_schema() -> bool:
+    if not ARCHIVE_PATH:
+        return False
+    with engine.connect() as connection:
+        if connection.exec_driver_sql("PRAGMA archive.user_version").scalar() == ARCHIVE_SCHEMA_VERSION:
+            return False
+        # concurrent starters create the tables one at a time, as in ensure_schema
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        if connection.exec_driver_sql("PRAGMA archive.user_version").scalar() == ARCHIVE_SCHEMA_VERSION:
+            connection.rollback()
+            return False
+        archive_metadata.create_all(bind=connection)
+        connection.exec_driver_sql(f"PRAGMA archive.user_version = {ARCHIVE_SCHEMA_VERSION}")
+        connection.commit()
+    return True
+
+
+def archive_completed(older_than_days: int) -> dict:
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = {"tasks": 0, "projects": 0}
+    while True:
+        tasks, projects = _archive_chunk(cutoff)
+        moved["tasks"] += tasks
+        moved["projects"] += projects
+        if tasks < ARCHIVE_CHUNK_SIZE:
+            return moved
+
+
+def _archive_chunk(cutoff: datetime):
+    with engine.connect() as connection:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        connection.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS archiving_projects (id CHAR(36) PRIMARY KEY)")
+        connection.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS archiving_tasks (id CHAR(36) PRIMARY KEY)")
+        connection.exec_driver_sql("DELETE FROM temp.archiving_projects")
+        connection.exec_driver_sql("DELETE FROM temp.archiving_tasks")
+
+        # a project goes once it is complete, idle since the cutoff and has no open tasks;
+        # its completed tasks go with it whatever their age
+        connection.execute(text(
+            "INSERT INTO temp.archiving_projects SELECT id FROM main.projects p "
+            "WHERE completed = 1 AND updated_at < :cutoff "
+            "AND NOT EXISTS (SELECT 1 FROM main.tasks t WHERE t.project_id = p.id AND t.completed = 0)"
+        ).bindparams(bindparam("cutoff", cutoff, type_=DateTime)))
+        connection.execute(text(
+            "INSERT INTO temp.archiving_tasks SELECT id FROM main.tasks "
+            "WHERE completed = 1 AND (updated_at < :cutoff OR project_id IN (SELECT id FROM temp.archiving_projects)) "
+            "LIMIT :limit"
+        ).bindparams(bindparam("cutoff", cutoff, type_=DateTime)), {"limit": ARCHIVE_CHUNK_SIZE})
+        tasks = connection.exec_driver_sql("SELECT count(*) FROM temp.archiving_tasks").scalar()
+        if tasks == ARCHIVE_CHUNK_SIZE:
+            # more tasks remain, possibly some of these projects'; move the projects on the last chunk
+            connection.exec_driver_sql("DELETE FROM temp.archiving_projects")
+        projects = connection.exec_driver_sql("SELECT count(*) FROM temp.archiving_projects").scalar()
+
+        # WAL makes this atomic per database file, not across both; a crash in between leaves
+        # a row in both, which reads resolve in favour of the hot copy and the next run repeats
+        connection.exec_driver_sql(
+            f"INSERT OR REPLACE INTO archive.projects ({PROJECT_COLUMNS}) SELECT {PROJECT_COLUMNS} "
+            "FROM main.projects WHERE id IN (SELECT id FROM temp.archiving_projects)"
+        )
+        connection.exec_driver_sql(
+            f"INSERT OR REPLACE INTO archive.tasks ({TASK_COLUMNS}) SELECT {TASK_COLUMNS} "
+            "FROM main.tasks WHERE id IN (SELECT id FROM temp.archiving_tasks)"
+        )
+        connection.exec_driver_sql("DELETE FROM main.tasks WHERE id IN (SELECT id FROM temp.archiving_tasks)")
+        connection.exec_driver_sql("DELETE FROM main.projects WHERE id IN (SELECT id FROM temp.archiving_projects)")
+        connection.commit()
+    return tasks, projects
+
+
+def restore_project(db: Session, project_id: UUID) -> bool:
+    key = str(project_id)
+    if db.execute(select(archived_projects.c.id).where(archived_projects.c.id == key)).first() is None:
+        return False
+    db.execute(insert(ProjectModel.__table__).prefix_with("OR REPLACE").from_select(
+        [column.name for column in archived_projects.columns],
+        select(archived_projects).where(archived_projects.c.id == key)
+    ))
+    db.execute(delete(archived_projects).where(archived_projects.c.id == key))
+    return True
+
+
+def restore_task(db: Session, task_id: UUID) -> Optional[Task]:
+    key = str(task_id)
+    row = db.execute(select(*ARCHIVED_TASK_FIELDS).where(archived_tasks.c.id == key)).first()
+    if row is None:
+        return None
+    if row.project_id:
+        restore_project(db, UUID(row.project_id))
+    db.execute(insert(TaskModel.__table__).prefix_with("OR REPLACE").from_select(
+        [column.name for column in archived_tasks.columns],
+        select(archived_tasks).where(archived_tasks.c.id == key)
+    ))
+    db.execute(delete(archived_tasks).where(archived_tasks.c.id == key))
+    return task_from_row(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old completed tasks and projects to the archive database")
+    parser.add_argument("--older-than-days", type=int, default=get_settings().archive_after_days)
+    args = parser.parse_args()
+
+    if not ARCHIVE_PATH:
+        raise SystemExit("Archiving needs a file-backed SQLite DATABASE_URL with SQLITE_ARCHIVE enabled")
+    ensure_archive_schema()
+    print(json.dumps(archive_completed(args.older_than_days)))
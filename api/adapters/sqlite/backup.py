@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tarfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+
+from api.config import get_settings
+
+# a step copies this many pages and then lets go of the database; a writer waits for at
+# most one step on a rollback-journal file, and not at all under WAL
+DEFAULT_STEP_PAGES = 256
+
+# changes from other connections restart a step-wise copy; after this many restarts
+# it copies everything in one step, inside a single read transaction
+MAX_RESTARTS = 3
+
+# pages copied, pages in all
+StepProgress = Callable[[int, int], None]
+# fraction done, message
+Progress = Callable[[float, str], None]
+
+
+class BackupRestarting(Exception):
+    pass
+
+
+def backup_schema(engine: Engine, schema: str, target: str, step_pages: int = DEFAULT_STEP_PAGES,
+                  pause: float = 0.0, progress: Optional[StepProgress] = None) -> dict:
+    started = time.perf_counter()
+    stats = {"schema": schema, "path": target, "steps": 0, "restarts": 0, "single_step": False}
+    partial = f"{target}.partial"
+    source = engine.raw_connection()
+    try:
+        for pages in (step_pages, -1):
+            remaining_before = None
+            stats["single_step"] = pages == -1
+
+            def on_step(status, remaining, total):
+                nonlocal remaining_before
+                stats["steps"] += 1
+                if remaining_before is not None and remaining > remaining_before:
+                    stats["restarts"] += 1
+                    if stats["restarts"] > MAX_RESTARTS:
+                        raise BackupRestarting()
+                remaining_before = remaining
+                if progress:
+                    progress(total - remaining, total)
+                if pause and remaining:
+                    time.sleep(pause)
+
+            destination = sqlite3.connect(partial)
+            try:
+                source.driver_connection.backup(destination, pages=pages, progress=on_step, name=schema)
+                break
+            except BackupRestarting:
+                continue
+            finally:
+                destination.close()
+    finally:
+        source.close()
+    # only a finished copy takes the target's name
+    os.replace(partial, target)
+    stats["bytes"] = os.path.getsize(target)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def attached_schemas(engine: Engine) -> List[str]:
+    with engine.connect() as connection:
+        return [row.name for row in connection.exec_driver_sql("PRAGMA database_list") if row.name != "temp"]
+
+
+def database_name(engine: Engine) -> str:
+    # ./task-manager.db is copied to task-manager.<time>.db
+    return os.path.splitext(os.path.basename(engine.url.database))[0]
+
+
+def backup_databases(engines: Dict[str, Engine], directory: str, compress: bool = False,
+                     step_pages: int = DEFAULT_STEP_PAGES, pause: float = 0.0,
+                     progress: Optional[Progress] = None, check: Callable[[], None] = lambda: None) -> dict:
+    # one file per database and attached schema (main, archive, each shard), named after them
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    targets = [
+        (engine, schema, os.path.join(directory, f"{name}{'' if schema == 'main' else '.' + schema}.{stamp}.db"))
+        for name, engine in engines.items()
+        for schema in attached_schemas(engine)
+    ]
+    files = []
+    for index, (engine, schema, target) in enumerate(targets):
+        def report(copied, total, index=index, file=os.path.basename(target)):
+            check()
+            if progress and total:
+                progress((index + copied / total) / len(targets), f"{file}: {copied} of {total} pages")
+        files.append(backup_schema(engine, schema, target, step_pages, pause, report))
+
+    result = {"files": files}
+    if compress:
+        archive = os.path.join(directory, f"backup.{stamp}.tar.gz")
+        with tarfile.open(archive, "w:gz", compresslevel=6) as tar:
+            for file in files:
+                tar.add(file["path"], arcname=os.path.basename(file["path"]))
+        for file in files:
+            os.remove(file["path"])
+        result["archive"] = archive
+        result["archive_bytes"] = os.path.getsize(archive)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Take a consistent copy of the SQLite database while the API runs")
+    parser.add_argument("--output", default="./backups", help="directory to write the copies to")
+    parser.add_argument("--compress", action="store_true", help="write them as one .tar.gz")
+    parser.add_argument("--step-pages", type=int, default=DEFAULT_STEP_PAGES)
+    parser.add_argument("--pause-ms", type=float, default=0, help="wait between steps")
+    args = parser.parse_args()
+
+    from api.adapters.sqlite.db import DATABASE_URL, create_sqlite_engine, is_memory_database
+    from api.adapters.sqlite.shard import shard_urls
+    settings = get_settings()
+    if is_memory_database(DATABASE_URL):
+        raise SystemExit("Backups from the command line need a file-backed SQLite DATABASE_URL")
+    urls = shard_urls(DATABASE_URL, settings.sqlite_shards) if settings.sqlite_shards > 1 else [DATABASE_URL]
+    engines = [create_sqlite_engine(url) for url in urls]
+
+    def progress(fraction, message):
+        print(f"\r{fraction:6.1%} {message}", end="", file=sys.stderr, flush=True)
+
+    result = backup_databases(
+        {database_name(engine): engine for engine in engines},
+        args.output, args.compress, args.step_pages, args.pause_ms / 1000, progress
+    )
+    print(file=sys.stderr)
+    print(json.dumps(result))
+    for engine in engines:
+        engine.dispose()
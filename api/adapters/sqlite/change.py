@@ -0,0 +1,67 @@
+from typing import List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+from api.adapters.sqlite.task import TaskModel, ProjectModel, TombstoneModel
+
+TRACKED_MODELS = {TaskModel: "task", ProjectModel: "project"}
+
+NOW_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+
+def reserve_seqs(session: Session, count: int) -> int:
+    # shards keep their sequences at or above the wall clock in ms so they can be merged, see
+    # shard.py; the clock is read by the UPDATE itself, once it holds the write lock
+    floor = NOW_MS if session.info.get("time_ordered_seqs") else "0"
+    # the UPDATE takes SQLite's write lock, so seqs become visible in the order they were handed out
+    last = session.connection().execute(
+        text(f"UPDATE change_sequence SET value = max(value, {floor}) + :n WHERE id = 1 RETURNING value"),
+        {"n": count}
+    ).scalar()
+    if last is None:
+        last = session.connection().execute(
+            text(f"INSERT INTO change_sequence (id, value) VALUES (1, {floor} + :n) RETURNING value"), {"n": count}
+        ).scalar()
+    return last - count + 1
+
+
+@event.listens_for(Session, "before_flush")
+def stamp_changes(session, flush_context, instances):
+    changed = [
+        obj for obj in session.new | session.dirty
+        if type(obj) in TRACKED_MODELS and (obj in session.new or session.is_modified(obj))
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in TRACKED_MODELS]
+    if not changed and not deleted:
+        return
+
+    seq = reserve_seqs(session, len(changed) + len(deleted))
+    for obj in changed:
+        obj.seq = seq
+        seq += 1
+    for obj in deleted:
+        session.add(TombstoneModel(seq=seq, entity_type=TRACKED_MODELS[type(obj)], entity_id=obj.id))
+        seq += 1
+
+
+def load_changes(db: Session, model, since: int, limit: int,
+                 until: Optional[int] = None) -> Tuple[List[Tuple[int, object]], List[Tuple[int, UUID]]]:
+    changed_filter = [model.seq > since]
+    deleted_filter = [TombstoneModel.entity_type == TRACKED_MODELS[model], TombstoneModel.seq > since]
+    if until is not None:
+        changed_filter.append(model.seq <= until)
+        deleted_filter.append(TombstoneModel.seq <= until)
+    changed = db.execute(
+        select(model).where(*changed_filter).order_by(model.seq).limit(limit + 1)
+    ).scalars().all()
+    deleted = db.execute(
+        select(TombstoneModel.seq, TombstoneModel.entity_id)
+        .where(*deleted_filter)
+        .order_by(TombstoneModel.seq)
+        .limit(limit + 1)
+    ).all()
+    return (
+        [(obj.seq, obj.to_domain()) for obj in changed],
+        [(seq, UUID(entity_id)) for seq, entity_id in deleted],
+    )
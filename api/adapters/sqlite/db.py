@@ -1,17 +1,93 @@
-from sqlalchemy import create_engine
+import os
+import sqlite3
+from uuid import uuid4
+from typing import Optional
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from api.config import get_settings
+
 Base = declarative_base()
 
-DATABASE_URL = "sqlite:///./task-manager.db"
+settings = get_settings()
+
+DATABASE_URL = settings.database_url
+
+
+def is_memory_database(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url or "vfs=memdb" in url
+
+
+# connections that keep each named in-memory database alive while the pool turns over
+_memory_keepalive = []
+
+
+def memdb_url(url: str) -> str:
+    if url not in ("sqlite://", "sqlite:///:memory:"):
+        return url
+    # a named memdb database is shared by every connection in the process and locks like a
+    # file, so the pool can lend out several; each plain :memory: connection would be its own
+    name = f"file:/task-manager-{uuid4().hex}?vfs=memdb"
+    _memory_keepalive.append(sqlite3.connect(name, uri=True, check_same_thread=False))
+    return f"sqlite:///{name}&uri=true"
+
+
+def archive_path(url: str) -> Optional[str]:
+    if not settings.sqlite_archive or settings.sqlite_shards > 1 or is_memory_database(url):
+        return None
+    if settings.archive_path:
+        return settings.archive_path
+    # ./task-manager.db archives to ./task-manager.archive.db
+    root, _ = os.path.splitext(make_url(url).database)
+    return f"{root}.archive.db"
+
+
+ARCHIVE_PATH = archive_path(DATABASE_URL)
+
+
+def engine_options(url: str) -> dict:
+    options = {
+        "connect_args": {
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000,
+        },
+    }
+    if "mode=memory" in url:
+        # shared-cache databases lock whole tables against other connections, so share one
+        options["poolclass"] = StaticPool
+    else:
+        options["pool_size"] = settings.db_pool_size
+        options["max_overflow"] = settings.db_max_overflow
+    return options
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # only takes effect on a new database, and only before anything is written to it, WAL
+    # included; older files need one VACUUM, see api.adapters.sqlite.maintenance
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets readers in every worker process run alongside the single writer
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    if ARCHIVE_PATH:
+        # completed work moved out of the hot tables, see api.adapters.sqlite.archive
+        cursor.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_PATH,))
+        cursor.execute("PRAGMA archive.journal_mode=WAL")
+    cursor.close()
+
+
+def create_sqlite_engine(url: str):
+    url = memdb_url(url)
+    sqlite_engine = create_engine(url, **engine_options(url))
+    event.listen(sqlite_engine, "connect", configure_sqlite_connection)
+    return sqlite_engine
+
+
+engine = create_sqlite_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -23,4 +99,63 @@ def get_db():
         db.close()
 
 def create_tables():
+    from api.adapters.sqlite import task  # noqa: F401 - registers the models on Base
     Base.metadata.create_all(bind=engine)
+
+
+SCHEMA_VERSION = 4
+
+# statements that bring a database at version N-1 up to version N; they run after
+# create_all, so tables new in version N already exist
+MIGRATIONS = {
+    2: [
+        "ALTER TABLE tasks ADD COLUMN seq INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE projects ADD COLUMN seq INTEGER NOT NULL DEFAULT 0",
+        "UPDATE projects SET seq = rowid",
+        "UPDATE tasks SET seq = rowid + (SELECT coalesce(max(seq), 0) FROM projects)",
+        "INSERT INTO change_sequence (id, value) SELECT 1, max(seq) FROM "
+        "(SELECT seq FROM tasks UNION ALL SELECT seq FROM projects UNION ALL SELECT 0)",
+        "CREATE INDEX ix_tasks_seq ON tasks (seq)",
+        "CREATE INDEX ix_projects_seq ON projects (seq)",
+    ],
+    # the maintenance table only
+    3: [],
+    4: [
+        "CREATE INDEX IF NOT EXISTS ix_tasks_project_id_created_at ON tasks (project_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_completed_deadline ON tasks (completed, deadline, id)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_created_at ON tasks (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_updated_at ON tasks (updated_at, id)",
+    ],
+}
+
+
+def get_schema_version(connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def ensure_schema(target=None) -> bool:
+    target = target or engine
+    with target.connect() as connection:
+        if get_schema_version(connection) == SCHEMA_VERSION:
+            return False
+
+    from api.adapters.sqlite import task  # noqa: F401 - registers the models on Base
+
+    with target.connect() as connection:
+        # take the write lock first so concurrent starters migrate one at a time
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        version = get_schema_version(connection)
+        if version == SCHEMA_VERSION:
+            connection.rollback()
+            return False
+        if version == 0 and inspect(connection).has_table("tasks"):
+            # databases created before versioning have the version 1 schema
+            version = 1
+        Base.metadata.create_all(bind=connection)
+        if version > 0:
+            for target in range(version + 1, SCHEMA_VERSION + 1):
+                for statement in MIGRATIONS.get(target, []):
+                    connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        connection.commit()
+    return True
@@ -0,0 +1,226 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.engine import Engine
+
+from api.config import get_settings
+from api.adapters.sqlite.task import MaintenanceModel
+
+maintenance = MaintenanceModel.__table__
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+# rows ANALYZE samples per index, so a run stays cheap however large the tables get
+ANALYSIS_LIMIT = 1000
+
+
+def file_stats(engine: Engine) -> dict:
+    path = engine.url.database
+    with engine.connect() as connection:
+        pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()  # noqa: E731
+        page_size = pragma("page_size")
+        stats = {
+            "path": path,
+            "auto_vacuum": AUTO_VACUUM_MODES.get(pragma("auto_vacuum"), "unknown"),
+            "page_size": page_size,
+            "pages": pragma("page_count"),
+            "freelist_pages": pragma("freelist_count"),
+        }
+    stats["freelist_bytes"] = stats["freelist_pages"] * page_size
+    stats["file_bytes"] = os.path.getsize(path) if os.path.exists(path) else 0
+    stats["wal_bytes"] = os.path.getsize(f"{path}-wal") if os.path.exists(f"{path}-wal") else 0
+    return stats
+
+
+def claim_run(engine: Engine, interval: float) -> bool:
+    # every worker schedules maintenance; the first to find it due takes it
+    now = datetime.utcnow()
+    with engine.connect() as connection:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        connection.execute(insert(maintenance).prefix_with("OR IGNORE").values(id=1))
+        claimed = connection.execute(
+            update(maintenance)
+            .where(maintenance.c.id == 1)
+            .where(or_(maintenance.c.started_at.is_(None), maintenance.c.started_at < now - timedelta(seconds=interval)))
+            .values(started_at=now)
+        ).rowcount
+        connection.commit()
+    return claimed == 1
+
+
+def record_run(engine: Engine, result: dict) -> None:
+    with engine.connect() as connection:
+        connection.execute(insert(maintenance).prefix_with("OR REPLACE").values(
+            id=1,
+            started_at=datetime.fromisoformat(result["started_at"]),
+            finished_at=datetime.utcnow(),
+            result=json.dumps(result),
+        ))
+        connection.commit()
+
+
+def last_run(engine: Engine) -> Optional[dict]:
+    with engine.connect() as connection:
+        row = connection.execute(select(maintenance.c.result).where(maintenance.c.id == 1)).first()
+    return json.loads(row.result) if row and row.result else None
+
+
+def analyze(engine: Engine) -> str:
+    with engine.connect() as connection:
+        connection.exec_driver_sql(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+        analyzed = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).first()
+        # optimize only re-analyzes tables whose statistics have drifted, and none at all
+        # until there are some to drift from
+        statement = "PRAGMA optimize" if analyzed else "ANALYZE"
+        connection.exec_driver_sql(statement)
+        connection.commit()
+    return statement
+
+
+def checkpoint(engine: Engine) -> dict:
+    # PASSIVE copies what it can without waiting on readers or blocking writers
+    with engine.connect() as connection:
+        busy, wal_pages, checkpointed = connection.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").first()
+    return {"busy": bool(busy), "wal_pages": wal_pages, "checkpointed_pages": checkpointed}
+
+
+def incremental_vacuum(engine: Engine, pages_per_step: int, should_continue: Callable[[], bool]) -> dict:
+    freed = steps = 0
+    with engine.connect() as connection:
+        if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            return {"freed_pages": 0, "steps": 0, "skipped": "auto_vacuum is not incremental"}
+        dbapi_connection = connection.connection.dbapi_connection
+        while True:
+            before = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if before == 0 or not should_continue():
+                break
+            # the driver steps a statement without result rows only once, which frees one page;
+            # executescript runs it to completion, as its own short write transaction
+            dbapi_connection.executescript(f"PRAGMA incremental_vacuum({pages_per_step})")
+            freed += before - connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+            steps += 1
+    return {"freed_pages": freed, "steps": steps}
+
+
+def run_maintenance(engine: Engine, pages_per_step: int, should_continue: Callable[[], bool] = lambda: True) -> dict:
+    started = time.perf_counter()
+    result = {"started_at": datetime.utcnow().isoformat(), "before": file_stats(engine)}
+    result["analyze"] = analyze(engine)
+    result["vacuum"] = incremental_vacuum(engine, pages_per_step, should_continue)
+    # after the vacuum, so the pages it moved go back into the main file as well
+    result["checkpoint"] = checkpoint(engine)
+    result["after"] = file_stats(engine)
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+class Maintenance:
+    # runs maintenance on each database every interval, once load is low; several workers
+    # share a file, and claim_run lets only one of them do each run
+    def __init__(self, engines: Dict[str, Engine], interval: float, pages_per_step: int,
+                 idle_requests: int = 2, check_interval: float = 60):
+        self.engines = engines
+        self.interval = interval
+        self.pages_per_step = pages_per_step
+        self.idle_requests = idle_requests
+        self.check_interval = min(check_interval, interval) if interval > 0 else check_interval
+        # requests in flight in this worker; set by the app when it has a way to count them
+        self.load: Callable[[], int] = lambda: 0
+        self.runs = 0
+        self.deferred = 0
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def idle(self) -> bool:
+        return self.load() <= self.idle_requests
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._schedule, name="sqlite-maintenance", daemon=True)
+        self._thread.start()
+
+    def _schedule(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            for name, engine in self.engines.items():
+                if self._stop.is_set():
+                    return
+                if not self.idle():
+                    self.deferred += 1
+                    continue
+                try:
+                    if claim_run(engine, self.interval):
+                        self.run(name)
+                except Exception:
+                    logger.exception("SQLite maintenance of %s failed", name)
+
+    def run(self, name: str, should_continue: Optional[Callable[[], bool]] = None) -> dict:
+        engine = self.engines[name]
+        # the vacuum gives way as soon as requests pick up, or the worker shuts down
+        should_continue = should_continue or (lambda: self.idle() and not self._stop.is_set())
+        with self._run_lock:
+            result = run_maintenance(engine, self.pages_per_step, should_continue)
+            record_run(engine, result)
+            self.runs += 1
+        logger.info("SQLite maintenance of %s took %sms", name, result["duration_ms"])
+        return result
+
+    def run_all(self) -> dict:
+        return {name: self.run(name, should_continue=lambda: True) for name in self.engines}
+
+    def status(self) -> dict:
+        return {
+            name: {**file_stats(engine), "last_run": last_run(engine)}
+            for name, engine in self.engines.items()
+        }
+
+    def stats(self) -> dict:
+        return {"interval_s": self.interval, "runs": self.runs, "deferred_busy": self.deferred}
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run SQLite maintenance on the configured database")
+    parser.add_argument(
+        "--convert", action="store_true",
+        help="switch a database created without incremental auto-vacuum over, with one full VACUUM "
+             "that holds the write lock until it is done"
+    )
+    args = parser.parse_args()
+
+    from api.adapters.sqlite.db import DATABASE_URL, create_sqlite_engine, ensure_schema, is_memory_database
+    from api.adapters.sqlite.shard import shard_urls
+    settings = get_settings()
+    if is_memory_database(DATABASE_URL):
+        raise SystemExit("Maintenance needs a file-backed SQLite DATABASE_URL")
+    urls = shard_urls(DATABASE_URL, settings.sqlite_shards) if settings.sqlite_shards > 1 else [DATABASE_URL]
+    for url in urls:
+        engine = create_sqlite_engine(url)
+        ensure_schema(engine)
+        if args.convert:
+            with engine.connect() as connection:
+                connection.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+                connection.connection.dbapi_connection.executescript("VACUUM")
+        result = run_maintenance(engine, settings.sqlite_maintenance_vacuum_pages)
+        record_run(engine, result)
+        print(json.dumps(result))
+        engine.dispose()
@@ -1,125 +1,241 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Collection, List, Optional, TypeVar
 from uuid import UUID
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from api.core.domain.task import Task, Project
-from api.core.port.task import TaskRepository
+from api.core.domain.task import Task, Project, ChangeSet
+from api.core.port.task import TaskRepository, TaskQuery, TaskPage
 from api.core.port.project import ProjectRepository
 from api.core.port.event import EventPublisher
+from api.core.port.transaction import UnitOfWork
+from api.adapters.memory.event import InMemoryEventPublisher, PendingEvents  # noqa: F401 - re-exported
 from api.adapters.sqlite.task import TaskModel, ProjectModel
+from api.adapters.sqlite.change import load_changes
+from api.adapters.sqlite.writer import GroupCommitWriter
+from api.adapters.sqlite.db import ARCHIVE_PATH
+from api.adapters.sqlite.archive import (
+    archived_tasks, archived_projects, ARCHIVED_TASK_FIELDS, ARCHIVED_PROJECT_FIELDS, restore_task
+)
+from api.adapters.task_query import task_query_statement, chunked
+from api.adapters.transaction import run_in_connection
+from api.adapters.sqlite.reads import (
+    tasks, task_fields, TASK_BY_ID, TASKS_BY_IDS, ALL_TASKS, TASKS_BY_PROJECT, COMPLETED_TASKS, OVERDUE_TASKS,
+    PROJECT_BY_ID, PROJECTS_BY_IDS, ALL_PROJECTS, COMPLETED_PROJECTS, task_from_row, project_from_row
+)
+
+T = TypeVar("T")
+
+
+def _save_task(db: Session, task: Task) -> Task:
+    task_model = db.query(TaskModel).filter(TaskModel.id == str(task.id)).first()
+
+    if task_model:
+        task_model.title = task.title
+        task_model.description = task.description
+        task_model.deadline = task.deadline
+        task_model.completed = task.is_completed()
+        task_model.project_id = str(task.project_id) if task.project_id else None
+        task_model.updated_at = datetime.utcnow()
+    else:
+        task_model = TaskModel.from_domain(task)
+        db.add(task_model)
+
+    db.flush()
+    db.refresh(task_model)
+    return task_model.to_domain()
+
+
+def _cap_deadlines(db: Session, project_id: UUID, deadline: datetime) -> List[Task]:
+    capped = [
+        task_model for task_model in db.query(TaskModel).filter(TaskModel.project_id == str(project_id))
+        if task_model.deadline and task_model.deadline > deadline
+    ]
+    for task_model in capped:
+        task_model.deadline = deadline
+        task_model.updated_at = datetime.utcnow()
+    db.flush()
+    return [task_model.to_domain() for task_model in capped]
+
+
+def _delete_task(db: Session, task_id: UUID) -> bool:
+    task_model = db.query(TaskModel).filter(TaskModel.id == str(task_id)).first()
+    if task_model:
+        db.delete(task_model)
+        db.flush()
+        return True
+    return False
+
+
+def _save_project(db: Session, project: Project) -> Project:
+    project_model = db.query(ProjectModel).filter(ProjectModel.id == str(project.id)).first()
+
+    if project_model:
+        project_model.title = project.title
+        project_model.deadline = project.deadline
+        project_model.completed = project.is_completed()
+        project_model.updated_at = datetime.utcnow()
+    else:
+        project_model = ProjectModel.from_domain(project)
+        db.add(project_model)
+
+    db.flush()
+    db.refresh(project_model)
+    return project_model.to_domain()
+
+
+def _delete_project(db: Session, project_id: UUID) -> bool:
+    project_model = db.query(ProjectModel).filter(ProjectModel.id == str(project_id)).first()
+    if project_model:
+        # unlinked before the delete: the flush would null project_id only after the changes
+        # were stamped, and the change feed would never see the tasks leave the project
+        for task_model in project_model.tasks:
+            task_model.project_id = None
+        db.delete(project_model)
+        db.flush()
+        return True
+    return False
+
+
+class SQLiteRepository:
+    def __init__(self, db_session: Session, writer: Optional[GroupCommitWriter] = None):
+        self.db = db_session
+        self.writer = writer
 
+    def _write(self, operation: Callable[[Session], T]) -> T:
+        if self.writer is None:
+            result = operation(self.db)
+            self.db.commit()
+            return result
+        result = self.writer.submit(operation)
+        # the writer committed on its own connection, so drop anything this session cached
+        self.db.expire_all()
+        return result
 
-class SQLiteTaskRepository(TaskRepository):
-    def __init__(self, db_session: Session):
-        self.db = db_session
 
+class SQLiteTaskRepository(SQLiteRepository, TaskRepository):
     def save(self, task: Task) -> Task:
-        task_model = self.db.query(TaskModel).filter(TaskModel.id == str(task.id)).first()
-        
-        if task_model:
-          
-            task_model.title = task.title
-            task_model.description = task.description
-            task_model.deadline = task.deadline
-            task_model.completed = task.is_completed()
-            task_model.project_id = str(task.project_id) if task.project_id else None
-            task_model.updated_at = datetime.utcnow()
-        else:
-          
-            task_model = TaskModel.from_domain(task)
-            self.db.add(task_model)
-        
-        self.db.commit()
-        self.db.refresh(task_model)
-        return task_model.to_domain()
+        return self._write(lambda db: _save_task(db, task))
 
     def get_by_id(self, task_id: UUID) -> Optional[Task]:
-        task_model = self.db.query(TaskModel).filter(TaskModel.id == str(task_id)).first()
-        return task_model.to_domain() if task_model else None
+        row = self.db.execute(TASK_BY_ID, {"id": str(task_id)}).first()
+        return task_from_row(row) if row else None
+
+    def get_many(self, task_ids: Collection[UUID]) -> List[Task]:
+        return [
+            task_from_row(row) for ids in chunked(task_ids)
+            for row in self.db.execute(TASKS_BY_IDS, {"ids": [str(task_id) for task_id in ids]})
+        ]
 
     def get_all(self) -> List[Task]:
-        task_models = self.db.query(TaskModel).all()
-        return [task.to_domain() for task in task_models]
+        return [task_from_row(row) for row in self.db.execute(ALL_TASKS)]
 
     def get_by_project_id(self, project_id: UUID) -> List[Task]:
-        task_models = self.db.query(TaskModel).filter(TaskModel.project_id == str(project_id)).all()
-        return [task.to_domain() for task in task_models]
+        return [task_from_row(row) for row in self.db.execute(TASKS_BY_PROJECT, {"project_id": str(project_id)})]
 
     def get_completed(self) -> List[Task]:
-        task_models = self.db.query(TaskModel).filter(TaskModel.completed == True).all()
-        return [task.to_domain() for task in task_models]
+        return [task_from_row(row) for row in self.db.execute(COMPLETED_TASKS)]
 
     def get_overdue(self) -> List[Task]:
-        now = datetime.utcnow()
-        task_models = self.db.query(TaskModel).filter(
-            TaskModel.deadline < now,
-            TaskModel.completed == False
-        ).all()
-        return [task.to_domain() for task in task_models]
+        return [task_from_row(row) for row in self.db.execute(OVERDUE_TASKS, {"now": datetime.utcnow()})]
+
+    def find(self, query: TaskQuery) -> TaskPage:
+        rows = self.db.execute(task_query_statement(tasks, task_fields(query.columns()), query, str))
+        return query.page([task_from_row(row) for row in rows])
 
     def delete(self, task_id: UUID) -> bool:
-        task_model = self.db.query(TaskModel).filter(TaskModel.id == str(task_id)).first()
-        if task_model:
-            self.db.delete(task_model)
-            self.db.commit()
-            return True
-        return False
+        return self._write(lambda db: _delete_task(db, task_id))
 
+    def cap_deadlines(self, project_id: UUID, deadline: datetime) -> List[Task]:
+        # read and written in one go on the writer, so no save from a stale read lands in between
+        return self._write(lambda db: _cap_deadlines(db, project_id, deadline))
 
-class SQLiteProjectRepository(ProjectRepository):
-    def __init__(self, db_session: Session):
-        self.db = db_session
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Task]:
+        changed, deleted = load_changes(self.db, TaskModel, since, limit)
+        return ChangeSet.merge(changed, deleted, since, limit)
 
-    def save(self, project: Project) -> Project:
-        project_model = self.db.query(ProjectModel).filter(ProjectModel.id == str(project.id)).first()
-        
-        if project_model:
-          
-            project_model.title = project.title
-            project_model.deadline = project.deadline
-            project_model.completed = project.is_completed()
-            project_model.updated_at = datetime.utcnow()
-        else:
-          
-            project_model = ProjectModel.from_domain(project)
-            self.db.add(project_model)
-        
-        self.db.commit()
-        self.db.refresh(project_model)
-        return project_model.to_domain()
+    def get_archived(self, project_id: Optional[UUID] = None) -> List[Task]:
+        if not ARCHIVE_PATH:
+            return []
+        statement = select(*ARCHIVED_TASK_FIELDS)
+        if project_id:
+            statement = statement.where(archived_tasks.c.project_id == str(project_id))
+        return [task_from_row(row) for row in self.db.execute(statement)]
 
-    def get_by_id(self, project_id: UUID) -> Optional[Project]:
-        project_model = self.db.query(ProjectModel).filter(ProjectModel.id == str(project_id)).first()
-        return project_model.to_domain() if project_model else None
+    def get_archived_by_id(self, task_id: UUID) -> Optional[Task]:
+        if not ARCHIVE_PATH:
+            return None
+        row = self.db.execute(select(*ARCHIVED_TASK_FIELDS).where(archived_tasks.c.id == str(task_id))).first()
+        return task_from_row(row) if row else None
 
-    def get_all(self) -> List[Project]:
-        project_models = self.db.query(ProjectModel).all()
-        return [project.to_domain() for project in project_models]
+    def restore(self, task_id: UUID) -> Optional[Task]:
+        if not ARCHIVE_PATH:
+            return None
+        return self._write(lambda db: restore_task(db, task_id))
 
-    def get_completed(self) -> List[Project]:
-        project_models = self.db.query(ProjectModel).filter(ProjectModel.completed == True).all()
-        return [project.to_domain() for project in project_models]
 
-    def delete(self, project_id: UUID) -> bool:
-        project_model = self.db.query(ProjectModel).filter(ProjectModel.id == str(project_id)).first()
-        if project_model:
-            self.db.delete(project_model)
-            self.db.commit()
-            return True
-        return False
+class SQLiteProjectRepository(SQLiteRepository, ProjectRepository):
+    def save(self, project: Project) -> Project:
+        return self._write(lambda db: _save_project(db, project))
 
+    def get_by_id(self, project_id: UUID) -> Optional[Project]:
+        row = self.db.execute(PROJECT_BY_ID, {"id": str(project_id)}).first()
+        return project_from_row(row) if row else None
 
-class InMemoryEventPublisher(EventPublisher):
-    def __init__(self):
-        self.events = []
+    def get_many(self, project_ids: Collection[UUID]) -> List[Project]:
+        return [
+            project_from_row(row) for ids in chunked(project_ids)
+            for row in self.db.execute(PROJECTS_BY_IDS, {"ids": [str(project_id) for project_id in ids]})
+        ]
 
-    def publish(self, event) -> None:
-        self.events.append(event)
-        print(f"Event published: {type(event).__name__}")
+    def get_all(self) -> List[Project]:
+        return [project_from_row(row) for row in self.db.execute(ALL_PROJECTS)]
 
-    def get_events(self):
-        return self.events.copy()
+    def get_completed(self) -> List[Project]:
+        return [project_from_row(row) for row in self.db.execute(COMPLETED_PROJECTS)]
 
-    def clear_events(self):
-        self.events.clear()
+    def delete(self, project_id: UUID) -> bool:
+        return self._write(lambda db: _delete_project(db, project_id))
+
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Project]:
+        changed, deleted = load_changes(self.db, ProjectModel, since, limit)
+        return ChangeSet.merge(changed, deleted, since, limit)
+
+    def get_archived(self) -> List[Project]:
+        if not ARCHIVE_PATH:
+            return []
+        return [project_from_row(row) for row in self.db.execute(select(*ARCHIVED_PROJECT_FIELDS))]
+
+    def get_archived_by_id(self, project_id: UUID) -> Optional[Project]:
+        if not ARCHIVE_PATH:
+            return None
+        row = self.db.execute(select(*ARCHIVED_PROJECT_FIELDS).where(archived_projects.c.id == str(project_id))).first()
+        return project_from_row(row) if row else None
+
+
+def run_in_transaction(writer: Optional[GroupCommitWriter], publisher: EventPublisher,
+                       db: Session, work: Callable[[UnitOfWork], T]) -> T:
+    events = PendingEvents(publisher)
+
+    def repositories(session: Session):
+        return SQLiteTaskRepository(session), SQLiteProjectRepository(session), events
+
+    if writer is not None:
+        # the whole unit is one operation in one group commit
+        result = writer.submit(
+            lambda session: run_in_connection(session.connection(), repositories, work, session.info)
+        )
+        db.expire_all()
+    else:
+        with db.get_bind().connect() as connection:
+            # the driver begins only before a write, which would leave the savepoints outside
+            # any transaction
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                result = run_in_connection(connection, repositories, work)
+            except Exception:
+                connection.rollback()
+                raise
+            connection.commit()
+    events.flush()
+    return result
@@ -0,0 +1,70 @@
+from typing import Collection, List, Optional
+from uuid import UUID
+
+from sqlalchemy import bindparam, false, null, select, true
+
+from api.core.domain.task import Task, TaskStatus, Project, ProjectStatus
+from api.adapters.sqlite.task import TaskModel, ProjectModel
+
+# the read path skips the ORM: these statements are built once, so every call hits the
+# compiled cache, and rows are mapped straight to domain objects without identity-map work
+
+tasks = TaskModel.__table__
+projects = ProjectModel.__table__
+
+TASK_FIELDS = [
+    tasks.c.id, tasks.c.title, tasks.c.description, tasks.c.deadline,
+    tasks.c.completed, tasks.c.project_id, tasks.c.created_at, tasks.c.updated_at,
+]
+PROJECT_FIELDS = [
+    projects.c.id, projects.c.title, projects.c.deadline,
+    projects.c.completed, projects.c.created_at, projects.c.updated_at,
+]
+
+TASK_BY_ID = select(*TASK_FIELDS).where(tasks.c.id == bindparam("id"))
+ALL_TASKS = select(*TASK_FIELDS)
+TASKS_BY_PROJECT = select(*TASK_FIELDS).where(tasks.c.project_id == bindparam("project_id"))
+TASKS_BY_IDS = select(*TASK_FIELDS).where(tasks.c.id.in_(bindparam("ids", expanding=True)))
+COMPLETED_TASKS = select(*TASK_FIELDS).where(tasks.c.completed == true())
+OVERDUE_TASKS = select(*TASK_FIELDS).where(tasks.c.deadline < bindparam("now"), tasks.c.completed == false())
+
+PROJECT_BY_ID = select(*PROJECT_FIELDS).where(projects.c.id == bindparam("id"))
+ALL_PROJECTS = select(*PROJECT_FIELDS)
+PROJECTS_BY_IDS = select(*PROJECT_FIELDS).where(projects.c.id.in_(bindparam("ids", expanding=True)))
+COMPLETED_PROJECTS = select(*PROJECT_FIELDS).where(projects.c.completed == true())
+
+
+def task_fields(names: Optional[Collection[str]]) -> List:
+    # TASK_FIELDS with the columns not named selected as NULL, so a large description is
+    # never decoded or copied out of SQLite, and rows still unpack by position
+    if names is None:
+        return TASK_FIELDS
+    return [column if column.name in names else null().label(column.name) for column in TASK_FIELDS]
+
+
+# rows must be selected with TASK_FIELDS / PROJECT_FIELDS; unpacking by position is many
+# times cheaper than looking columns up by name on the Row
+def task_from_row(row) -> Task:
+    id, title, description, deadline, completed, project_id, created_at, updated_at = row
+    return Task(
+        id=UUID(id),
+        title=title,
+        description=description,
+        deadline=deadline,
+        status=TaskStatus.COMPLETED if completed else TaskStatus.OPEN,
+        project_id=UUID(project_id) if project_id else None,
+        created_at=created_at,
+        updated_at=updated_at
+    )
+
+
+def project_from_row(row) -> Project:
+    id, title, deadline, completed, created_at, updated_at = row
+    return Project(
+        id=UUID(id),
+        title=title,
+        deadline=deadline,
+        status=ProjectStatus.COMPLETED if completed else ProjectStatus.OPEN,
+        created_at=created_at,
+        updated_at=updated_at
+    )
@@ -0,0 +1,373 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Collection, Dict, List, Optional, Set, Tuple, TypeVar
+from uuid import UUID
+
+from sqlalchemy import delete, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from api.core.domain.task import Task, Project, ChangeSet
+from api.core.domain.analytics import Bucket, CompletionPoint
+from api.core.port.task import TaskRepository, TaskQuery, TaskPage
+from api.core.port.project import ProjectRepository
+from api.core.port.analytics import AnalyticsRepository
+from api.adapters.cache import VersionedCache
+from api.adapters.invalidation import Invalidation
+from api.adapters.sqlite.db import create_sqlite_engine, ensure_schema
+from api.adapters.sqlite.task import TaskModel, ProjectModel
+from api.adapters.sqlite.change import load_changes
+from api.adapters.sqlite.writer import GroupCommitWriter
+from api.adapters.sqlite.project import SQLiteTaskRepository, SQLiteProjectRepository
+from api.adapters.sqlite.analytics import SQLiteAnalyticsRepository
+
+T = TypeVar("T")
+
+# a shard's seqs are reserved at or above the wall clock in ms; a write is assumed to commit
+# within this long of reserving, which is also how long the change feed can lag behind writes
+SEQ_COMMIT_WINDOW_MS = 2_000
+
+# task id -> shard index, so point lookups skip the scatter
+LOCATION_CACHE_SIZE = 100_000
+
+
+def shard_urls(url: str, count: int) -> List[str]:
+    # sqlite:///./task-manager.db shards to ./task-manager.shard0.db ... shard{count-1}.db
+    parsed = make_url(url)
+    root, extension = os.path.splitext(parsed.database)
+    return [
+        parsed.set(database=f"{root}.shard{index}{extension or '.db'}").render_as_string(hide_password=False)
+        for index in range(count)
+    ]
+
+
+class Shard:
+    def __init__(self, index: int, url: str, group_commit: bool, max_batch: int, max_delay: float):
+        self.index = index
+        self.engine = create_sqlite_engine(url)
+        info = {"time_ordered_seqs": True}
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine, info=info)
+        self.writer = GroupCommitWriter(url, max_batch, max_delay, session_info=info) if group_commit else None
+        self.analytics_cache = VersionedCache()
+
+
+class ShardSet:
+    def __init__(self, url: str, count: int, group_commit: bool = True, max_batch: int = 64, max_delay: float = 0):
+        self.count = count
+        self.shards = [
+            Shard(index, shard_url, group_commit, max_batch, max_delay)
+            for index, shard_url in enumerate(shard_urls(url, count))
+        ]
+        self.pool = ThreadPoolExecutor(max_workers=count, thread_name_prefix="shard")
+        self._locations: "OrderedDict[UUID, int]" = OrderedDict()
+        self._locations_lock = threading.Lock()
+
+    def shard_for(self, key: UUID) -> int:
+        return key.int % self.count
+
+    def shard_for_task(self, task: Task) -> int:
+        # tasks live with their project so project scans stay on one shard
+        return self.shard_for(task.project_id or task.id)
+
+    def ensure_schema(self) -> bool:
+        return any([ensure_schema(shard.engine) for shard in self.shards])
+
+    def remember(self, task_id: UUID, index: int) -> None:
+        with self._locations_lock:
+            self._locations[task_id] = index
+            self._locations.move_to_end(task_id)
+            if len(self._locations) > LOCATION_CACHE_SIZE:
+                self._locations.popitem(last=False)
+
+    def forget(self, task_id: UUID) -> None:
+        with self._locations_lock:
+            self._locations.pop(task_id, None)
+
+    def invalidate(self, invalidations: Optional[Set[Invalidation]]) -> None:
+        # another worker may have moved or deleted these tasks
+        with self._locations_lock:
+            if invalidations is None:
+                self._locations.clear()
+                return
+            for entity, entity_id in invalidations:
+                self._locations.pop(entity_id, None)
+
+    def location(self, task_id: UUID) -> Optional[int]:
+        with self._locations_lock:
+            return self._locations.get(task_id)
+
+    def to_global(self, index: int, seq: int) -> int:
+        return seq * self.count + index
+
+    def to_local(self, index: int, since: int) -> int:
+        # largest local seq whose global seq is <= since
+        return (since - index) // self.count
+
+    def watermark(self, sessions: "ShardSessions") -> int:
+        # no write still in flight on shard i can be stamped at or below its bound, so every
+        # change at or below the smallest bound is final and can be handed out
+        floor = int(time.time() * 1000) - SEQ_COMMIT_WINDOW_MS
+        bounds = []
+        for index in range(self.count):
+            value = sessions.run(index, lambda db: db.execute(
+                text("SELECT value FROM change_sequence WHERE id = 1")
+            ).scalar()) or 0
+            bounds.append(self.to_global(index, max(value, floor)))
+        return min(bounds)
+
+    def stats(self) -> dict:
+        return {str(shard.index): shard.writer.stats() for shard in self.shards if shard.writer}
+
+    def close(self) -> None:
+        self.pool.shutdown()
+        for shard in self.shards:
+            if shard.writer:
+                shard.writer.close()
+            shard.engine.dispose()
+
+
+class ShardSessions:
+    def __init__(self, shard_set: ShardSet):
+        self.shard_set = shard_set
+        self._sessions: Dict[int, Session] = {}
+        self._lock = threading.Lock()
+
+    def get(self, index: int) -> Session:
+        with self._lock:
+            if index not in self._sessions:
+                self._sessions[index] = self.shard_set.shards[index].session_factory()
+            return self._sessions[index]
+
+    def run(self, index: int, operation: Callable[[Session], T]) -> T:
+        try:
+            return operation(self.get(index))
+        finally:
+            # hand the connection back after every call, so a request never holds one shard's
+            # connection while it waits for another's
+            self.get(index).close()
+
+    def close(self) -> None:
+        for session in self._sessions.values():
+            session.close()
+
+
+def _scatter(shard_set: ShardSet, call: Callable[[int], T]) -> List[T]:
+    # each shard has its own session, so shards can be queried in parallel
+    return list(shard_set.pool.map(call, range(shard_set.count)))
+
+
+def _merge_changes(shard_set: ShardSet, sessions: ShardSessions, model, since: int, limit: int) -> Tuple[list, list]:
+    until = shard_set.watermark(sessions)
+    changed, deleted = [], []
+    for index in range(shard_set.count):
+        shard_changed, shard_deleted = sessions.run(index, lambda db: load_changes(
+            db, model, shard_set.to_local(index, since), limit, shard_set.to_local(index, until)
+        ))
+        changed.extend((shard_set.to_global(index, seq), item) for seq, item in shard_changed)
+        deleted.extend((shard_set.to_global(index, seq), item) for seq, item in shard_deleted)
+    changed.sort(key=lambda entry: entry[0])
+    deleted.sort(key=lambda entry: entry[0])
+    return changed, deleted
+
+
+def _discard_task(db: Session, task_id: UUID) -> None:
+    # the task moved to another shard; dropping the old row is not a deletion, so no tombstone
+    db.execute(delete(TaskModel.__table__).where(TaskModel.__table__.c.id == str(task_id)))
+
+
+class ShardedTaskRepository(TaskRepository):
+    def __init__(self, shard_set: ShardSet, sessions: ShardSessions):
+        self.shard_set = shard_set
+        self.sessions = sessions
+
+    def _on(self, index: int, call: Callable[[SQLiteTaskRepository], T]) -> T:
+        writer = self.shard_set.shards[index].writer
+        return self.sessions.run(index, lambda db: call(SQLiteTaskRepository(db, writer)))
+
+    def _locate(self, task_id: UUID, likely: Optional[int] = None) -> Tuple[Optional[int], Optional[Task]]:
+        cached = self.shard_set.location(task_id)
+        if cached is None:
+            cached = likely
+        if cached is not None:
+            task = self._on(cached, lambda shard: shard.get_by_id(task_id))
+            if task:
+                return cached, task
+
+        found = [
+            (index, task) for index, task in enumerate(
+                _scatter(self.shard_set, lambda i: self._on(i, lambda shard: shard.get_by_id(task_id)))
+            )
+            if task
+        ]
+        if not found:
+            self.shard_set.forget(task_id)
+            return None, None
+        # a move interrupted between writing the new row and dropping the old one leaves two
+        # copies; the one on the shard its project routes to is current
+        index, task = next(
+            ((index, task) for index, task in found if self.shard_set.shard_for_task(task) == index), found[0]
+        )
+        self.shard_set.remember(task_id, index)
+        return index, task
+
+    def save(self, task: Task) -> Task:
+        target = self.shard_set.shard_for_task(task)
+        current, _ = self._locate(task.id, likely=target)
+        saved = self._on(target, lambda shard: shard.save(task))
+        if current is not None and current != target:
+            self._on(current, lambda shard: shard._write(lambda db: _discard_task(db, task.id)))
+        self.shard_set.remember(task.id, target)
+        return saved
+
+    def get_by_id(self, task_id: UUID) -> Optional[Task]:
+        return self._locate(task_id)[1]
+
+    def get_many(self, task_ids: Collection[UUID]) -> List[Task]:
+        # one query per shard the location cache points to; ids it does not know, or that
+        # were not where it said, go to every shard
+        by_shard: Dict[int, List[UUID]] = {}
+        unknown = []
+        for task_id in set(task_ids):
+            index = self.shard_set.location(task_id)
+            if index is None:
+                unknown.append(task_id)
+            else:
+                by_shard.setdefault(index, []).append(task_id)
+        found = {}
+        for index, ids in by_shard.items():
+            for task in self._on(index, lambda shard: shard.get_many(ids)):
+                found[task.id] = task
+        unknown += [task_id for ids in by_shard.values() for task_id in ids if task_id not in found]
+        if unknown:
+            pages = _scatter(self.shard_set, lambda i: self._on(i, lambda shard: shard.get_many(unknown)))
+            for index, shard_tasks in enumerate(pages):
+                for task in shard_tasks:
+                    # as in _locate, of two copies the one on its project's shard is current
+                    if task.id not in found or self.shard_set.shard_for_task(task) == index:
+                        found[task.id] = task
+                        self.shard_set.remember(task.id, index)
+        return list(found.values())
+
+    def get_all(self) -> List[Task]:
+        return self._gather(lambda shard: shard.get_all())
+
+    def get_by_project_id(self, project_id: UUID) -> List[Task]:
+        return self._on(self.shard_set.shard_for(project_id), lambda shard: shard.get_by_project_id(project_id))
+
+    def get_completed(self) -> List[Task]:
+        return self._gather(lambda shard: shard.get_completed())
+
+    def cap_deadlines(self, project_id: UUID, deadline: datetime) -> List[Task]:
+        return self._on(self.shard_set.shard_for(project_id), lambda shard: shard.cap_deadlines(project_id, deadline))
+
+    def find(self, query: TaskQuery) -> TaskPage:
+        if query.project_id:
+            return self._on(self.shard_set.shard_for(query.project_id), lambda shard: shard.find(query))
+        # each shard's page holds its first limit matches, so the first limit of them all are
+        # among them; a shard with more left means there is a next page, whatever the merge says
+        pages = _scatter(self.shard_set, lambda i: self._on(i, lambda shard: shard.find(query)))
+        merged = query.apply(self._dedupe(enumerate(page.items for page in pages)))
+        if merged.next is None and merged.items and any(page.next for page in pages):
+            merged.next = query.position(merged.items[-1])
+        return merged
+
+    def get_overdue(self) -> List[Task]:
+        return self._gather(lambda shard: shard.get_overdue())
+
+    def delete(self, task_id: UUID) -> bool:
+        index, _ = self._locate(task_id)
+        if index is None:
+            return False
+        self.shard_set.forget(task_id)
+        return self._on(index, lambda shard: shard.delete(task_id))
+
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Task]:
+        changed, deleted = _merge_changes(self.shard_set, self.sessions, TaskModel, since, limit)
+        return ChangeSet.merge(changed, deleted, since, limit)
+
+    def _gather(self, call: Callable[[SQLiteTaskRepository], List[Task]]) -> List[Task]:
+        return self._dedupe(enumerate(_scatter(self.shard_set, lambda i: self._on(i, call))))
+
+    def _dedupe(self, shard_results) -> List[Task]:
+        tasks = {}
+        for index, shard_tasks in shard_results:
+            for task in shard_tasks:
+                if task.id not in tasks or self.shard_set.shard_for_task(task) == index:
+                    tasks[task.id] = task
+        return list(tasks.values())
+
+
+class ShardedProjectRepository(ProjectRepository):
+    def __init__(self, shard_set: ShardSet, sessions: ShardSessions):
+        self.shard_set = shard_set
+        self.sessions = sessions
+
+    def _on(self, index: int, call: Callable[[SQLiteProjectRepository], T]) -> T:
+        writer = self.shard_set.shards[index].writer
+        return self.sessions.run(index, lambda db: call(SQLiteProjectRepository(db, writer)))
+
+    def _on_owner(self, project_id: UUID, call: Callable[[SQLiteProjectRepository], T]) -> T:
+        return self._on(self.shard_set.shard_for(project_id), call)
+
+    def save(self, project: Project) -> Project:
+        return self._on_owner(project.id, lambda shard: shard.save(project))
+
+    def get_by_id(self, project_id: UUID) -> Optional[Project]:
+        return self._on_owner(project_id, lambda shard: shard.get_by_id(project_id))
+
+    def get_many(self, project_ids: Collection[UUID]) -> List[Project]:
+        by_shard: Dict[int, List[UUID]] = {}
+        for project_id in set(project_ids):
+            by_shard.setdefault(self.shard_set.shard_for(project_id), []).append(project_id)
+        return [
+            project for index, ids in by_shard.items()
+            for project in self._on(index, lambda shard: shard.get_many(ids))
+        ]
+
+    def get_all(self) -> List[Project]:
+        return self._gather(lambda shard: shard.get_all())
+
+    def get_completed(self) -> List[Project]:
+        return self._gather(lambda shard: shard.get_completed())
+
+    def delete(self, project_id: UUID) -> bool:
+        return self._on_owner(project_id, lambda shard: shard.delete(project_id))
+
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Project]:
+        changed, deleted = _merge_changes(self.shard_set, self.sessions, ProjectModel, since, limit)
+        return ChangeSet.merge(changed, deleted, since, limit)
+
+    def _gather(self, call: Callable[[SQLiteProjectRepository], List[Project]]) -> List[Project]:
+        return [
+            project for projects in _scatter(self.shard_set, lambda i: self._on(i, call))
+            for project in projects
+        ]
+
+
+class ShardedAnalyticsRepository(AnalyticsRepository):
+    def __init__(self, shard_set: ShardSet, sessions: ShardSessions):
+        self.shard_set = shard_set
+        self.sessions = sessions
+
+    def completion_series(self, bucket: Bucket, project_id: Optional[UUID] = None) -> List[CompletionPoint]:
+        indexes = [self.shard_set.shard_for(project_id)] if project_id else range(self.shard_set.count)
+        created, completed = {}, {}
+        for index in indexes:
+            cache = self.shard_set.shards[index].analytics_cache
+            shard_series = self.sessions.run(
+                index, lambda db: SQLiteAnalyticsRepository(db, cache).completion_series(bucket, project_id)
+            )
+            for point in shard_series:
+                created[point.period_start] = created.get(point.period_start, 0) + point.created
+                completed[point.period_start] = completed.get(point.period_start, 0) + point.completed
+
+        series = []
+        remaining = 0
+        for period in sorted(created):
+            remaining += created[period] - completed[period]
+            series.append(CompletionPoint(period, created[period], completed[period], remaining))
+        return series
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Text, Integer, Index
 from sqlalchemy.dialects.sqlite import CHAR
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -20,10 +20,19 @@ class TaskModel(Base):
     project_id = Column(CHAR(36), ForeignKey("projects.id"), nullable=True)
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    seq = Column(Integer, default=0, nullable=False, index=True)
 
   
     project = relationship("ProjectModel", back_populates="tasks")
 
+    # what TaskQuery filters and sorts on, see api.adapters.task_query
+    __table_args__ = (
+        Index("ix_tasks_project_id_created_at", "project_id", "created_at", "id"),
+        Index("ix_tasks_completed_deadline", "completed", "deadline", "id"),
+        Index("ix_tasks_created_at", "created_at", "id"),
+        Index("ix_tasks_updated_at", "updated_at", "id"),
+    )
+
     def to_domain(self) -> 'Task':
         from api.core.domain.task import Task, TaskStatus
         return Task(
@@ -60,6 +69,7 @@ class ProjectModel(Base):
     completed = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    seq = Column(Integer, default=0, nullable=False, index=True)
 
   
     tasks = relationship("TaskModel", back_populates="project")
@@ -85,3 +95,31 @@ class ProjectModel(Base):
             created_at=project.created_at,
             updated_at=project.updated_at
         )
+
+
+class TombstoneModel(Base):
+    __tablename__ = "tombstones"
+
+    seq = Column(Integer, primary_key=True)
+    entity_type = Column(String(16), nullable=False)
+    entity_id = Column(CHAR(36), nullable=False)
+
+    __table_args__ = (
+        Index("ix_tombstones_entity_type_seq", "entity_type", "seq"),
+    )
+
+
+class ChangeSequenceModel(Base):
+    __tablename__ = "change_sequence"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False)
+
+
+class MaintenanceModel(Base):
+    __tablename__ = "maintenance"
+
+    id = Column(Integer, primary_key=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    result = Column(Text, nullable=True)
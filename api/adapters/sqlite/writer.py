@@ -0,0 +1,134 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from api.adapters.sqlite.db import configure_sqlite_connection, engine_options
+
+T = TypeVar("T")
+
+Operation = Callable[[Session], T]
+
+
+def create_writer_engine(url: str) -> Engine:
+    writer_engine = create_engine(
+        url, pool_size=1, max_overflow=0, connect_args=engine_options(url)["connect_args"]
+    )
+    event.listen(writer_engine, "connect", configure_sqlite_connection)
+
+    # pysqlite's implicit transactions break SAVEPOINT, so disable them and begin explicitly;
+    # IMMEDIATE takes the write lock up front instead of upgrading from a read lock mid-batch
+    @event.listens_for(writer_engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer_engine, "begin")
+    def begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return writer_engine
+
+
+class GroupCommitWriter:
+    def __init__(self, url: str, max_batch: int = 64, max_delay: float = 0, session_info: Optional[dict] = None):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.engine = create_writer_engine(url)
+        self.session_factory = sessionmaker(bind=self.engine, autoflush=False, info=session_info)
+        self._queue: "queue.Queue[Tuple[Operation, Future]]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.batches = 0
+        self.operations = 0
+        self.failed_commits = 0
+        self.largest_batch = 0
+
+    def submit(self, operation: Operation) -> T:
+        # blocks until the batch holding this operation has committed
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((operation, future))
+        return future.result()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self.engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "operations": self.operations,
+            "failed_commits": self.failed_commits,
+            "largest_batch": self.largest_batch,
+            "mean_batch": round(self.operations / self.batches, 2) if self.batches else 0,
+            "queued": self._queue.qsize(),
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-group-commit", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._apply(batch)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _apply(self, batch: List[Tuple[Operation, Future]]) -> None:
+        results = []
+        with self.session_factory() as session:
+            try:
+                for operation, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with session.begin_nested():
+                            results.append((future, operation(session)))
+                    except Exception as error:
+                        future.set_exception(error)
+                session.commit()
+            except Exception as error:
+                session.rollback()
+                self.failed_commits += 1
+                for future, _ in results:
+                    future.set_exception(error)
+                return
+
+        self.batches += 1
+        self.operations += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for future, result in results:
+            future.set_result(result)
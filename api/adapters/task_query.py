@@ -0,0 +1,64 @@
+from typing import Any, Callable, Collection, Iterator, List
+from uuid import UUID
+
+from sqlalchemy import Select, Table, and_, or_, select
+
+from api.core.domain.task import TaskStatus
+from api.core.port.task import TaskQuery, TaskSort
+
+
+# ids per IN list; SQLite before 3.32 takes at most 999 parameters in a statement
+IN_CHUNK_SIZE = 500
+
+
+def chunked(ids: Collection, size: int = IN_CHUNK_SIZE) -> Iterator[List]:
+    ids = list(set(ids))
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def task_query_statement(tasks: Table, fields: List, query: TaskQuery, key: Callable[[UUID], Any]) -> Select:
+    # one statement for the whole spec: the filters go to the indexes on project_id,
+    # (completed, deadline), created_at and updated_at, and the page ends at limit + 1 rows
+    # so the caller can tell whether there is another
+    c = tasks.c
+    conditions = []
+    if query.project_id is not None:
+        conditions.append(c.project_id == key(query.project_id))
+    if query.status is not None:
+        conditions.append(c.completed == (query.status == TaskStatus.COMPLETED))
+    for column, start, end in (
+        (c.deadline, query.deadline_from, query.deadline_to),
+        (c.created_at, query.created_from, query.created_to),
+        (c.updated_at, query.updated_from, query.updated_to),
+    ):
+        if start is not None:
+            conditions.append(column >= start)
+        if end is not None:
+            conditions.append(column < end)
+    if query.text:
+        conditions.append(or_(
+            c.title.icontains(query.text, autoescape=True),
+            c.description.icontains(query.text, autoescape=True),
+        ))
+
+    sort_column = c[query.sort.value]
+    nullable = query.sort == TaskSort.DEADLINE
+    later = (lambda a, b: a < b) if query.descending else (lambda a, b: a > b)
+    if query.after is not None:
+        value, last_id = query.after
+        last_id = key(last_id)
+        if value is None:
+            conditions.append(and_(sort_column.is_(None), later(c.id, last_id)))
+        else:
+            position = or_(later(sort_column, value), and_(sort_column == value, later(c.id, last_id)))
+            conditions.append(or_(position, sort_column.is_(None)) if nullable else position)
+
+    direction = (lambda column: column.desc()) if query.descending else (lambda column: column.asc())
+    order = direction(sort_column)
+    statement = select(*fields).where(*conditions).order_by(
+        order.nulls_last() if nullable else order, direction(c.id)
+    )
+    if query.limit is not None:
+        statement = statement.limit(query.limit + 1)
+    return statement
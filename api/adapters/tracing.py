@@ -0,0 +1,227 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# the innermost open span of the sampled request running in this context, None otherwise;
+# every hook checks it first, so unsampled requests pay one lookup per hook
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+# longest statement text kept on a SQL span
+MAX_STATEMENT_LENGTH = 300
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "layer", "started", "duration", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, layer: str, parent_id: Optional[str]):
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.layer = layer
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        trace.spans.append(self)
+
+    def child(self, name: str, layer: str) -> "Span":
+        return Span(self.trace, name, layer, self.span_id)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.duration = time.perf_counter() - self.started
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "layer": self.layer,
+            "offset_ms": round((self.started - self.trace.started) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.started = time.perf_counter()
+        self.timestamp = time.time()
+        self.spans: List[Span] = []
+
+    def to_dict(self) -> dict:
+        root = self.spans[0]
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "started_at": self.timestamp,
+            "duration_ms": round(root.duration * 1000, 3) if root.duration is not None else None,
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+
+def parse_traceparent(header: Optional[str]):
+    # W3C trace context: version-trace_id-parent_id-flags, e.g. 00-<32 hex>-<16 hex>-01
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.0, buffer_size: int = 100, path: str = ""):
+        self.sample_rate = sample_rate
+        self.path = path
+        self.recent: "deque[Trace]" = deque(maxlen=buffer_size)
+        self._file_lock = threading.Lock()
+        self.sampled = 0
+        self.exported = 0
+
+    def start(self, name: str, traceparent: Optional[str] = None) -> Optional[Span]:
+        # a caller that sampled its side of the trace gets ours too; otherwise roll our own
+        incoming = parse_traceparent(traceparent)
+        if incoming is not None and incoming[2]:
+            trace_id, parent_id = incoming[0], incoming[1]
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            trace_id, parent_id = (incoming[0] if incoming else _new_id(128)), (incoming[1] if incoming else None)
+        else:
+            return None
+        self.sampled += 1
+        return Span(Trace(trace_id), name, "http", parent_id)
+
+    def export(self, trace: Trace) -> None:
+        self.recent.append(trace)
+        self.exported += 1
+        if self.path:
+            line = json.dumps(trace.to_dict(), default=str)
+            with self._file_lock, open(self.path, "a") as file:
+                file.write(line + "\n")
+
+    def traces(self, limit: int, min_duration_ms: float = 0) -> List[dict]:
+        found = []
+        for trace in reversed(self.recent):
+            root = trace.spans[0]
+            if root.duration is not None and root.duration * 1000 >= min_duration_ms:
+                found.append(trace.to_dict())
+                if len(found) == limit:
+                    break
+        return found
+
+    def stats(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "sampled": self.sampled,
+            "exported": self.exported,
+            "buffered": len(self.recent),
+            "pid": os.getpid(),
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def activate(span: Span):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as error:
+        span.finish(error)
+        raise
+    else:
+        span.finish()
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, layer: str):
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with activate(parent.child(name, layer)) as child:
+        yield child
+
+
+class Traced:
+    # stands in for a use case, domain service or repository on sampled requests, giving
+    # each public method call a span; unsampled requests get the object itself
+    __slots__ = ("_target", "_layer", "_prefix")
+
+    def __init__(self, target: Any, layer: str):
+        self._target = target
+        self._layer = layer
+        self._prefix = type(target).__name__
+
+    def __getattr__(self, attribute: str):
+        value = getattr(self._target, attribute)
+        if attribute.startswith("_") or not callable(value):
+            return value
+        name = f"{self._prefix}.{attribute}"
+        layer = self._layer
+
+        @wraps(value)
+        def call(*args, **kwargs):
+            with span(name, layer):
+                return value(*args, **kwargs)
+        return call
+
+
+def traced(target: Any, layer: str) -> Any:
+    return Traced(target, layer)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is None:
+        return
+    child = parent.child("SQL", "sql")
+    child.attributes["statement"] = statement[:MAX_STATEMENT_LENGTH]
+    if executemany:
+        child.attributes["executemany"] = True
+    conn.info.setdefault("trace_statements", []).append(child)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+    statements = conn.info.get("trace_statements")
+    if statements:
+        statements.pop().finish()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_statement(exception_context):
+    connection = exception_context.connection
+    statements = connection.info.get("trace_statements") if connection is not None else None
+    if statements:
+        statements.pop().finish(exception_context.original_exception)
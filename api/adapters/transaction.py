@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple, TypeVar
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from api.core.port.task import TaskRepository
+from api.core.port.project import ProjectRepository
+from api.core.port.event import EventPublisher
+from api.core.port.transaction import UnitOfWork
+from api.adapters.memory.event import PendingEvents
+
+T = TypeVar("T")
+
+Repositories = Callable[[Session], Tuple[TaskRepository, ProjectRepository, EventPublisher]]
+
+
+class SessionUnitOfWork(UnitOfWork):
+    # the session joins a transaction already open on the connection, so a repository's
+    # commit only releases a savepoint and whoever opened the transaction decides its fate
+    def __init__(self, connection: Connection, repositories: Repositories, info: Optional[dict] = None):
+        self.connection = connection
+        self.session = Session(
+            bind=connection, join_transaction_mode="create_savepoint", autoflush=False, info=info
+        )
+        self.task_repository, self.project_repository, self.event_publisher = repositories(self.session)
+
+    @contextmanager
+    def savepoint(self):
+        # end the session's own savepoint first, so this one encloses everything the step does
+        self.session.commit()
+        step = self.connection.begin_nested()
+        events = self.event_publisher if isinstance(self.event_publisher, PendingEvents) else None
+        mark = events.mark() if events else 0
+        try:
+            yield
+        except Exception:
+            self.session.rollback()
+            step.rollback()
+            if events:
+                events.discard(mark)
+            raise
+        self.session.commit()
+        step.commit()
+
+
+def run_in_connection(connection: Connection, repositories: Repositories, work: Callable[[UnitOfWork], T],
+                      info: Optional[dict] = None) -> T:
+    unit = SessionUnitOfWork(connection, repositories, info)
+    try:
+        result = work(unit)
+        unit.session.commit()
+        return result
+    finally:
+        unit.session.close()
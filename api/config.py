@@ -0,0 +1,167 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(name, default)
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return float(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str = "sqlite:///./task-manager.db"
+    create_tables_on_startup: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_group_commit: bool = True
+    sqlite_group_commit_max_batch: int = 64
+    sqlite_group_commit_max_delay_ms: float = 0
+    sqlite_shards: int = 1
+    sqlite_archive: bool = True
+    archive_path: str = ""
+    archive_after_days: int = 30
+    sqlite_maintenance_interval_s: int = 3600
+    sqlite_maintenance_vacuum_pages: int = 256
+    sqlite_maintenance_idle_requests: int = 2
+    db_pool_size: int = 8
+    db_max_overflow: int = 16
+    db_pool_recycle: int = 1800
+    db_statement_timeout_ms: int = 30000
+    openapi_path: str = "openapi.json"
+    memory_snapshot_every: int = 10000
+
+    jobs_path: str = ""
+    jobs_workers: int = 2
+    jobs_pool: str = "thread"
+    jobs_artifact_dir: str = "./job-artifacts"
+    jobs_poll_interval_ms: int = 1000
+
+    trace_sample_rate: float = 0.0
+    trace_buffer_size: int = 100
+    trace_path: str = ""
+
+    memory_profiling: bool = False
+    memory_profiling_frames: int = 1
+    memory_profiling_routes: bool = False
+
+    history: bool = True
+    history_path: str = ""
+    history_segment_mb: int = 8
+    history_retention_days: int = 0
+
+    invalidation_bus: bool = True
+    invalidation_bus_path: str = ""
+    invalidation_max_batch: int = 256
+    invalidation_max_delay_ms: float = 0
+
+    read_coalescing: bool = True
+    read_coalescing_paths: str = "/tasks,/projects,/analytics"
+
+    admission_control: bool = True
+    admission_read_limit: int = 32
+    admission_read_queue: int = 256
+    admission_write_limit: int = 4
+    admission_write_queue: int = 64
+    admission_queue_timeout_ms: int = 2000
+    admission_retry_after: int = 1
+
+    host: str = "0.0.0.0"
+    port: int = 8080
+    workers: int = 1
+    keepalive_timeout: int = 5
+    backlog: int = 2048
+    max_requests: Optional[int] = None
+    graceful_timeout: int = 30
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=_env_str("DATABASE_URL", cls.database_url),
+            create_tables_on_startup=_env_bool("CREATE_TABLES_ON_STARTUP", cls.create_tables_on_startup),
+            sqlite_busy_timeout_ms=_env_int("SQLITE_BUSY_TIMEOUT_MS", cls.sqlite_busy_timeout_ms),
+            sqlite_group_commit=_env_bool("SQLITE_GROUP_COMMIT", cls.sqlite_group_commit),
+            sqlite_group_commit_max_batch=_env_int("SQLITE_GROUP_COMMIT_MAX_BATCH", cls.sqlite_group_commit_max_batch),
+            sqlite_group_commit_max_delay_ms=_env_float(
+                "SQLITE_GROUP_COMMIT_MAX_DELAY_MS", cls.sqlite_group_commit_max_delay_ms
+            ),
+            sqlite_shards=_env_int("SQLITE_SHARDS", cls.sqlite_shards),
+            sqlite_archive=_env_bool("SQLITE_ARCHIVE", cls.sqlite_archive),
+            archive_path=_env_str("ARCHIVE_PATH", cls.archive_path),
+            archive_after_days=_env_int("ARCHIVE_AFTER_DAYS", cls.archive_after_days),
+            sqlite_maintenance_interval_s=_env_int(
+                "SQLITE_MAINTENANCE_INTERVAL_S", cls.sqlite_maintenance_interval_s
+            ),
+            sqlite_maintenance_vacuum_pages=_env_int(
+                "SQLITE_MAINTENANCE_VACUUM_PAGES", cls.sqlite_maintenance_vacuum_pages
+            ),
+            sqlite_maintenance_idle_requests=_env_int(
+                "SQLITE_MAINTENANCE_IDLE_REQUESTS", cls.sqlite_maintenance_idle_requests
+            ),
+            db_pool_size=_env_int("DB_POOL_SIZE", cls.db_pool_size),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", cls.db_max_overflow),
+            db_pool_recycle=_env_int("DB_POOL_RECYCLE", cls.db_pool_recycle),
+            db_statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", cls.db_statement_timeout_ms),
+            openapi_path=_env_str("OPENAPI_PATH", cls.openapi_path),
+            memory_snapshot_every=_env_int("MEMORY_SNAPSHOT_EVERY", cls.memory_snapshot_every),
+            jobs_path=_env_str("JOBS_PATH", cls.jobs_path),
+            jobs_workers=_env_int("JOBS_WORKERS", cls.jobs_workers),
+            jobs_pool=_env_str("JOBS_POOL", cls.jobs_pool),
+            jobs_artifact_dir=_env_str("JOBS_ARTIFACT_DIR", cls.jobs_artifact_dir),
+            jobs_poll_interval_ms=_env_int("JOBS_POLL_INTERVAL_MS", cls.jobs_poll_interval_ms),
+            trace_sample_rate=_env_float("TRACE_SAMPLE_RATE", cls.trace_sample_rate),
+            trace_buffer_size=_env_int("TRACE_BUFFER_SIZE", cls.trace_buffer_size),
+            trace_path=_env_str("TRACE_PATH", cls.trace_path),
+            memory_profiling=_env_bool("MEMORY_PROFILING", cls.memory_profiling),
+            memory_profiling_frames=_env_int("MEMORY_PROFILING_FRAMES", cls.memory_profiling_frames),
+            memory_profiling_routes=_env_bool("MEMORY_PROFILING_ROUTES", cls.memory_profiling_routes),
+            history=_env_bool("HISTORY", cls.history),
+            history_path=_env_str("HISTORY_PATH", cls.history_path),
+            history_segment_mb=_env_int("HISTORY_SEGMENT_MB", cls.history_segment_mb),
+            history_retention_days=_env_int("HISTORY_RETENTION_DAYS", cls.history_retention_days),
+            invalidation_bus=_env_bool("INVALIDATION_BUS", cls.invalidation_bus),
+            invalidation_bus_path=_env_str("INVALIDATION_BUS_PATH", cls.invalidation_bus_path),
+            invalidation_max_batch=_env_int("INVALIDATION_MAX_BATCH", cls.invalidation_max_batch),
+            invalidation_max_delay_ms=_env_float("INVALIDATION_MAX_DELAY_MS", cls.invalidation_max_delay_ms),
+            read_coalescing=_env_bool("READ_COALESCING", cls.read_coalescing),
+            read_coalescing_paths=_env_str("READ_COALESCING_PATHS", cls.read_coalescing_paths),
+            admission_control=_env_bool("ADMISSION_CONTROL", cls.admission_control),
+            admission_read_limit=_env_int("ADMISSION_READ_LIMIT", cls.admission_read_limit),
+            admission_read_queue=_env_int("ADMISSION_READ_QUEUE", cls.admission_read_queue),
+            admission_write_limit=_env_int("ADMISSION_WRITE_LIMIT", cls.admission_write_limit),
+            admission_write_queue=_env_int("ADMISSION_WRITE_QUEUE", cls.admission_write_queue),
+            admission_queue_timeout_ms=_env_int("ADMISSION_QUEUE_TIMEOUT_MS", cls.admission_queue_timeout_ms),
+            admission_retry_after=_env_int("ADMISSION_RETRY_AFTER", cls.admission_retry_after),
+            host=_env_str("HOST", cls.host),
+            port=_env_int("PORT", cls.port),
+            workers=_env_int("WORKERS", os.cpu_count() or cls.workers),
+            keepalive_timeout=_env_int("KEEPALIVE_TIMEOUT", cls.keepalive_timeout),
+            backlog=_env_int("BACKLOG", cls.backlog),
+            max_requests=_env_int("MAX_REQUESTS", cls.max_requests),
+            graceful_timeout=_env_int("GRACEFUL_TIMEOUT", cls.graceful_timeout),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings.from_env()
@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+from datetime import date
+from enum import Enum
+
+
+class Bucket(Enum):
+    DAY = "day"
+    WEEK = "week"
+
+
+@dataclass(frozen=True)
+class CompletionPoint:
+    period_start: date
+    created: int
+    completed: int
+    # tasks created but not completed by the end of the period
+    remaining: int
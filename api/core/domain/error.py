@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
@@ -51,3 +52,46 @@ class TaskNotLinkedException(DomainException):
     def __init__(self, task_id: UUID):
         self.task_id = task_id
         super().__init__(f"Task {task_id} is not linked to any project")
+
+
+class JobNotFoundException(DomainException):
+    def __init__(self, job_id: UUID):
+        self.job_id = job_id
+        super().__init__(f"Job {job_id} not found")
+
+
+class UnknownJobKindException(DomainException):
+    def __init__(self, kind: str):
+        self.kind = kind
+        super().__init__(f"Unknown job kind '{kind}'")
+
+
+class InvalidCursorException(DomainException):
+    def __init__(self, cursor: str):
+        self.cursor = cursor
+        super().__init__(f"Cursor '{cursor}' is not valid for this query")
+
+
+class InvalidBatchOperationException(DomainException):
+    def __init__(self, index: int, reason: str):
+        self.index = index
+        self.reason = reason
+        super().__init__(f"Operation {index}: {reason}")
+
+
+class AtomicBatchUnsupportedException(DomainException):
+    def __init__(self, store: str):
+        self.store = store
+        super().__init__(f"The {store} store cannot run a batch in one transaction; send it with atomic=false")
+
+
+class HistoryDisabledException(DomainException):
+    def __init__(self):
+        super().__init__("History is not recorded; it needs HISTORY on and, for an in-memory database, HISTORY_PATH")
+
+
+class ProjectSnapshotNotFoundException(DomainException):
+    def __init__(self, project_id: UUID, at: datetime):
+        self.project_id = project_id
+        self.at = at
+        super().__init__(f"Project {project_id} has no recorded state at {at.isoformat()}")
@@ -0,0 +1,41 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from api.core.domain.task import Task, Project
+
+
+class HistoryEntity(Enum):
+    TASK = "task"
+    PROJECT = "project"
+
+
+class HistoryAction(Enum):
+    SAVED = "saved"
+    DELETED = "deleted"
+    EVENT = "event"
+
+
+@dataclass
+class HistoryEntry:
+    entity: HistoryEntity
+    action: HistoryAction
+    entity_id: UUID
+    # the state written by a save; a deletion or an event carries neither
+    task: Optional[Task] = None
+    project: Optional[Project] = None
+    # an event's type and fields
+    event: Optional[Dict[str, Any]] = None
+    # the project a task or event belonged to when it was recorded
+    project_id: Optional[UUID] = None
+    # stamped by the log as the entry is appended
+    recorded_at: Optional[datetime] = None
+
+
+@dataclass
+class ProjectSnapshot:
+    at: datetime
+    project: Project
+    tasks: List[Task] = field(default_factory=list)
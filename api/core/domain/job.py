@@ -0,0 +1,40 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobInterrupt(Enum):
+    # asked for by the client; the job ends as cancelled
+    CANCEL = "cancel"
+    # the worker running it is shutting down; the job goes back to the queue
+    SHUTDOWN = "shutdown"
+
+
+@dataclass
+class Job:
+    kind: str
+    params: dict = field(default_factory=dict)
+    id: UUID = field(default_factory=uuid4)
+    status: JobStatus = JobStatus.QUEUED
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Optional[dict] = None
+    artifact: Optional[str] = None
+    error: Optional[str] = None
+    interrupt: Optional[JobInterrupt] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
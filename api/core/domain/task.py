@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Generic, Tuple, TypeVar
 from uuid import UUID, uuid4
 from dataclasses import dataclass, field
 from enum import Enum
@@ -73,3 +73,29 @@ class Project:
     def update_deadline(self, deadline: datetime) -> None:
         self.deadline = deadline
         self.updated_at = datetime.utcnow()
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class ChangeSet(Generic[T]):
+    changed: List[T] = field(default_factory=list)
+    deleted: List[UUID] = field(default_factory=list)
+    last_seq: int = 0
+    has_more: bool = False
+
+    @classmethod
+    def merge(cls, changed: List[Tuple[int, T]], deleted: List[Tuple[int, UUID]], since: int, limit: int) -> "ChangeSet[T]":
+        # both inputs are ordered by seq and hold at most limit + 1 entries each
+        entries = sorted(
+            [(seq, False, item) for seq, item in changed] + [(seq, True, item) for seq, item in deleted],
+            key=lambda entry: entry[0]
+        )
+        page = entries[:limit]
+        return cls(
+            changed=[item for _, is_deleted, item in page if not is_deleted],
+            deleted=[item for _, is_deleted, item in page if is_deleted],
+            last_seq=page[-1][0] if page else since,
+            has_more=len(entries) > limit,
+        )
@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from uuid import UUID
+
+from api.core.domain.analytics import Bucket, CompletionPoint
+
+
+class AnalyticsRepository(ABC):
+    @abstractmethod
+    def completion_series(self, bucket: Bucket, project_id: Optional[UUID] = None) -> List[CompletionPoint]:
+        pass
@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from api.core.domain.history import HistoryEntry, ProjectSnapshot
+
+
+class HistoryRepository(ABC):
+    @abstractmethod
+    def append(self, entries: List[HistoryEntry]) -> None:
+        pass
+
+    @abstractmethod
+    def entity_history(self, entity_id: UUID, until: Optional[datetime] = None) -> List[HistoryEntry]:
+        # oldest first
+        pass
+
+    @abstractmethod
+    def project_at(self, project_id: UUID, at: datetime) -> Optional[ProjectSnapshot]:
+        # the project and its tasks as they were at that time, or None if it did not exist then
+        pass
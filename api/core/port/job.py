@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+from uuid import UUID
+
+from api.core.domain.job import Job, JobInterrupt, JobStatus
+
+
+class JobRepository(ABC):
+    @abstractmethod
+    def save(self, job: Job) -> Job:
+        pass
+
+    @abstractmethod
+    def get_by_id(self, job_id: UUID) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    def get_recent(self, limit: int) -> List[Job]:
+        pass
+
+    @abstractmethod
+    def claim(self, owner: str) -> Optional[Job]:
+        # atomically moves the oldest queued job to running for owner
+        pass
+
+    @abstractmethod
+    def report_progress(self, job_id: UUID, progress: float, message: Optional[str] = None) -> None:
+        pass
+
+    @abstractmethod
+    def get_interrupt(self, job_id: UUID) -> Optional[JobInterrupt]:
+        pass
+
+    @abstractmethod
+    def finish(self, job_id: UUID, status: JobStatus, result: Optional[dict] = None,
+               artifact: Optional[str] = None, error: Optional[str] = None) -> None:
+        # only a running job is finished, so a late result cannot overwrite a cancellation
+        pass
+
+    @abstractmethod
+    def requeue(self, job_id: UUID) -> None:
+        pass
+
+    @abstractmethod
+    def request_cancel(self, job_id: UUID) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    def interrupt_owned(self, owner: str, interrupt: JobInterrupt) -> None:
+        pass
+
+    @abstractmethod
+    def fail_orphaned(self, is_alive: Callable[[str], bool]) -> int:
+        # jobs left running by owners that no longer exist
+        pass
@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Collection, List, Optional
 from uuid import UUID
 
-from api.core.domain.task import Project
+from api.core.domain.task import Project, ChangeSet
 
 
 class ProjectRepository(ABC):
@@ -25,3 +25,24 @@ class ProjectRepository(ABC):
     @abstractmethod
     def delete(self, project_id: UUID) -> bool:
         pass
+
+    @abstractmethod
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Project]:
+        pass
+
+    def get_by_id_for_update(self, project_id: UUID) -> Optional[Project]:
+        return self.get_by_id(project_id)
+
+    def get_many(self, project_ids: Collection[UUID]) -> List[Project]:
+        # the projects among project_ids that exist, in no particular order
+        found = (self.get_by_id(project_id) for project_id in set(project_ids))
+        return [project for project in found if project]
+
+    def insert_many(self, projects: List[Project]) -> List[Project]:
+        return [self.save(project) for project in projects]
+
+    def get_archived(self) -> List[Project]:
+        return []
+
+    def get_archived_by_id(self, project_id: UUID) -> Optional[Project]:
+        return None
@@ -1,8 +1,129 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from enum import Enum
+from typing import Any, Collection, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 from uuid import UUID
 
-from api.core.domain.task import Task
+from api.core.domain.task import Task, TaskStatus, ChangeSet
+
+
+class TaskSort(Enum):
+    CREATED_AT = "created_at"
+    UPDATED_AT = "updated_at"
+    DEADLINE = "deadline"
+    TITLE = "title"
+
+
+# the sort value and id of the last task of a page; the next page starts after it
+Position = Tuple[Any, UUID]
+
+# tasks per find() when iter_all pages through a store with no streaming read of its own
+ITER_PAGE_SIZE = 500
+
+
+@dataclass
+class TaskPage:
+    items: List[Task] = field(default_factory=list)
+    next: Optional[Position] = None
+
+
+@dataclass(frozen=True)
+class TaskQuery:
+    # every filter given must match; ranges include their start and exclude their end
+    project_id: Optional[UUID] = None
+    status: Optional[TaskStatus] = None
+    deadline_from: Optional[datetime] = None
+    deadline_to: Optional[datetime] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    updated_from: Optional[datetime] = None
+    updated_to: Optional[datetime] = None
+    # case-insensitive substring of the title or description
+    text: Optional[str] = None
+    # ties are broken by id; tasks without a deadline come last either way
+    sort: TaskSort = TaskSort.CREATED_AT
+    descending: bool = False
+    limit: Optional[int] = None
+    after: Optional[Position] = None
+    # the task fields the caller reads, named as the columns are; None for all. A store may
+    # leave the others unloaded
+    fields: Optional[FrozenSet[str]] = None
+
+    def columns(self) -> Optional[FrozenSet[str]]:
+        # the fields, and whatever matches() and paging read, since the sharded store runs
+        # them again over the page of each shard
+        if self.fields is None:
+            return None
+        needed = {"id", self.sort.value}
+        for name, used in (
+            ("project_id", self.project_id is not None),
+            ("completed", self.status is not None),
+            ("deadline", self.deadline_from or self.deadline_to),
+            ("created_at", self.created_from or self.created_to),
+            ("updated_at", self.updated_from or self.updated_to),
+            ("title", self.text),
+            ("description", self.text),
+        ):
+            if used:
+                needed.add(name)
+        return self.fields | needed
+
+    def sort_value(self, task: Task) -> Any:
+        return getattr(task, self.sort.value)
+
+    def position(self, task: Task) -> Position:
+        return self.sort_value(task), task.id
+
+    def matches(self, task: Task) -> bool:
+        if self.project_id is not None and task.project_id != self.project_id:
+            return False
+        if self.status is not None and task.status != self.status:
+            return False
+        for value, start, end in (
+            (task.deadline, self.deadline_from, self.deadline_to),
+            (task.created_at, self.created_from, self.created_to),
+            (task.updated_at, self.updated_from, self.updated_to),
+        ):
+            if (start or end) and value is None:
+                return False
+            if (start and value < start) or (end and value >= end):
+                return False
+        if self.text:
+            needle = self.text.lower()
+            if needle not in task.title.lower() and needle not in (task.description or "").lower():
+                return False
+        return self.after is None or self._is_after(task)
+
+    def _is_after(self, task: Task) -> bool:
+        value, last_id = self.after
+        current = self.sort_value(task)
+        later = (lambda a, b: a < b) if self.descending else (lambda a, b: a > b)
+        if value is None:
+            return current is None and later(task.id, last_id)
+        if current is None:
+            return True
+        return later(current, value) or (current == value and later(task.id, last_id))
+
+    def apply(self, tasks: Iterable[Task]) -> TaskPage:
+        # the whole spec evaluated in Python, for stores that cannot run it themselves
+        found = [task for task in tasks if self.matches(task)]
+        dated = sorted(
+            (task for task in found if self.sort_value(task) is not None),
+            key=self.position, reverse=self.descending
+        )
+        undated = sorted(
+            (task for task in found if self.sort_value(task) is None),
+            key=lambda task: task.id, reverse=self.descending
+        )
+        return self.page(dated + undated)
+
+    def page(self, ordered: List[Task]) -> TaskPage:
+        # ordered holds the matches in sort order, at least limit + 1 of them if there are more
+        if self.limit is None or len(ordered) <= self.limit:
+            return TaskPage(items=ordered)
+        items = ordered[:self.limit]
+        return TaskPage(items=items, next=self.position(items[-1]))
 
 
 class TaskRepository(ABC):
@@ -33,3 +154,54 @@ class TaskRepository(ABC):
     @abstractmethod
     def delete(self, task_id: UUID) -> bool:
         pass
+
+    @abstractmethod
+    def get_changes(self, since: int, limit: int) -> ChangeSet[Task]:
+        pass
+
+    def get_by_id_for_update(self, task_id: UUID) -> Optional[Task]:
+        return self.get_by_id(task_id)
+
+    def get_many(self, task_ids: Collection[UUID]) -> List[Task]:
+        # the tasks among task_ids that exist, in no particular order
+        found = (self.get_by_id(task_id) for task_id in set(task_ids))
+        return [task for task in found if task]
+
+    def find(self, query: TaskQuery) -> TaskPage:
+        candidates = self.get_by_project_id(query.project_id) if query.project_id else self.get_all()
+        return query.apply(candidates)
+
+    def iter_all(self, fields: Optional[FrozenSet[str]] = None) -> Iterator[Task]:
+        # every task, for callers that go through all of them without holding them all
+        query = TaskQuery(limit=ITER_PAGE_SIZE, fields=fields)
+        while True:
+            page = self.find(query)
+            yield from page.items
+            if page.next is None:
+                return
+            query = replace(query, after=page.next)
+
+    def insert_many(self, tasks: List[Task]) -> List[Task]:
+        return [self.save(task) for task in tasks]
+
+    def cap_deadlines(self, project_id: UUID, deadline: datetime) -> List[Task]:
+        # moves the project's tasks due after deadline up to it; each is read again as it is
+        # written, so a change made to it since get_by_project_id is not undone
+        capped = []
+        for task in self.get_by_project_id(project_id):
+            if not (task.deadline and task.deadline > deadline):
+                continue
+            current = self.get_by_id_for_update(task.id)
+            if current and current.project_id == project_id and current.deadline and current.deadline > deadline:
+                current.update_deadline(deadline)
+                capped.append(self.save(current))
+        return capped
+
+    def get_archived(self, project_id: Optional[UUID] = None) -> List[Task]:
+        return []
+
+    def get_archived_by_id(self, task_id: UUID) -> Optional[Task]:
+        return None
+
+    def restore(self, task_id: UUID) -> Optional[Task]:
+        return None
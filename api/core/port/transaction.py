@@ -0,0 +1,24 @@
+from abc import ABC, abstractmethod
+from typing import Callable, ContextManager, TypeVar
+
+from api.core.port.task import TaskRepository
+from api.core.port.project import ProjectRepository
+from api.core.port.event import EventPublisher
+
+T = TypeVar("T")
+
+
+class UnitOfWork(ABC):
+    # repositories whose writes all land in one transaction; it commits when the work
+    # handed to a TransactionRunner returns and rolls back if it raises
+    task_repository: TaskRepository
+    project_repository: ProjectRepository
+    event_publisher: EventPublisher
+
+    @abstractmethod
+    def savepoint(self) -> ContextManager[None]:
+        # undoes only what ran inside it when it exits with an exception
+        pass
+
+
+TransactionRunner = Callable[[Callable[[UnitOfWork], T]], T]
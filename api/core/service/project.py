@@ -4,7 +4,7 @@ from uuid import UUID, uuid4
 
 from api.core.domain.task import Task, Project
 from api.core.domain.event import ProjectCompletedEvent, ProjectReopenedEvent
-from api.core.domain.error import ProjectCannotBeCompletedException
+from api.core.domain.error import ProjectCannotBeCompletedException, ProjectNotFoundException
 from api.core.port.project import ProjectRepository
 from api.core.port.task import TaskRepository
 from api.core.port.event import EventPublisher
@@ -17,9 +17,9 @@ class ProjectDomainService:
         self.event_publisher = event_publisher
 
     def complete_project(self, project_id: UUID) -> Project:
-        project = self.project_repository.get_by_id(project_id)
+        project = self.project_repository.get_by_id_for_update(project_id)
         if not project:
-            raise ValueError(f"Project {project_id} not found")
+            raise ProjectNotFoundException(project_id)
             
         if project.is_completed():
             return project
@@ -47,25 +47,15 @@ class ProjectDomainService:
         return project
 
     def update_project_deadline(self, project_id: UUID, new_deadline: datetime) -> Project:
-        project = self.project_repository.get_by_id(project_id)
+        project = self.project_repository.get_by_id_for_update(project_id)
         if not project:
-            raise ValueError(f"Project {project_id} not found")
+            raise ProjectNotFoundException(project_id)
             
         old_deadline = project.deadline
         project.update_deadline(new_deadline)
         
       
-        tasks = self.task_repository.get_by_project_id(project_id)
-        conflicting_tasks = [
-            task for task in tasks 
-            if task.deadline and task.deadline > new_deadline
-        ]
-        
-        if conflicting_tasks:
-          
-            for task in conflicting_tasks:
-                task.update_deadline(new_deadline)
-                self.task_repository.save(task)
+        self.task_repository.cap_deadlines(project_id, new_deadline)
         
         self.project_repository.save(project)
         return project
@@ -12,7 +12,8 @@ from api.core.domain.event import (
 )
 from api.core.domain.error import (
     TaskDeadlineAfterProjectDeadlineException,
-    ProjectCannotBeCompletedException
+    ProjectCannotBeCompletedException,
+    TaskNotFoundException
 )
 from api.core.port.task import TaskRepository
 from api.core.port.project import ProjectRepository
@@ -42,9 +43,9 @@ class TaskDomainService:
             )
 
     def complete_task(self, task_id: UUID) -> Task:
-        task = self.task_repository.get_by_id(task_id)
+        task = self.task_repository.get_by_id_for_update(task_id)
         if not task:
-            raise ValueError(f"Task {task_id} not found")
+            raise TaskNotFoundException(task_id)
             
         if task.is_completed():
             return task
@@ -67,9 +68,10 @@ class TaskDomainService:
         return task
 
     def reopen_task(self, task_id: UUID) -> Task:
-        task = self.task_repository.get_by_id(task_id)
+        # reopening archived work brings it (and its project) back into the hot tables
+        task = self.task_repository.get_by_id_for_update(task_id) or self.task_repository.restore(task_id)
         if not task:
-            raise ValueError(f"Task {task_id} not found")
+            raise TaskNotFoundException(task_id)
             
         if not task.is_completed():
             return task
@@ -79,7 +81,7 @@ class TaskDomainService:
         
       
         if task.project_id:
-            project = self.project_repository.get_by_id(task.project_id)
+            project = self.project_repository.get_by_id_for_update(task.project_id)
             if project and project.is_completed():
                 project.reopen()
                 self.project_repository.save(project)
@@ -107,7 +109,7 @@ class TaskDomainService:
         if not auto_complete_projects:
             return
             
-        project = self.project_repository.get_by_id(project_id)
+        project = self.project_repository.get_by_id_for_update(project_id)
         if not project or project.is_completed():
             return
             
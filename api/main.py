@@ -1,5 +1,9 @@
+import os
+
 import uvicorn
-from api.adapters.rest.server import app
+
+from api.config import get_settings
+
 
 def main():
     uvicorn.run(
@@ -9,5 +13,38 @@ def main():
         reload=True
     )
 
+
+def serve():
+    from api.adapters.backend import load_backend
+
+    settings = get_settings()
+    backend = load_backend(settings.database_url)
+    try:
+        if settings.workers > 1 and not backend.multiprocess:
+            raise SystemExit(f"The {backend.name} backend keeps its data in-process; run it with WORKERS=1")
+
+        # create the schema once in the supervisor; workers inherit the flag and skip it
+        backend.ensure_schema()
+    finally:
+        # each worker's lifespan loads its own
+        backend.close()
+    os.environ["CREATE_TABLES_ON_STARTUP"] = "0"
+
+    uvicorn.run(
+        "api.adapters.rest.server:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=settings.keepalive_timeout,
+        backlog=settings.backlog,
+        limit_max_requests=settings.max_requests,
+        timeout_graceful_shutdown=settings.graceful_timeout,
+        proxy_headers=True,
+        access_log=False,
+    )
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,43 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def _process_age() -> Optional[float]:
+    # seconds since the kernel started this process, so interpreter start-up is counted too
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+class StartupTimer:
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+        self._last = time.perf_counter()
+        age = _process_age()
+        if age is not None:
+            self.phases.append(("interpreter", age))
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self) -> Dict[str, float]:
+        phases = {name: round(seconds * 1000, 2) for name, seconds in self.phases}
+        phases["total"] = round(sum(seconds for _, seconds in self.phases) * 1000, 2)
+        return phases
+
+    def log(self) -> None:
+        logger.info("Startup timing (ms): %s", ", ".join(f"{k}={v}" for k, v in self.report().items()))
+
+
+startup_timer = StartupTimer()
@@ -2,7 +2,7 @@
 
 import { useState, useEffect } from 'react';
 import { TaskResponseDto as Task, TaskCreateDto as CreateTaskData, TaskUpdateDto as UpdateTaskData, ProjectResponseDto as Project } from '@/lib/types.gen';
-import { getAllTasksTasksGet, createTaskTasksPost, deleteTaskTasksTaskIdDelete, completeTaskTasksTaskIdCompletePatch, getProjectTasksProjectsProjectIdTasksGet, updateTaskTasksTaskIdPut, linkTaskToProjectProjectsProjectIdTasksTaskIdLinkPost, unlinkTaskFromProjectProjectsProjectIdTasksTaskIdUnlinkDelete, getAllProjectsProjectsGet } from '@/lib/sdk.gen';
+import { getAllTasksTasksGet, createTaskTasksPost, deleteTaskTasksTaskIdDelete, getTaskTasksTaskIdGet, completeTaskTasksTaskIdCompletePatch, getProjectTasksProjectsProjectIdTasksGet, updateTaskTasksTaskIdPut, linkTaskToProjectProjectsProjectIdTasksTaskIdLinkPost, unlinkTaskFromProjectProjectsProjectIdTasksTaskIdUnlinkDelete, getAllProjectsProjectsGet } from '@/lib/sdk.gen';
 import { apiClient } from '@/config/api-client';
 
 interface TaskListProps {
@@ -91,14 +91,22 @@ export default function TaskList({ projectId, onTaskUpdate }: TaskListProps) {
     }
   };
 
-  const handleEditTask = (task: Task) => {
-    setEditingTask(task);
-    setNewTask({
-      title: task.title,
-      description: task.description || '',
-      deadline: task.deadline ? new Date(task.deadline).toISOString().slice(0, 16) : '',
-    });
-    setShowCreateForm(true);
+  const handleEditTask = async (task: Task) => {
+    try {
+      // task lists leave the description out, so the form starts from the whole task
+      const response = await getTaskTasksTaskIdGet({ path: { task_id: task.id }, client: apiClient });
+      const current = response.data;
+      if (!current) return;
+      setEditingTask(current);
+      setNewTask({
+        title: current.title,
+        description: current.description || '',
+        deadline: current.deadline ? new Date(current.deadline).toISOString().slice(0, 16) : '',
+      });
+      setShowCreateForm(true);
+    } catch (error) {
+      console.error('Failed to load task:', error);
+    }
   };
 
   const handleUpdateTask = async (e: React.FormEvent) => {
@@ -0,0 +1,136 @@
+"""Write latency while an online backup runs, checked against a bound.
+
+    python bench/backup.py --tasks 50000 --writers 4 --max-p99-ms 100
+
+Fills a temporary SQLite file, then keeps writers saving tasks through the repositories
+(and so through group commit, as in the API). It measures their latency for a few seconds
+on their own, then again while backup_databases copies the file step by step. Prints p50,
+p99 and max for both, with the backup's steps and restarts, and exits 1 if p99 during the
+backup is over --max-p99-ms.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/bench.db"
+os.environ["SQLITE_ARCHIVE"] = "0"
+
+from sqlalchemy import insert  # noqa: E402
+
+from api.config import get_settings  # noqa: E402
+from api.core.domain.task import Task  # noqa: E402
+from api.adapters.backend import load_backend  # noqa: E402
+from api.adapters.sqlite.backup import backup_databases  # noqa: E402
+from api.adapters.sqlite.db import engine  # noqa: E402
+from api.adapters.sqlite.task import TaskModel  # noqa: E402
+
+backend = load_backend(get_settings().database_url)
+
+
+def seed(count: int, description_bytes: int) -> None:
+    now = datetime.utcnow()
+    rows = [
+        {"id": str(uuid4()), "title": f"task {i}", "description": "x" * description_bytes,
+         "completed": False, "created_at": now, "updated_at": now, "seq": i}
+        for i in range(count)
+    ]
+    with engine.begin() as connection:
+        for start in range(0, count, 5000):
+            connection.execute(insert(TaskModel.__table__), rows[start:start + 5000])
+
+
+class Writers:
+    def __init__(self, count: int):
+        self.count = count
+        self.latencies = []
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+    def _write(self) -> None:
+        while not self.stop.is_set():
+            sessions = backend.get_db()
+            db = next(sessions)
+            started = time.perf_counter()
+            backend.task_repository(db).save(Task(title="bench"))
+            elapsed = time.perf_counter() - started
+            sessions.close()
+            with self.lock:
+                self.latencies.append(elapsed)
+
+    def measure(self, during) -> list:
+        self.latencies = []
+        self.stop.clear()
+        threads = [threading.Thread(target=self._write) for _ in range(self.count)]
+        for thread in threads:
+            thread.start()
+        try:
+            result = during()
+        finally:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+        return sorted(self.latencies), result
+
+
+def summary(latencies: list) -> str:
+    def at(fraction):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000
+    return f"{len(latencies):6d} writes  p50 {at(0.5):7.2f} ms  p99 {at(0.99):7.2f} ms  max {latencies[-1] * 1000:7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--description-bytes", type=int, default=1000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--baseline-seconds", type=float, default=3)
+    parser.add_argument("--step-pages", type=int, default=256)
+    parser.add_argument("--pause-ms", type=float, default=0)
+    parser.add_argument("--max-p99-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    backend.ensure_schema()
+    seed(args.tasks, args.description_bytes)
+    size = os.path.getsize(engine.url.database)
+    print(f"  database {size / 1e6:.1f} MB, {args.writers} writers")
+
+    writers = Writers(args.writers)
+    baseline, _ = writers.measure(lambda: time.sleep(args.baseline_seconds))
+    print(f"  no backup      {summary(baseline)}")
+
+    def run_backup():
+        started = time.perf_counter()
+        result = backup_databases(
+            {"bench": engine}, os.path.join(TMP.name, "backups"),
+            step_pages=args.step_pages, pause=args.pause_ms / 1000
+        )
+        return result, time.perf_counter() - started
+
+    during, (result, seconds) = writers.measure(run_backup)
+    copy = result["files"][0]
+    print(f"  during backup  {summary(during)}")
+    print(
+        f"  backup took {seconds:.2f}s in {copy['steps']} steps of {args.step_pages} pages, "
+        f"{copy['restarts']} restarts{', then in one step' if copy['single_step'] else ''}"
+    )
+    backend.close()
+
+    p99 = during[min(len(during) - 1, int(len(during) * 0.99))] * 1000
+    if p99 > args.max_p99_ms:
+        print(f"  FAIL: p99 during the backup {p99:.2f} ms is over {args.max_p99_ms} ms")
+        sys.exit(1)
+    print(f"  ok: p99 during the backup is within {args.max_p99_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
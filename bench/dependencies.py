@@ -0,0 +1,107 @@
+"""Per-request cost of resolving the use-case dependencies, before and after the container.
+
+    python bench/dependencies.py --requests 5000
+
+Two apps expose the same no-op route that depends on TaskUseCases. One resolves it through
+the old chain of sync Depends (session, two repositories, publisher, use cases, each run
+in the threadpool), the other through the request scope. Neither route touches the
+database, so the difference is the wiring alone.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/bench.db"
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+
+from api.config import get_settings  # noqa: E402
+from api.adapters.backend import load_backend  # noqa: E402
+from api.adapters.rest.container import Container  # noqa: E402
+from api.adapters.rest.event import get_task_use_cases  # noqa: E402
+from api.adapters.rest.project import TaskUseCases  # noqa: E402
+
+backend = load_backend(get_settings().database_url)
+
+
+def get_task_repository(db=Depends(backend.get_db)):
+    return backend.task_repository(db)
+
+
+def get_project_repository(db=Depends(backend.get_db)):
+    return backend.project_repository(db)
+
+
+def get_event_publisher(db=Depends(backend.get_db)):
+    return backend.event_publisher(db)
+
+
+def chained_task_use_cases(
+    task_repo=Depends(get_task_repository),
+    project_repo=Depends(get_project_repository),
+    event_publisher=Depends(get_event_publisher)
+) -> TaskUseCases:
+    return TaskUseCases(task_repo, project_repo, event_publisher)
+
+
+async def no_dependencies() -> None:
+    return None
+
+
+def build_app(dependency) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/noop")
+    def noop(task_use_cases: TaskUseCases = Depends(dependency)):
+        return {}
+
+    return app
+
+
+async def measure(app: FastAPI, requests: int, concurrency: int) -> float:
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for _ in range(100):
+            await client.get("/noop")
+
+        async def worker(count):
+            for _ in range(count):
+                await client.get("/noop")
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(requests // concurrency) for _ in range(concurrency)])
+        return (time.perf_counter() - started) / (requests // concurrency * concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 32])
+    args = parser.parse_args()
+
+    bare = build_app(no_dependencies)
+    chained = build_app(chained_task_use_cases)
+    scoped = build_app(get_task_use_cases)
+    scoped.state.container = Container(backend)
+    for concurrency in args.concurrency:
+        baseline = asyncio.run(measure(bare, args.requests, concurrency))
+        print(f"  concurrency {concurrency}")
+        for name, app in (("depends chain", chained), ("request scope", scoped)):
+            elapsed = asyncio.run(measure(app, args.requests, concurrency))
+            print(
+                f"    {name:<14} {elapsed * 1e6:8.1f} us/request  "
+                f"{(elapsed - baseline) * 1e6:8.1f} us over a route with no dependencies"
+            )
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Bytes sent and query time for task lists with large descriptions, with and without them.
+
+    python bench/fields.py --tasks 2000 --description-kb 8 --limit 500 --repeat 20
+    python bench/fields.py --database-url postgresql://postgres@localhost/bench
+
+Fills a temporary SQLite file, or --database-url, with one project of --tasks tasks whose
+descriptions are --description-kb KiB each. It then reads the first --limit of them in two ways:
+- through the repository's find(), which shows the query and row mapping alone;
+- through GET /tasks/ in process, limited the same way, and GET /projects/{id}/tasks,
+  which returns all of them.
+
+Each is done once with every field (fields=*) and once with the list default, which leaves
+the description out. It prints the best time of --repeat runs and the response size. Tasks
+the run added to a --database-url database are deleted again at the end.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def best(call, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--description-kb", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp.name}/bench.db"
+    os.environ["CREATE_TABLES_ON_STARTUP"] = "1"
+    os.environ["READ_COALESCING"] = "0"
+    os.environ["ADMISSION_CONTROL"] = "0"
+    os.environ["HISTORY"] = "0"
+    os.environ["JOBS_WORKERS"] = "0"
+    os.environ["JOBS_PATH"] = f"{tmp.name}/jobs.db"
+
+    from fastapi.testclient import TestClient
+    from api.core.domain.task import Task, Project
+    from api.core.port.task import TaskQuery
+    from api.adapters.rest.server import app
+    from api.adapters.rest.task import TASK_LIST_FIELDS
+
+    with TestClient(app) as client:
+        scope = app.state.container.scope()
+        project = scope.project_repository.save(Project(title="bench"))
+        description = "lorem ipsum " * (args.description_kb * 1024 // 12)
+        tasks = scope.task_repository.insert_many([
+            Task(title=f"task {i}", description=description, project_id=project.id) for i in range(args.tasks)
+        ])
+        try:
+            print(f"  {args.tasks} tasks, {len(description)} byte descriptions, first {args.limit} read")
+            for name, fields in (("all fields", None), ("list default", TASK_LIST_FIELDS)):
+                query = TaskQuery(project_id=project.id, limit=args.limit, fields=fields)
+                elapsed = best(lambda: scope.task_repository.find(query), args.repeat)
+                print(f"  find()                   {name:<13} {elapsed * 1000:8.2f} ms")
+            routes = (
+                ("GET /tasks", f"/tasks/?project_id={project.id}&limit={args.limit}&"),
+                ("GET /projects/{id}/tasks", f"/projects/{project.id}/tasks?"),
+            )
+            for route, path in routes:
+                for name, fields in (("fields=*", "fields=*"), ("default", "")):
+                    size = len(client.get(path + fields).content)
+                    elapsed = best(lambda: client.get(path + fields), args.repeat)
+                    print(f"  {route:<24} {name:<9} {elapsed * 1000:8.2f} ms  {size:>10} bytes")
+        finally:
+            if args.database_url:
+                for task in tasks:
+                    scope.task_repository.delete(task.id)
+                scope.project_repository.delete(project.id)
+            scope.close()
+
+
+if __name__ == "__main__":
+    main()
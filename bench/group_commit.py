@@ -0,0 +1,87 @@
+"""Write throughput of the SQLite adapter with and without the group-commit writer.
+
+    python bench/group_commit.py --writers 1 8 64 --ops 2000
+
+Each writer thread saves new tasks through its own session, as concurrent requests
+would. Both modes commit to the same on-disk WAL database with the same fsync settings.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/bench.db"
+os.environ.setdefault("DB_POOL_SIZE", "64")
+
+from api.core.domain.task import Task  # noqa: E402
+from api.adapters.sqlite.db import DATABASE_URL, SessionLocal, ensure_schema  # noqa: E402
+from api.adapters.sqlite.project import SQLiteTaskRepository  # noqa: E402
+from api.adapters.sqlite.writer import GroupCommitWriter  # noqa: E402
+
+
+def run(writers: int, ops: int, writer) -> None:
+    per_writer = ops // writers
+    latencies = []
+    errors = []
+    barrier = threading.Barrier(writers + 1)
+
+    def work():
+        db = SessionLocal()
+        repository = SQLiteTaskRepository(db, writer)
+        barrier.wait()
+        try:
+            for i in range(per_writer):
+                started = time.perf_counter()
+                repository.save(Task(title=f"task {i}", description="x" * 200))
+                latencies.append(time.perf_counter() - started)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=work) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    mode = "group commit" if writer else "per request"
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    print(
+        f"  {mode:<13} {writers:>3} writers  {len(latencies) / elapsed:9.0f} ops/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms"
+        + (f"  {len(errors)} errors ({errors[0]})" if errors else "")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    ensure_schema()
+    writer = GroupCommitWriter(DATABASE_URL, max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000)
+    for writers in args.writers:
+        run(writers, args.ops, None)
+        run(writers, args.ops, writer)
+    print(f"  writer: {writer.stats()}")
+    writer.close()
+
+
+if __name__ == "__main__":
+    main()
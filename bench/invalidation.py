@@ -0,0 +1,82 @@
+"""Delivery latency and losses of the invalidation bus between worker processes.
+
+    python bench/invalidation.py --workers 4 --rate 2000 --duration 5
+
+Starts that many processes, each with its own InvalidationBus in one temporary directory,
+as API workers would have. Each publishes task invalidations at --rate per second, one
+commit's worth at a time, for --duration seconds. Prints, per worker, what it received out
+of what the others sent, how many datagrams that took, the send-to-delivery latency, and the
+datagrams lost to full socket buffers. Raise --rate until losses appear to find the limit.
+"""
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from api.core.domain.history import HistoryAction, HistoryEntity, HistoryEntry  # noqa: E402
+from api.adapters.invalidation import InvalidationBus, PEER_REFRESH_S  # noqa: E402
+
+
+def worker(directory: str, rate: int, duration: float, started, results) -> None:
+    bus = InvalidationBus(directory)
+    received = set()
+    bus.subscribe(lambda batch: received.update(batch or ()))
+    bus.start()
+    started.wait()
+    # until every worker has listed the others
+    time.sleep(PEER_REFRESH_S * 1.5)
+    interval = 1 / rate
+    deadline = time.monotonic() + duration
+    next_at = time.monotonic()
+    while next_at < deadline:
+        bus.publish([HistoryEntry(entity=HistoryEntity.TASK, action=HistoryAction.SAVED, entity_id=uuid4())])
+        next_at += interval
+        time.sleep(max(next_at - time.monotonic(), 0))
+    # let the last datagrams arrive
+    time.sleep(1)
+    results.put((len(received), bus.stats()))
+    bus.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=int, default=2000, help="invalidations per second per worker")
+    parser.add_argument("--duration", type=float, default=5)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    started = context.Event()
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        processes = [
+            context.Process(target=worker, args=(directory, args.rate, args.duration, started, results))
+            for _ in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        started.set()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    sent = sum(stats["published"] for _, stats in collected)
+    print(f"  {args.workers} workers, {sent} invalidations published")
+    for received, stats in collected:
+        expected = sent - stats["published"]
+        latency = stats["latency_ms"]
+        print(
+            f"  received {received}/{expected} in {stats['received_datagrams']} datagrams, "
+            f"{stats['received_batches']} batches; latency p50 {latency['p50']} ms, p99 {latency['p99']} ms; "
+            f"lost {stats['receive_gaps']}; held back {stats['send_deferred']}, dropped on send {stats['send_dropped']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
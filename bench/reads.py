@@ -0,0 +1,123 @@
+"""Per-method cost of the SQLite read path: ORM queries vs the compiled Core statements.
+
+    python bench/reads.py --tasks 5000 --projects 50 --repeat 200
+
+The ORM side runs the queries the repositories used before the read path moved to Core;
+both sides map every row to a domain object and share one session.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/bench.db"
+os.environ["SQLITE_GROUP_COMMIT"] = "0"
+
+from api.core.domain.task import Task, Project  # noqa: E402
+from api.adapters.sqlite.db import SessionLocal, ensure_schema  # noqa: E402
+from api.adapters.sqlite.task import TaskModel, ProjectModel  # noqa: E402
+from api.adapters.sqlite.project import SQLiteTaskRepository, SQLiteProjectRepository  # noqa: E402
+
+
+def orm_reads(db):
+    def overdue():
+        return db.query(TaskModel).filter(TaskModel.deadline < datetime.utcnow(), TaskModel.completed == False).all()
+
+    return {
+        "task get_by_id": lambda i: db.query(TaskModel).filter(TaskModel.id == str(i)).first().to_domain(),
+        "task get_all": lambda _: [t.to_domain() for t in db.query(TaskModel).all()],
+        "task get_by_project_id": lambda p: [
+            t.to_domain() for t in db.query(TaskModel).filter(TaskModel.project_id == str(p)).all()
+        ],
+        "task get_completed": lambda _: [
+            t.to_domain() for t in db.query(TaskModel).filter(TaskModel.completed == True).all()
+        ],
+        "task get_overdue": lambda _: [t.to_domain() for t in overdue()],
+        "project get_by_id": lambda i: db.query(ProjectModel).filter(ProjectModel.id == str(i)).first().to_domain(),
+        "project get_all": lambda _: [p.to_domain() for p in db.query(ProjectModel).all()],
+        "project get_completed": lambda _: [
+            p.to_domain() for p in db.query(ProjectModel).filter(ProjectModel.completed == True).all()
+        ],
+    }
+
+
+def core_reads(db):
+    tasks, projects = SQLiteTaskRepository(db), SQLiteProjectRepository(db)
+    return {
+        "task get_by_id": tasks.get_by_id,
+        "task get_all": lambda _: tasks.get_all(),
+        "task get_by_project_id": tasks.get_by_project_id,
+        "task get_completed": lambda _: tasks.get_completed(),
+        "task get_overdue": lambda _: tasks.get_overdue(),
+        "project get_by_id": projects.get_by_id,
+        "project get_all": lambda _: projects.get_all(),
+        "project get_completed": lambda _: projects.get_completed(),
+    }
+
+
+def timed(fn, args, repeat):
+    started = time.perf_counter()
+    for i in range(repeat):
+        fn(args[i % len(args)])
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    ensure_schema()
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    project_repo, task_repo = SQLiteProjectRepository(db), SQLiteTaskRepository(db)
+    projects = [
+        project_repo.save(Project(title=f"project {i}", deadline=now + timedelta(days=365)))
+        for i in range(args.projects)
+    ]
+    tasks = [
+        task_repo.save(Task(
+            title=f"task {i}",
+            description="x" * 200,
+            deadline=now + timedelta(days=rng.randint(-30, 300)),
+            project_id=rng.choice(projects).id if rng.random() < 0.8 else None,
+        ))
+        for i in range(args.tasks)
+    ]
+    for task in tasks[::10]:
+        task.mark_completed()
+        task_repo.save(task)
+    for project in projects[::5]:
+        project.mark_completed()
+        project_repo.save(project)
+
+    inputs = {
+        "task get_by_id": [t.id for t in tasks],
+        "task get_by_project_id": [p.id for p in projects],
+        "project get_by_id": [p.id for p in projects],
+    }
+    orm, core = orm_reads(db), core_reads(db)
+    print(f"  {'method':<24} {'orm':>12} {'core':>12} {'speedup':>8}")
+    for name in orm:
+        repeat = args.lookups if name.endswith("by_id") else args.repeat
+        method_inputs = inputs.get(name, [None])
+        orm_time = timed(orm[name], method_inputs, repeat)
+        core_time = timed(core[name], method_inputs, repeat)
+        print(f"  {name:<24} {orm_time * 1e6:9.1f} us {core_time * 1e6:9.1f} us {orm_time / core_time:7.2f}x")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare the SQLite and in-memory repository adapters.
+
+    python bench/repositories.py --tasks 5000 --projects 50
+
+Both adapters persist to a temporary directory (SQLite file vs. WAL + snapshot),
+so writes include their durability cost.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/bench.db"
+
+from api.core.domain.task import Task, Project  # noqa: E402
+from api.adapters.sqlite.db import SessionLocal, ensure_schema  # noqa: E402
+from api.adapters.sqlite.project import SQLiteTaskRepository, SQLiteProjectRepository  # noqa: E402
+from api.adapters.memory.store import MemoryStore  # noqa: E402
+from api.adapters.memory.project import MemoryTaskRepository, MemoryProjectRepository  # noqa: E402
+
+
+def timed(label, fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"  {label:<28} {elapsed * 1000:10.3f} ms")
+    return elapsed
+
+
+def run(name, task_repo, project_repo, args):
+    print(name)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    projects = [Project(title=f"project {i}", deadline=now + timedelta(days=365)) for i in range(args.projects)]
+    tasks = [
+        Task(
+            title=f"task {i}",
+            description="x" * 200,
+            deadline=now + timedelta(days=rng.randint(-30, 300)),
+            project_id=rng.choice(projects).id if rng.random() < 0.8 else None,
+        )
+        for i in range(args.tasks)
+    ]
+
+    timed(f"save {args.projects} projects", lambda: [project_repo.save(p) for p in projects])
+    timed(f"save {args.tasks} tasks", lambda: [task_repo.save(t) for t in tasks])
+    timed("complete 10% of tasks", lambda: [
+        task_repo.save(_completed(task_repo.get_by_id(t.id))) for t in tasks[::10]
+    ])
+
+    sample = [t.id for t in rng.sample(tasks, min(1000, len(tasks)))]
+    per_lookup = timed("get_by_id x1000", lambda: [task_repo.get_by_id(i) for i in sample]) / len(sample)
+    print(f"  {'  per get_by_id':<28} {per_lookup * 1e6:10.1f} us")
+    timed("get_all", task_repo.get_all, repeat=args.repeat)
+    timed("get_by_project_id", lambda: task_repo.get_by_project_id(projects[0].id), repeat=args.repeat)
+    timed("get_completed", task_repo.get_completed, repeat=args.repeat)
+    timed("get_overdue", task_repo.get_overdue, repeat=args.repeat)
+
+
+def _completed(task):
+    task.mark_completed()
+    return task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    ensure_schema()
+    db = SessionLocal()
+    run("sqlite", SQLiteTaskRepository(db), SQLiteProjectRepository(db), args)
+    db.close()
+
+    store = MemoryStore(os.path.join(TMP.name, "memory"))
+    run("memory", MemoryTaskRepository(store), MemoryProjectRepository(store), args)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
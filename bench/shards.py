@@ -0,0 +1,77 @@
+"""Write throughput of the sharded SQLite adapter as the shard count grows.
+
+    python bench/shards.py --shards 1 2 4 8 --writers 32 --ops 4000
+
+Writer threads save new tasks into random projects, as concurrent requests would.
+Each shard count gets fresh files under a temporary directory.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/bench.db"
+
+from api.core.domain.task import Task, Project  # noqa: E402
+from api.adapters.sqlite.shard import (  # noqa: E402
+    ShardSet, ShardSessions, ShardedTaskRepository, ShardedProjectRepository
+)
+
+
+def run(count: int, writers: int, ops: int, projects: int, group_commit: bool) -> None:
+    shard_set = ShardSet(f"sqlite:///{TMP.name}/shards{count}.db", count, group_commit=group_commit)
+    shard_set.ensure_schema()
+
+    sessions = ShardSessions(shard_set)
+    project_ids = [
+        ShardedProjectRepository(shard_set, sessions).save(Project(title=f"project {i}")).id
+        for i in range(projects)
+    ]
+    sessions.close()
+
+    per_writer = ops // writers
+    barrier = threading.Barrier(writers + 1)
+
+    def work(seed):
+        rng = random.Random(seed)
+        sessions = ShardSessions(shard_set)
+        repository = ShardedTaskRepository(shard_set, sessions)
+        barrier.wait()
+        for i in range(per_writer):
+            repository.save(Task(title=f"task {i}", description="x" * 200, project_id=rng.choice(project_ids)))
+        sessions.close()
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(writers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(f"  {count:>2} shards  {per_writer * writers / elapsed:9.0f} ops/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=4000)
+    parser.add_argument("--projects", type=int, default=64)
+    parser.add_argument("--no-group-commit", action="store_true")
+    args = parser.parse_args()
+
+    for count in args.shards:
+        run(count, args.writers, args.ops, args.projects, not args.no_group_commit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Time from process start to the first 200 on /health.
+
+    python bench/startup.py --runs 10
+    python bench/startup.py --runs 10 --fresh    # new database each run
+
+Each run starts uvicorn in a new process against a temporary SQLite file and
+polls /health until it answers, then prints the server's own startup breakdown
+from /debug/startup.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(url: str, timeout: float = 0.5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.status, response.read()
+
+
+def run_once(db_path: Path, timeout: float):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", PYTHONPATH=str(ROOT))
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.adapters.rest.server:app",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                status, _ = get(f"http://127.0.0.1:{port}/health")
+                if status == 200:
+                    elapsed = time.perf_counter() - started
+                    _, body = get(f"http://127.0.0.1:{port}/debug/startup")
+                    return elapsed, json.loads(body)
+            except OSError:
+                pass
+            time.sleep(0.005)
+        raise TimeoutError(f"server did not become healthy within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--fresh", action="store_true", help="start every run on an empty database")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        if not args.fresh:
+            run_once(db_path, args.timeout)
+
+        timings = []
+        for i in range(args.runs):
+            if args.fresh:
+                for f in Path(tmp).glob("bench.db*"):
+                    f.unlink()
+            elapsed, breakdown = run_once(db_path, args.timeout)
+            timings.append(elapsed)
+            print(f"run {i + 1}: {elapsed * 1000:.1f} ms  server: {breakdown}")
+
+    print(f"time to first 200 on /health over {args.runs} runs: "
+          f"median {statistics.median(timings) * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
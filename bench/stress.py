@@ -0,0 +1,307 @@
+"""Concurrency stress and soak run against a live server, with invariant checks at the end.
+
+    python bench/stress.py --clients 32 --duration 60
+    python bench/stress.py --database-url sqlite:///:memory: --clients 64 --duration 30
+    python bench/stress.py --url http://localhost:8080 --duration 3600
+
+Without --url a uvicorn server is started on a temporary SQLite file, or on --database-url
+(sqlite:///:memory: runs every request through the one StaticPool connection). Each client
+owns a handful of tasks and mixes creates, renames, completes, reopens, links, unlinks and
+task and project deadline moves on them, against projects that all clients share.
+
+Afterwards it checks that no completed project has an open task, that no task deadline is
+later than its project's, and that every task still has the title, state and project its
+owner last wrote (a lost update otherwise). It reports status codes, 503 retries,
+"database is locked" errors in the server log and latency per time window, and exits 1
+if an invariant is broken.
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MAX_RETRIES = 5
+TRANSIENT = (503,)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, workers: int, log_path: str):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, CREATE_TABLES_ON_STARTUP="1", PYTHONUNBUFFERED="1")
+    log = open(log_path, "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.adapters.rest.server:app",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--no-access-log"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return process, url
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None:
+            raise SystemExit(f"server exited during startup, see {log_path}")
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"server did not come up, see {log_path}")
+
+
+def iso(days: float) -> str:
+    return (datetime.utcnow() + timedelta(days=days)).isoformat()
+
+
+class Stats:
+    def __init__(self, started: float, window: float):
+        self.started = started
+        self.window = window
+        self.lock = threading.Lock()
+        self.statuses = Counter()
+        self.operations = Counter()
+        self.retries = 0
+        self.transport_errors = 0
+        self.uncertain = 0
+        # window index -> latencies (s) and failures in it
+        self.latencies = {}
+        self.failures = Counter()
+
+    def record(self, operation: str, started: float, latency: float, status: int) -> None:
+        index = int((started - self.started) // self.window)
+        with self.lock:
+            self.operations[operation] += 1
+            self.statuses[status] += 1
+            self.latencies.setdefault(index, []).append(latency)
+            if status >= 500:
+                self.failures[index] += 1
+
+
+class Client(threading.Thread):
+    def __init__(self, number: int, url: str, projects: list, stats: Stats, args, stop: threading.Event):
+        super().__init__(name=f"client-{number}", daemon=True)
+        self.number = number
+        self.http = httpx.Client(base_url=url, timeout=30, follow_redirects=True)
+        self.projects = projects
+        self.stats = stats
+        self.args = args
+        self.stop = stop
+        self.rng = random.Random(args.seed * 1000 + number)
+        # task id -> what this client last wrote: title, completed, project_id
+        self.expected = {}
+        self.renames = 0
+
+    def call(self, operation: str, method: str, path: str, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            started = time.monotonic()
+            try:
+                response = self.http.request(method, path, **kwargs)
+            except httpx.TransportError:
+                with self.stats.lock:
+                    self.stats.transport_errors += 1
+                return None
+            self.stats.record(operation, started, time.monotonic() - started, response.status_code)
+            if response.status_code not in TRANSIENT or attempt == MAX_RETRIES:
+                return response
+            with self.stats.lock:
+                self.stats.retries += 1
+            time.sleep(float(response.headers.get("retry-after", 0.1)) * self.rng.random())
+        return response
+
+    def remember(self, body: dict) -> None:
+        self.expected[body["id"]] = (body["title"], body["completed"], body["project_id"])
+
+    def resync(self, task_id: str) -> None:
+        # the write may or may not have landed; take whatever the server has now
+        with self.stats.lock:
+            self.stats.uncertain += 1
+        response = self.call("resync", "GET", f"/tasks/{task_id}")
+        if response is not None and response.status_code == 200:
+            self.remember(response.json())
+
+    def write(self, operation: str, task_id, method: str, path: str, **kwargs) -> None:
+        response = self.call(operation, method, path, **kwargs)
+        if response is not None and response.status_code < 300:
+            if task_id is not None or operation == "create":
+                self.remember(response.json())
+        elif task_id is not None and (response is None or response.status_code >= 500):
+            self.resync(task_id)
+
+    def step(self) -> None:
+        rng = self.rng
+        tasks = list(self.expected)
+        if len(tasks) < self.args.tasks_per_client and (not tasks or rng.random() < 0.3):
+            project = rng.choice(self.projects) if rng.random() < 0.5 else None
+            body = {"title": f"c{self.number}-new", "deadline": iso(rng.uniform(1, 60))}
+            if project:
+                body["project_id"] = project
+            self.write("create", None, "POST", "/tasks/", json=body)
+            return
+
+        task_id = rng.choice(tasks)
+        title, completed, project_id = self.expected[task_id]
+        roll = rng.random()
+        if roll < 0.20:
+            self.renames += 1
+            self.write("rename", task_id, "PUT", f"/tasks/{task_id}",
+                       json={"title": f"c{self.number}-r{self.renames}"})
+        elif roll < 0.38:
+            operation = "reopen" if completed else "complete"
+            self.write(operation, task_id, "PATCH", f"/tasks/{task_id}/{operation}")
+        elif roll < 0.55:
+            if project_id:
+                self.write("unlink", task_id, "DELETE", f"/projects/{project_id}/tasks/{task_id}/unlink")
+            else:
+                project = rng.choice(self.projects)
+                self.write("link", task_id, "POST", f"/projects/{project}/tasks/{task_id}/link")
+        elif roll < 0.70:
+            self.write("task deadline", task_id, "PUT", f"/tasks/{task_id}", json={"deadline": iso(rng.uniform(1, 90))})
+        elif roll < 0.80:
+            project = rng.choice(self.projects)
+            self.write("project deadline", None, "PUT", f"/projects/{project}", json={"deadline": iso(rng.uniform(10, 90))})
+        else:
+            project = rng.choice(self.projects)
+            self.call("read", "GET", f"/projects/{project}/tasks")
+
+    def run(self) -> None:
+        while not self.stop.is_set():
+            self.step()
+        self.http.close()
+
+
+def check_invariants(url: str, clients: list) -> list:
+    http = httpx.Client(base_url=url, timeout=120, follow_redirects=True)
+    tasks = {task["id"]: task for task in http.get("/tasks/").json()}
+    projects = {project["id"]: project for project in http.get("/projects/").json()}
+    http.close()
+
+    violations = []
+    for project in projects.values():
+        if project["completed"]:
+            open_tasks = [t for t in tasks.values() if t["project_id"] == project["id"] and not t["completed"]]
+            if open_tasks:
+                violations.append(f"project {project['id']} is completed with {len(open_tasks)} open tasks")
+    for task in tasks.values():
+        project = projects.get(task["project_id"]) if task["project_id"] else None
+        if project and task["deadline"] and project["deadline"] and task["deadline"] > project["deadline"]:
+            violations.append(
+                f"task {task['id']} deadline {task['deadline']} is after its project's {project['deadline']}"
+            )
+    for client in clients:
+        for task_id, (title, completed, project_id) in client.expected.items():
+            task = tasks.get(task_id)
+            if task is None:
+                violations.append(f"task {task_id} written by client {client.number} is gone")
+            elif (task["title"], task["completed"], task["project_id"]) != (title, completed, project_id):
+                violations.append(
+                    f"lost update on task {task_id}: client {client.number} last wrote "
+                    f"{(title, completed, project_id)}, server has "
+                    f"{(task['title'], task['completed'], task['project_id'])}"
+                )
+    return violations
+
+
+def percentile(values: list, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def report(stats: Stats, duration: float, log_path) -> None:
+    total = sum(stats.operations.values())
+    print(f"  {total} requests in {duration:.1f}s ({total / duration:.0f}/s)")
+    print(f"  operations: {dict(stats.operations)}")
+    print(f"  status codes: {dict(sorted(stats.statuses.items()))}")
+    print(f"  503 retries: {stats.retries}  transport errors: {stats.transport_errors}  "
+          f"uncertain writes resynced: {stats.uncertain}")
+    if log_path:
+        log = Path(log_path).read_text(errors="replace")
+        print(f"  server log: {log.count('database is locked')} 'database is locked', "
+              f"{log.count('Traceback')} tracebacks ({log_path})")
+
+    print(f"  {'window':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'5xx':>6}")
+    windows = sorted(stats.latencies)
+    for index in windows:
+        latencies = sorted(stats.latencies[index])
+        print(
+            f"  {index * stats.window:>7.0f}s {len(latencies) / stats.window:8.0f} "
+            f"{percentile(latencies, 0.5) * 1000:8.1f} {percentile(latencies, 0.99) * 1000:8.1f} "
+            f"{stats.failures[index]:>6}"
+        )
+    # the last window is usually cut short by the stop, so compare the first and last full ones
+    full = windows[:-1] if len(windows) > 2 else windows
+    if len(full) >= 2:
+        first, last = sorted(stats.latencies[full[0]]), sorted(stats.latencies[full[-1]])
+        print(f"  p99 drift first -> last window: {percentile(last, 0.99) / percentile(first, 0.99):.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="run against this server instead of starting one")
+    parser.add_argument("--database-url", help="database for the started server (default: a temporary file)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started server")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--projects", type=int, default=8)
+    parser.add_argument("--tasks-per-client", type=int, default=10)
+    parser.add_argument("--window", type=float, default=10, help="seconds per latency window")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    process = log_path = None
+    url = args.url
+    if url is None:
+        log_path = os.path.join(tmp.name, "server.log")
+        process, url = start_server(args.database_url or f"sqlite:///{tmp.name}/stress.db", args.workers, log_path)
+
+    try:
+        http = httpx.Client(base_url=url, timeout=30, follow_redirects=True)
+        projects = [
+            http.post("/projects/", json={"title": f"stress {i}", "deadline": iso(90)}).raise_for_status().json()["id"]
+            for i in range(args.projects)
+        ]
+        http.close()
+
+        stop = threading.Event()
+        stats = Stats(time.monotonic(), args.window)
+        clients = [Client(number, url, projects, stats, args, stop) for number in range(args.clients)]
+        for client in clients:
+            client.start()
+        time.sleep(args.duration)
+        stop.set()
+        for client in clients:
+            client.join()
+        duration = time.monotonic() - stats.started
+        violations = check_invariants(url, clients)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    report(stats, duration, log_path)
+    print(f"  invariant violations: {len(violations)}")
+    for violation in violations[:20]:
+        print(f"    {violation}")
+    if len(violations) > 20:
+        print(f"    ... {len(violations) - 20} more")
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
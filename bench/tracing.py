@@ -0,0 +1,87 @@
+"""Per-request cost of tracing, with sampling off and with every request sampled.
+
+    python bench/tracing.py --requests 1000 --rounds 5
+
+Runs GET /tasks/{id} and PATCH /tasks/{id}/complete|reopen against the app in process in
+three ways: without the tracing middleware, with it but TRACE_SAMPLE_RATE=0 (the route and
+SQL hooks still run but record nothing), and with every request sampled. Rounds are
+interleaved and the best one is kept.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/bench.db"
+os.environ["TRACE_SAMPLE_RATE"] = "0"
+os.environ["ADMISSION_CONTROL"] = "0"
+os.environ["JOBS_WORKERS"] = "0"
+
+import httpx  # noqa: E402
+
+from api.adapters.rest.server import app  # noqa: E402
+from api.adapters.rest.tracing import TracingMiddleware, tracer  # noqa: E402
+
+
+async def measure(asgi, requests: int) -> dict:
+    async with httpx.AsyncClient(app=asgi, base_url="http://bench") as client:
+        task_id = (await client.post("/tasks/", json={"title": "bench"})).json()["id"]
+        paths = {
+            "read": lambda i: client.get(f"/tasks/{task_id}"),
+            "write": lambda i: client.patch(f"/tasks/{task_id}/{'complete' if i % 2 == 0 else 'reopen'}"),
+        }
+        results = {}
+        for name, call in paths.items():
+            for i in range(50):
+                await call(i)
+            started = time.perf_counter()
+            for i in range(requests):
+                await call(i)
+            results[name] = (time.perf_counter() - started) / requests
+        return results
+
+
+def without_tracing_middleware():
+    # the built middleware stack, skipping the tracing layer
+    stack = app.build_middleware_stack()
+    layer, outer = stack, None
+    while not isinstance(layer, TracingMiddleware):
+        outer, layer = layer, layer.app
+    outer.app = layer.app
+    return stack
+
+
+async def run(requests: int, rounds: int) -> None:
+    bare_app = without_tracing_middleware()
+    configurations = {"no middleware": (bare_app, 0.0), "sampling off": (app, 0.0), "all sampled": (app, 1.0)}
+    # interleaved, best round kept, so drift in the machine's load hits every configuration
+    best = {name: {} for name in configurations}
+    async with app.router.lifespan_context(app):
+        for _ in range(rounds):
+            for name, (asgi, sample_rate) in configurations.items():
+                tracer.sample_rate = sample_rate
+                for operation, elapsed in (await measure(asgi, requests)).items():
+                    best[name][operation] = min(elapsed, best[name].get(operation, elapsed))
+    for operation in ("read", "write"):
+        print(f"  {operation:<6}" + "".join(
+            f"   {name} {best[name][operation] * 1e6:7.1f} us" for name in configurations
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
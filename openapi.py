@@ -3,12 +3,17 @@ import subprocess
 from pathlib import Path
 from api.adapters.rest.server import app
 
-def generate_openapi_spec():
+def write_openapi_spec():
     root_dir = Path(__file__).parent
     openapi_schema = app.openapi()
     output_file = root_dir / "openapi.json"
     with open(output_file, "w") as f:
         json.dump(openapi_schema, f, indent=2)
+    return output_file
+
+def generate_openapi_spec():
+    root_dir = Path(__file__).parent
+    output_file = write_openapi_spec()
     
     subprocess.run([
         "npx", "@hey-api/openapi-ts",
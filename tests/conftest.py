@@ -0,0 +1,51 @@
+import os
+import tempfile
+from dataclasses import replace
+
+import pytest
+
+# settings are read once, at import, so the app under test is pointed at a throwaway directory first
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/test.db"
+os.environ["JOBS_WORKERS"] = "0"
+os.environ["JOBS_ARTIFACT_DIR"] = f"{TMP.name}/job-artifacts"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api.adapters.rest.server import app  # noqa: E402
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def client(request, monkeypatch):
+    if request.param == "memory":
+        # the lifespan loads whichever store the settings name
+        from api.adapters.rest import server
+
+        settings = replace(server.settings, database_url="memory://")
+        monkeypatch.setattr(server, "settings", settings)
+        monkeypatch.setattr("api.adapters.backend.get_settings", lambda: settings)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def repositories(request):
+    # the task and project repositories of each store, which should behave alike
+    if request.param == "memory":
+        from api.adapters.memory.store import MemoryStore
+        from api.adapters.memory.project import MemoryTaskRepository, MemoryProjectRepository
+
+        store = MemoryStore()
+        yield MemoryTaskRepository(store), MemoryProjectRepository(store)
+        store.close()
+        return
+
+    from api.adapters.backend import BACKENDS
+
+    backend = BACKENDS["sqlite"]()
+    backend.ensure_schema()
+    sessions = backend.get_db()
+    db = next(sessions)
+    yield backend.task_repository(db), backend.project_repository(db)
+    sessions.close()
+    backend.close()
@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+
+from api.core.domain.task import Task
+from api.adapters.sqlite.backup import backup_databases
+
+WRITERS = 2
+
+
+def test_backup_while_writing(tmp_path):
+    from api.adapters.backend import BACKENDS
+    from api.adapters.sqlite.db import engine
+
+    backend = BACKENDS["sqlite"]()
+    backend.ensure_schema()
+    sessions = backend.get_db()
+    tasks = backend.task_repository(next(sessions))
+    seeded = tasks.insert_many([Task(title=f"seeded {i}", description="x" * 500) for i in range(2000)])
+
+    written = []
+    stop = threading.Event()
+
+    def write():
+        writer_sessions = backend.get_db()
+        repository = backend.task_repository(next(writer_sessions))
+        while not stop.is_set():
+            written.append(repository.save(Task(title="during backup")))
+        writer_sessions.close()
+
+    writers = [threading.Thread(target=write) for _ in range(WRITERS)]
+    for writer in writers:
+        writer.start()
+    try:
+        # small steps with a pause between them, so the copy takes long enough to be written through
+        result = backup_databases({"test": engine}, str(tmp_path), step_pages=8, pause=0.002)
+        during = len(written)
+    finally:
+        stop.set()
+        for writer in writers:
+            writer.join()
+        sessions.close()
+        backend.close()
+
+    assert during > 0
+    main = next(file for file in result["files"] if file["schema"] == "main")
+    snapshot = sqlite3.connect(main["path"])
+    try:
+        assert snapshot.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        ids = {row[0] for row in snapshot.execute("SELECT id FROM tasks")}
+        # one point in time: no row carries a seq the counter had not reached
+        (counter,) = snapshot.execute("SELECT value FROM change_sequence").fetchone()
+        (highest,) = snapshot.execute("SELECT max(seq) FROM tasks").fetchone()
+    finally:
+        snapshot.close()
+    assert highest <= counter
+    assert {str(task.id) for task in seeded} <= ids
@@ -0,0 +1,52 @@
+from uuid import uuid4
+
+
+def test_missing_ids_fail_their_own_operation(client):
+    missing = str(uuid4())
+    response = client.post("/batch/", json={"atomic": False, "operations": [
+        {"op": "create_task", "ref": "t", "body": {"title": "Write report"}},
+        {"op": "complete_task", "params": {"task_id": missing}},
+        {"op": "reopen_task", "params": {"task_id": missing}},
+        {"op": "complete_project", "params": {"project_id": missing}},
+        {"op": "complete_task", "params": {"task_id": "$t"}},
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["committed"] is True
+    assert [result["status"] for result in body["results"]] == [201, 404, 404, 404, 200]
+    assert missing in body["results"][1]["error"]
+    assert body["results"][4]["result"]["completed"] is True
+
+
+def test_missing_id_rolls_back_an_atomic_batch(client):
+    response = client.post("/batch/", json={"atomic": True, "operations": [
+        {"op": "create_task", "body": {"title": "Never kept"}},
+        {"op": "complete_task", "params": {"task_id": str(uuid4())}},
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["committed"] is False
+    assert body["results"][-1]["status"] == 404
+    assert "Never kept" not in [task["title"] for task in client.get("/tasks/").json()]
+
+
+def test_a_rolled_back_batch_leaves_no_changes(client):
+    task_id = client.post("/tasks/", json={"title": "Kept"}).json()["id"]
+    since = client.get("/tasks/changes", params={"limit": 10000}).json()["next_since"]
+
+    response = client.post("/batch/", json={"atomic": True, "operations": [
+        {"op": "update_task", "params": {"task_id": task_id}, "body": {"title": "Renamed"}},
+        {"op": "create_task", "body": {"title": "Never kept"}},
+        {"op": "complete_task", "params": {"task_id": str(uuid4())}},
+    ]})
+
+    assert response.json()["committed"] is False
+    changes = client.get("/tasks/changes", params={"since": since}).json()
+    assert changes["changed"] == [] and changes["deleted"] == []
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "Kept"
+    # the next write is still reported after the rollback
+    client.put(f"/tasks/{task_id}", json={"title": "Renamed"})
+    changes = client.get("/tasks/changes", params={"since": since}).json()
+    assert [task["title"] for task in changes["changed"]] == ["Renamed"]
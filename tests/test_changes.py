@@ -0,0 +1,14 @@
+def test_deleting_a_project_reports_its_tasks_unlinked(client):
+    project_id = client.post("/projects/", json={"title": "Launch"}).json()["id"]
+    task_ids = {
+        client.post("/tasks/", json={"title": title, "project_id": project_id}).json()["id"]
+        for title in ("Draft", "Review")
+    }
+    since = client.get("/tasks/changes", params={"limit": 10000}).json()["next_since"]
+
+    assert client.delete(f"/projects/{project_id}").status_code == 204
+
+    changes = client.get("/tasks/changes", params={"since": since}).json()
+    unlinked = {task["id"]: task["project_id"] for task in changes["changed"]}
+    assert unlinked == dict.fromkeys(task_ids)
+    assert changes["deleted"] == []
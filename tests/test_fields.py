@@ -0,0 +1,9 @@
+def test_task_lists_leave_the_description_out_unless_asked(client):
+    task = client.post("/tasks/", json={"title": "Draft", "description": "first pass"}).json()
+
+    listed = next(item for item in client.get("/tasks/").json() if item["id"] == task["id"])
+    assert "description" not in listed
+    everything = next(item for item in client.get("/tasks/", params={"fields": "*"}).json() if item["id"] == task["id"])
+    assert everything["description"] == "first pass"
+    # what an edit form starts from
+    assert client.get(f"/tasks/{task['id']}").json()["description"] == "first pass"
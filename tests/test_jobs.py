@@ -0,0 +1,24 @@
+import json
+from uuid import uuid4
+
+from api.adapters.jobs.handlers import JobContext, export_data
+
+
+def test_export_writes_every_record(client):
+    project_id = client.post("/projects/", json={"title": "Launch"}).json()["id"]
+    task_ids = {
+        client.post("/tasks/", json={"title": f"task {i}", "project_id": project_id}).json()["id"]
+        for i in range(3)
+    }
+    context = JobContext(uuid4(), client.app.state.container.backend)
+
+    result = export_data(context, {})
+
+    with open(context.artifact) as f:
+        records = [json.loads(line) for line in f]
+    assert result == {
+        "projects": sum(record["type"] == "project" for record in records),
+        "tasks": sum(record["type"] == "task" for record in records),
+    }
+    assert project_id in {record["id"] for record in records if record["type"] == "project"}
+    assert task_ids <= {record["id"] for record in records if record["type"] == "task"}
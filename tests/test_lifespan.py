@@ -0,0 +1,14 @@
+from fastapi.testclient import TestClient
+
+from api.adapters.rest.server import app
+
+
+def test_each_lifespan_runs_on_a_backend_of_its_own():
+    with TestClient(app) as client:
+        first = app.state.container
+        task_id = client.post("/tasks/", json={"title": "Survives a restart"}).json()["id"]
+
+    with TestClient(app) as client:
+        assert app.state.container is not first
+        assert client.get(f"/tasks/{task_id}").json()["title"] == "Survives a restart"
+        assert client.get("/admin/maintenance").status_code == 200
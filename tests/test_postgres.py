@@ -0,0 +1,119 @@
+import os
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, delete, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from api.core.domain.task import Task, Project
+from api.core.domain.error import TaskAlreadyLinkedException
+
+# the app under test runs on SQLite; these talk to a PostgreSQL database of their own choosing
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_POSTGRES_URL, reason="set TEST_POSTGRES_URL to run the PostgreSQL tests")
+
+
+@pytest.fixture(scope="module")
+def sessions():
+    from api.adapters.postgres import db
+
+    engine = create_engine(db.normalize_url(TEST_POSTGRES_URL))
+    app_engine, db.engine = db.engine, engine
+    try:
+        db.ensure_schema()
+    finally:
+        db.engine = app_engine
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def session(sessions):
+    from api.adapters.postgres.task import TaskModel, ProjectModel
+
+    session = sessions()
+    project = Project(title=f"test {uuid4()}")
+    yield session, project
+    # everything a test makes hangs off its project, or is titled after it
+    session.rollback()
+    session.execute(delete(TaskModel).where(
+        (TaskModel.project_id == project.id) | TaskModel.title.startswith(project.title)
+    ))
+    session.execute(delete(ProjectModel).where(ProjectModel.id == project.id))
+    session.commit()
+    session.close()
+
+
+def _repositories(db):
+    from api.adapters.postgres.project import PostgresTaskRepository, PostgresProjectRepository
+
+    return PostgresTaskRepository(db), PostgresProjectRepository(db)
+
+
+def test_insert_many_copies_rows_with_fresh_seqs(session):
+    db, project = session
+    tasks, projects = _repositories(db)
+    projects.save(project)
+    since = db.execute(text("SELECT value FROM change_sequence WHERE id = 1")).scalar()
+
+    inserted = tasks.insert_many([Task(title=f"task {i}", project_id=project.id) for i in range(1200)])
+
+    found = tasks.get_many([task.id for task in inserted])
+    assert {task.id for task in found} == {task.id for task in inserted}
+    assert {task.project_id for task in found} == {project.id}
+    changes = tasks.get_changes(since, 5000)
+    assert {task.id for task in changes.changed} >= {task.id for task in inserted}
+    assert not changes.has_more
+
+
+def test_iter_all_streams_every_task(session):
+    db, project = session
+    tasks, projects = _repositories(db)
+    projects.save(project)
+    inserted = tasks.insert_many([Task(title=f"task {i}", project_id=project.id) for i in range(1200)])
+
+    streamed = {task.id for task in tasks.iter_all() if task.project_id == project.id}
+
+    assert streamed == {task.id for task in inserted}
+    assert {task.id for task in tasks.get_all() if task.project_id == project.id} == streamed
+
+
+def test_link_and_unlink(session):
+    from api.adapters.postgres.project import PostgresEventPublisher
+    from api.adapters.rest.project import TaskUseCases
+
+    db, project = session
+    tasks, projects = _repositories(db)
+    projects.save(project)
+    task = tasks.save(Task(title=f"{project.title} task"))
+    use_cases = TaskUseCases(tasks, projects, PostgresEventPublisher(db))
+
+    assert use_cases.link_task_to_project(task.id, project.id).project_id == project.id
+    with pytest.raises(TaskAlreadyLinkedException):
+        use_cases.link_task_to_project(task.id, project.id)
+    assert [linked.id for linked in tasks.get_by_project_id(project.id)] == [task.id]
+
+    assert use_cases.unlink_task_from_project(task.id).project_id is None
+    assert tasks.get_by_project_id(project.id) == []
+
+
+def test_get_by_id_for_update_locks_the_row(session, sessions):
+    db, project = session
+    tasks, _ = _repositories(db)
+    task = tasks.save(Task(title=f"{project.title} task"))
+
+    assert tasks.get_by_id_for_update(task.id).id == task.id
+    other = sessions()
+    try:
+        other.execute(text("SET LOCAL lock_timeout = '100ms'"))
+        with pytest.raises(OperationalError):
+            _repositories(other)[0].get_by_id_for_update(task.id)
+        other.rollback()
+        # the lock goes with the transaction that took it
+        db.commit()
+        assert _repositories(other)[0].get_by_id_for_update(task.id).id == task.id
+    finally:
+        other.rollback()
+        other.close()
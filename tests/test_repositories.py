@@ -0,0 +1,145 @@
+import threading
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from api.core.domain.task import Task, Project
+from api.core.port.task import ITER_PAGE_SIZE
+
+
+def _last_seq(tasks) -> int:
+    # far enough past anything an earlier test left in the shared SQLite file
+    return tasks.get_changes(0, 1_000_000).last_seq
+
+
+def test_create_and_get(repositories):
+    tasks, projects = repositories
+    project = projects.save(Project(title="Launch"))
+    task = tasks.save(Task(title="Draft", description="first pass", project_id=project.id))
+
+    assert tasks.get_by_id(task.id).description == "first pass"
+    assert projects.get_by_id(project.id).title == "Launch"
+    assert tasks.get_by_id(uuid4()) is None
+
+
+def test_link_and_unlink(repositories):
+    tasks, projects = repositories
+    project = projects.save(Project(title="Launch"))
+    task = tasks.save(Task(title="Draft"))
+
+    task.link_to_project(project.id)
+    tasks.save(task)
+    assert [linked.id for linked in tasks.get_by_project_id(project.id)] == [task.id]
+
+    task.unlink_from_project()
+    tasks.save(task)
+    assert tasks.get_by_id(task.id).project_id is None
+    assert tasks.get_by_project_id(project.id) == []
+
+
+def test_get_many(repositories):
+    tasks, projects = repositories
+    saved = [tasks.save(Task(title=f"task {i}")) for i in range(3)]
+    missing = uuid4()
+
+    found = tasks.get_many([saved[2].id, missing, saved[0].id, saved[0].id])
+
+    assert sorted(task.id for task in found) == sorted([saved[0].id, saved[2].id])
+    project = projects.save(Project(title="Launch"))
+    assert [found.id for found in projects.get_many([project.id, missing])] == [project.id]
+
+
+def test_deleting_a_project_unlinks_its_tasks(repositories):
+    tasks, projects = repositories
+    project = projects.save(Project(title="Launch"))
+    other = projects.save(Project(title="Next"))
+    linked = [tasks.save(Task(title=title, project_id=project.id)) for title in ("Draft", "Review")]
+    since = _last_seq(tasks)
+
+    assert projects.delete(project.id)
+
+    assert projects.get_by_id(project.id) is None
+    assert [tasks.get_by_id(task.id).project_id for task in linked] == [None, None]
+    assert tasks.get_by_project_id(project.id) == []
+    changes = tasks.get_changes(since, 100)
+    assert {task.id: task.project_id for task in changes.changed} == {task.id: None for task in linked}
+    assert changes.deleted == []
+    assert projects.get_changes(since, 100).deleted == [project.id]
+
+    # free to join another project, as any unlinked task is
+    task = tasks.get_by_id(linked[0].id)
+    task.link_to_project(other.id)
+    assert tasks.save(task).project_id == other.id
+
+
+def test_changes_report_writes_and_deletes_once(repositories):
+    tasks, _ = repositories
+    since = _last_seq(tasks)
+    kept = tasks.save(Task(title="Kept"))
+    renamed = tasks.save(Task(title="Before"))
+    deleted = tasks.save(Task(title="Deleted"))
+    renamed.title = "After"
+    tasks.save(renamed)
+    assert tasks.delete(deleted.id)
+
+    changes = tasks.get_changes(since, 100)
+
+    assert [task.id for task in changes.changed] == [kept.id, renamed.id]
+    assert changes.changed[1].title == "After"
+    assert changes.deleted == [deleted.id]
+    assert not changes.has_more
+    assert tasks.get_changes(changes.last_seq, 100).changed == []
+
+
+def test_iter_all_goes_through_every_task_once(repositories):
+    tasks, _ = repositories
+    saved = tasks.insert_many([Task(title=f"task {i}") for i in range(ITER_PAGE_SIZE + 20)])
+
+    ids = [task.id for task in tasks.iter_all()]
+
+    assert len(ids) == len(set(ids))
+    assert {task.id for task in saved} <= set(ids)
+    assert [task.id for task in tasks.iter_all(frozenset({"id"}))] == ids
+
+
+def test_cap_deadlines_keeps_other_changes(repositories):
+    tasks, projects = repositories
+    project = projects.save(Project(title="Launch"))
+    early, late = datetime(2030, 1, 1), datetime(2030, 6, 1)
+    due_late = tasks.save(Task(title="late", deadline=late, project_id=project.id))
+    due_early = tasks.save(Task(title="early", deadline=early, project_id=project.id))
+    # a change saved after the deadline move would have read the task must survive it
+    changed = tasks.get_by_id(due_late.id)
+    changed.mark_completed()
+    tasks.save(changed)
+
+    capped = tasks.cap_deadlines(project.id, datetime(2030, 3, 1))
+
+    assert [task.id for task in capped] == [due_late.id]
+    assert tasks.get_by_id(due_late.id).deadline == datetime(2030, 3, 1)
+    assert tasks.get_by_id(due_late.id).is_completed()
+    assert tasks.get_by_id(due_early.id).deadline == early
+
+
+def test_memory_reads_wait_for_an_open_transaction():
+    from api.adapters.memory.store import MemoryStore
+    from api.adapters.memory.project import MemoryTaskRepository
+
+    store = MemoryStore()
+    tasks = MemoryTaskRepository(store)
+    task = Task(title="rolled back")
+    seen = []
+    reader = threading.Thread(target=lambda: seen.append(tasks.get_by_id(task.id)))
+
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            tasks.save(task)
+            reader.start()
+            reader.join(0.1)
+            assert reader.is_alive()
+            raise RuntimeError()
+    reader.join()
+
+    assert seen == [None]
+    assert tasks.get_changes(0, 10).changed == []
@@ -0,0 +1,49 @@
+import os
+import threading
+import time
+from argparse import Namespace
+
+import httpx
+
+from bench.stress import Client, Stats, check_invariants, iso, start_server
+
+# a few seconds of bench/stress.py, so a broken invariant shows up in CI and not only in a soak
+CLIENTS = 8
+DURATION = 3
+
+
+def test_concurrent_writers_keep_the_invariants(tmp_path):
+    log_path = os.path.join(tmp_path, "server.log")
+    process, url = start_server(f"sqlite:///{tmp_path}/stress.db", 1, log_path)
+    try:
+        with httpx.Client(base_url=url, follow_redirects=True) as http:
+            projects = [
+                http.post("/projects/", json={"title": f"stress {i}", "deadline": iso(90)}).json()["id"]
+                for i in range(3)
+            ]
+        stop = threading.Event()
+        stats = Stats(time.monotonic(), DURATION)
+        args = Namespace(seed=1, tasks_per_client=5)
+        clients = [Client(number, url, projects, stats, args, stop) for number in range(CLIENTS)]
+        for client in clients:
+            client.start()
+        time.sleep(DURATION)
+        stop.set()
+        for client in clients:
+            client.join()
+
+        violations = check_invariants(url, clients)
+    finally:
+        process.terminate()
+        process.wait()
+
+    # the checks that span a task and its project (completed with open tasks, deadline past the
+    # project's) read the other row without locking it, so they can still race; the full run
+    # reports those, this only holds each task to what its owner last wrote
+    per_task = [
+        violation for violation in violations if violation.startswith("lost update") or violation.endswith("is gone")
+    ]
+    assert per_task == []
+    assert sum(stats.operations.values()) > CLIENTS
+    assert not [status for status in stats.statuses if status >= 500]
+    assert stats.transport_errors == 0